@@ -1,3 +1,6 @@
+-- Builds the database from scratch. To upgrade a database built by an earlier
+-- version of this script, run the files in migrations/ once each, in order:
+--   cat migrations/*.sql | mysql -u root -p
 CREATE DATABASE IF NOT EXISTS library_management_system;
 USE library_management_system;
 
@@ -7,7 +10,9 @@ CREATE TABLE Member (
     phone VARCHAR(15) NOT NULL,
     email VARCHAR(255) NOT NULL,
     join_date DATE NOT NULL,
-    strike_count INT DEFAULT 0 CHECK (strike_count >= 0)
+    strike_count INT DEFAULT 0 CHECK (strike_count >= 0),
+    active_loan_count INT DEFAULT 0 CHECK (active_loan_count >= 0),  -- open loans, kept by the Transaction and delete triggers
+    recent_strike_count INT DEFAULT 0 CHECK (recent_strike_count >= 0)  -- strikes in the last 90 days, used for priority
 );
 
 CREATE TABLE Book (
@@ -58,7 +63,8 @@ CREATE TABLE Admin (
     admin_id VARCHAR(20) PRIMARY KEY,
     name VARCHAR(255) NOT NULL,
     email VARCHAR(255) NOT NULL,
-    role VARCHAR(50) NOT NULL CHECK (role IN ('Manager', 'Staff'))
+    role VARCHAR(50) NOT NULL CHECK (role IN ('Manager', 'Staff')),
+    db_user VARCHAR(32) UNIQUE  -- MySQL account this admin logs into the app with
 );
 
 CREATE TABLE Transaction (
@@ -70,6 +76,8 @@ CREATE TABLE Transaction (
     return_date DATE,
     request_id VARCHAR(20) NOT NULL,
     admin_id VARCHAR(20) NOT NULL,
+    loan_bucket VARCHAR(10) CHECK (loan_bucket IN ('Overdue', 'DueSoon', 'Active')),  -- NULL once returned
+    return_batch BIGINT UNSIGNED,  -- ProcessReturns call that returned the loan, NULL for single returns
     FOREIGN KEY (request_id) REFERENCES BorrowRequest(request_id) ON DELETE CASCADE ON UPDATE CASCADE,
     FOREIGN KEY (admin_id) REFERENCES Admin(admin_id) ON DELETE CASCADE ON UPDATE CASCADE
 );
@@ -101,6 +109,51 @@ CREATE TABLE Strike (
     FOREIGN KEY (transaction_id) REFERENCES Transaction(transaction_id) ON DELETE CASCADE ON UPDATE CASCADE
 );
 
+-- Next numeric suffix for generated IDs (BR###, T###); rows are locked while a block is reserved
+CREATE TABLE IdSequence (
+    sequence_name VARCHAR(50) PRIMARY KEY,
+    next_value INT NOT NULL CHECK (next_value > 0)
+);
+
+-- Change feed: one row per insert/update/delete on the tables the app shows live.
+-- Readers poll for version > last seen, a range scan on the primary key.
+CREATE TABLE ChangeLog (
+    version BIGINT AUTO_INCREMENT PRIMARY KEY,
+    table_name VARCHAR(32) NOT NULL,
+    row_key VARCHAR(20) NOT NULL,
+    op CHAR(1) NOT NULL CHECK (op IN ('I', 'U', 'D')),
+    changed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_changelog_changed_at (changed_at)
+);
+
+-- Pending requests with their priority key, kept in sync by triggers so reading a
+-- book's queue is a range scan on idx_pendingqueue_priority instead of a join + sort
+CREATE TABLE PendingQueue (
+    request_id VARCHAR(20) PRIMARY KEY,
+    book_id VARCHAR(20) NOT NULL,
+    member_id VARCHAR(20) NOT NULL,
+    recent_strike_count INT NOT NULL,
+    join_date DATE NOT NULL,
+    request_date DATE NOT NULL,
+    INDEX idx_pendingqueue_priority (book_id, recent_strike_count, join_date, request_date, request_id),
+    FOREIGN KEY (request_id) REFERENCES BorrowRequest(request_id) ON DELETE CASCADE ON UPDATE CASCADE,
+    FOREIGN KEY (book_id) REFERENCES Book(book_id) ON DELETE CASCADE ON UPDATE CASCADE,
+    FOREIGN KEY (member_id) REFERENCES Member(member_id) ON DELETE CASCADE ON UPDATE CASCADE
+);
+
+-- Secondary indexes for the app's hot queries (check plans with: python Mini_project.py explain)
+CREATE INDEX idx_borrowrequest_book_status_date ON BorrowRequest (book_id, status, request_date);  -- priority queue
+CREATE INDEX idx_borrowrequest_status_book ON BorrowRequest (status, book_id);                     -- pending summary and count
+CREATE INDEX idx_borrowrequest_requester_date ON BorrowRequest (member_id_requester, request_date); -- member's requests
+CREATE INDEX idx_transaction_return_due ON Transaction (return_date, due_date);                     -- active loans by due date
+CREATE INDEX idx_transaction_bucket_due ON Transaction (loan_bucket, due_date);                      -- overdue / due-soon lists
+CREATE INDEX idx_strike_date ON Strike (strike_date);
+CREATE INDEX idx_book_status_title ON Book (status, title, book_id);                                -- available books page
+
+-- Full-text indexes backing the Books and Members search boxes
+CREATE FULLTEXT INDEX ft_book_title_author ON Book (title, author);
+CREATE FULLTEXT INDEX ft_member_name_email ON Member (name, email);
+
 INSERT INTO Member (member_id, name, phone, email, join_date, strike_count) VALUES
 ('M001', 'Alice Johnson', '9876543210', 'alice.j@email.com', '2025-01-15', 0),
 ('M002', 'Bob Smith', '8765432109', 'bob.s@email.com', '2025-02-20', 1),
@@ -137,9 +190,9 @@ INSERT INTO Category (category_id, category_name) VALUES
 ('C001', 'Classic'), ('C002', 'Fiction'), ('C003', 'Fantasy'), ('C004', 'Science Fiction'),
 ('C005', 'History'), ('C006', 'Horror'), ('C007', 'Mystery');
 
-INSERT INTO Admin (admin_id, name, email, role) VALUES
-('A001', 'Manager Admin', 'admin1@library.com', 'Manager'),
-('A002', 'Staff Admin', 'admin2@library.com', 'Staff');
+INSERT INTO Admin (admin_id, name, email, role, db_user) VALUES
+('A001', 'Manager Admin', 'admin1@library.com', 'Manager', 'library_admin'),
+('A002', 'Staff Admin', 'admin2@library.com', 'Staff', NULL);
 
 INSERT INTO BorrowRequest (request_id, request_date, status, member_id_requester, member_id_owner, book_id) VALUES
 ('BR001', '2025-10-01', 'Completed', 'M002', 'M001', 'B003'),
@@ -159,6 +212,11 @@ INSERT INTO Transaction (transaction_id, borrow_date, extension_count, extension
 ('T005', '2025-11-01', 0, NULL, '2025-11-15', '2025-11-15', 'BR002', 'A002'),
 ('T006', '2025-11-05', 0, NULL, '2025-11-20', '2025-11-20', 'BR005', 'A001');
 
+INSERT INTO IdSequence (sequence_name, next_value)
+SELECT 'BorrowRequest', COALESCE(MAX(CAST(SUBSTRING(request_id, 3) AS UNSIGNED)), 0) + 1 FROM BorrowRequest
+UNION ALL
+SELECT 'Transaction', COALESCE(MAX(CAST(SUBSTRING(transaction_id, 2) AS UNSIGNED)), 0) + 1 FROM Transaction;
+
 INSERT INTO Feedback (feedback_id, rating, comments, transaction_id) VALUES
 ('F001', 5, 'Great book and service!', 'T001'), ('F002', 4, 'Smooth process overall.', 'T002'),
 ('F003', 5, 'The book was in perfect condition.', 'T004'), ('F004', 3, 'The return process was a bit slow.', 'T005'),
@@ -184,19 +242,121 @@ INSERT INTO Reviews (member_id, book_id, comments) VALUES
 
 DELIMITER $$
 
+-- Overdue engine. loan_bucket is set when a loan is written and re-derived
+-- daily by RefreshLoanBuckets, so listing overdue or due-soon loans is an
+-- index range scan instead of a DATEDIFF over every open loan.
+CREATE FUNCTION LoanBucket(
+    due_date_param DATE,
+    return_date_param DATE
+)
+RETURNS VARCHAR(10)
+NOT DETERMINISTIC
+NO SQL
+BEGIN
+    IF return_date_param IS NOT NULL THEN
+        RETURN NULL;
+    ELSEIF due_date_param < CURDATE() THEN
+        RETURN 'Overdue';
+    ELSEIF due_date_param <= CURDATE() + INTERVAL 2 DAY THEN
+        RETURN 'DueSoon';
+    ELSE
+        RETURN 'Active';
+    END IF;
+END$$
+
+
+CREATE TRIGGER before_transaction_insert_bucket
+BEFORE INSERT ON Transaction
+FOR EACH ROW
+BEGIN
+    SET NEW.loan_bucket = LoanBucket(NEW.due_date, NEW.return_date);
+END$$
+
+
+CREATE TRIGGER before_transaction_update_bucket
+BEFORE UPDATE ON Transaction
+FOR EACH ROW
+BEGIN
+    SET NEW.loan_bucket = LoanBucket(NEW.due_date, NEW.return_date);
+END$$
+
+
+CREATE PROCEDURE RefreshLoanBuckets()
+BEGIN
+    -- Only open loans whose bucket moved since the last run are rewritten
+    UPDATE Transaction
+    SET loan_bucket = LoanBucket(due_date, return_date)
+    WHERE return_date IS NULL
+      AND NOT (loan_bucket <=> LoanBucket(due_date, return_date));
+END$$
+
+
+-- Runs at midnight while event_scheduler is ON (the MySQL 8 default)
+CREATE EVENT refresh_loan_buckets
+ON SCHEDULE EVERY 1 DAY STARTS CURRENT_DATE + INTERVAL 1 DAY
+DO CALL RefreshLoanBuckets()$$
+
+
+-- Strike ledger. strike_count and recent_strike_count are bumped as strikes are
+-- issued; RefreshRecentStrikes ages strikes out of the 90-day window each day and
+-- ReconcileStrikeCounts rebuilds both counts from the Strike table.
+CREATE PROCEDURE RefreshRecentStrikes()
+BEGIN
+    UPDATE Member m
+    LEFT JOIN (
+        SELECT member_id, COUNT(*) AS recent_count
+        FROM Strike
+        WHERE strike_date > CURDATE() - INTERVAL 90 DAY
+        GROUP BY member_id
+    ) recent ON m.member_id = recent.member_id
+    SET m.recent_strike_count = COALESCE(recent.recent_count, 0)
+    WHERE m.recent_strike_count <> COALESCE(recent.recent_count, 0);
+END$$
+
+
+CREATE PROCEDURE ReconcileStrikeCounts()
+BEGIN
+    UPDATE Member m
+    LEFT JOIN (
+        SELECT
+            member_id,
+            COUNT(*) AS strike_total,
+            SUM(strike_date > CURDATE() - INTERVAL 90 DAY) AS recent_count
+        FROM Strike
+        GROUP BY member_id
+    ) ledger ON m.member_id = ledger.member_id
+    SET m.strike_count = COALESCE(ledger.strike_total, 0),
+        m.recent_strike_count = COALESCE(ledger.recent_count, 0)
+    WHERE m.strike_count <> COALESCE(ledger.strike_total, 0)
+       OR m.recent_strike_count <> COALESCE(ledger.recent_count, 0);
+
+    SELECT ROW_COUNT() AS members_corrected;
+END$$
+
+
+CREATE EVENT refresh_recent_strikes
+ON SCHEDULE EVERY 1 DAY STARTS CURRENT_DATE + INTERVAL 1 DAY
+DO CALL RefreshRecentStrikes()$$
+
+
 CREATE TRIGGER after_transaction_insert_update_book_status
 AFTER INSERT ON Transaction
 FOR EACH ROW
 BEGIN
     DECLARE book_id_to_update VARCHAR(20);
+    DECLARE requester_id VARCHAR(20);
 
-    SELECT book_id INTO book_id_to_update
+    SELECT book_id, member_id_requester INTO book_id_to_update, requester_id
     FROM BorrowRequest
     WHERE request_id = NEW.request_id;
 
     UPDATE Book
     SET status = 'Lent'
     WHERE book_id = book_id_to_update;
+
+    IF NEW.return_date IS NULL THEN
+        UPDATE Member SET active_loan_count = active_loan_count + 1 WHERE member_id = requester_id;
+    END IF;
 END$$
 
 
@@ -208,51 +368,319 @@ BEGIN
     DECLARE book_id_to_update VARCHAR(20);
     DECLARE days_late INT;
 
-    IF OLD.return_date IS NULL AND NEW.return_date IS NOT NULL THEN
+    -- ProcessReturns stamps return_batch in the same UPDATE and does this work set-based
+    IF OLD.return_date IS NULL AND NEW.return_date IS NOT NULL AND NEW.return_batch <=> OLD.return_batch THEN
         SELECT br.member_id_requester, br.book_id
         INTO requester_id, book_id_to_update
         FROM BorrowRequest br
         WHERE br.request_id = NEW.request_id;
 
         UPDATE Book SET status = 'Available' WHERE book_id = book_id_to_update;
+        UPDATE Member SET active_loan_count = active_loan_count - 1 WHERE member_id = requester_id;
 
         SET days_late = DATEDIFF(NEW.return_date, NEW.due_date);
 
         IF days_late > 0 THEN
+            -- Dated by the return: a back-dated return outside the window isn't a recent strike
             INSERT INTO Strike (member_id, transaction_id, strike_date, reason)
-            VALUES (requester_id, NEW.transaction_id, CURDATE(), CONCAT('Returned ', days_late, ' days late.'));
+            VALUES (requester_id, NEW.transaction_id, NEW.return_date, CONCAT('Returned ', days_late, ' days late.'));
 
-            UPDATE Member SET strike_count = strike_count + 1 WHERE member_id = requester_id;
+            UPDATE Member
+            SET strike_count = strike_count + 1,
+                recent_strike_count = recent_strike_count + (NEW.return_date > CURDATE() - INTERVAL 90 DAY)
+            WHERE member_id = requester_id;
         END IF;
     END IF;
 END$$
 
+
+-- Loan counts. Deletes cascade into Transaction without firing its triggers, so
+-- the tables whose deletes reach loans take the open ones off active_loan_count
+-- first. Member can't: a trigger may not update the table its statement deletes
+-- from, so member deletes are followed by ReconcileActiveLoanCounts.
+CREATE TRIGGER before_book_delete_loan_counts
+BEFORE DELETE ON Book
+FOR EACH ROW
+BEGIN
+    UPDATE Member m
+    JOIN (
+        SELECT br.member_id_requester AS member_id, COUNT(*) AS open_loans
+        FROM Transaction t
+        JOIN BorrowRequest br ON t.request_id = br.request_id
+        WHERE br.book_id = OLD.book_id AND t.return_date IS NULL
+        GROUP BY br.member_id_requester
+    ) lost ON m.member_id = lost.member_id
+    SET m.active_loan_count = m.active_loan_count - lost.open_loans;
+END$$
+
+
+CREATE TRIGGER before_borrowrequest_delete_loan_count
+BEFORE DELETE ON BorrowRequest
+FOR EACH ROW
+BEGIN
+    UPDATE Member
+    SET active_loan_count = active_loan_count - (
+        SELECT COUNT(*) FROM Transaction WHERE request_id = OLD.request_id AND return_date IS NULL
+    )
+    WHERE member_id = OLD.member_id_requester;
+END$$
+
+
+CREATE TRIGGER before_admin_delete_loan_counts
+BEFORE DELETE ON Admin
+FOR EACH ROW
+BEGIN
+    UPDATE Member m
+    JOIN (
+        SELECT br.member_id_requester AS member_id, COUNT(*) AS open_loans
+        FROM Transaction t
+        JOIN BorrowRequest br ON t.request_id = br.request_id
+        WHERE t.admin_id = OLD.admin_id AND t.return_date IS NULL
+        GROUP BY br.member_id_requester
+    ) lost ON m.member_id = lost.member_id
+    SET m.active_loan_count = m.active_loan_count - lost.open_loans;
+END$$
+
+
+CREATE TRIGGER after_transaction_delete_loan_count
+AFTER DELETE ON Transaction
+FOR EACH ROW
+BEGIN
+    IF OLD.return_date IS NULL THEN
+        UPDATE Member m
+        JOIN BorrowRequest br ON br.member_id_requester = m.member_id
+        SET m.active_loan_count = m.active_loan_count - 1
+        WHERE br.request_id = OLD.request_id;
+    END IF;
+END$$
+
+
+CREATE PROCEDURE ReconcileActiveLoanCounts()
+BEGIN
+    UPDATE Member m
+    LEFT JOIN (
+        SELECT br.member_id_requester AS member_id, COUNT(*) AS open_loans
+        FROM Transaction t
+        JOIN BorrowRequest br ON t.request_id = br.request_id
+        WHERE t.return_date IS NULL
+        GROUP BY br.member_id_requester
+    ) loans ON m.member_id = loans.member_id
+    SET m.active_loan_count = COALESCE(loans.open_loans, 0)
+    WHERE m.active_loan_count <> COALESCE(loans.open_loans, 0);
+
+    SELECT ROW_COUNT() AS members_corrected;
+END$$
+
+
+-- Catches member deletes made outside the app
+CREATE EVENT reconcile_active_loan_counts
+ON SCHEDULE EVERY 1 DAY STARTS CURRENT_DATE + INTERVAL 1 DAY
+DO CALL ReconcileActiveLoanCounts()$$
+
+
+-- PendingQueue maintenance. Rows cascaded by foreign keys don't fire triggers,
+-- which is why PendingQueue carries its own foreign keys.
+CREATE TRIGGER after_borrowrequest_insert_queue
+AFTER INSERT ON BorrowRequest
+FOR EACH ROW
+BEGIN
+    IF NEW.status = 'Pending' THEN
+        INSERT INTO PendingQueue (request_id, book_id, member_id, recent_strike_count, join_date, request_date)
+        SELECT NEW.request_id, NEW.book_id, m.member_id, m.recent_strike_count, m.join_date, NEW.request_date
+        FROM Member m
+        WHERE m.member_id = NEW.member_id_requester;
+    END IF;
+END$$
+
+
+CREATE TRIGGER after_borrowrequest_update_queue
+AFTER UPDATE ON BorrowRequest
+FOR EACH ROW
+BEGIN
+    IF OLD.status = 'Pending' THEN
+        DELETE FROM PendingQueue WHERE request_id = OLD.request_id;
+    END IF;
+
+    IF NEW.status = 'Pending' THEN
+        INSERT INTO PendingQueue (request_id, book_id, member_id, recent_strike_count, join_date, request_date)
+        SELECT NEW.request_id, NEW.book_id, m.member_id, m.recent_strike_count, m.join_date, NEW.request_date
+        FROM Member m
+        WHERE m.member_id = NEW.member_id_requester;
+    END IF;
+END$$
+
+
+CREATE TRIGGER after_member_update_queue
+AFTER UPDATE ON Member
+FOR EACH ROW
+BEGIN
+    IF NEW.recent_strike_count <> OLD.recent_strike_count OR NEW.join_date <> OLD.join_date THEN
+        UPDATE PendingQueue
+        SET recent_strike_count = NEW.recent_strike_count, join_date = NEW.join_date
+        WHERE member_id = NEW.member_id;
+    END IF;
+END$$
+
+
+-- Change feed triggers. Rows removed by a foreign key cascade don't fire these
+-- (e.g. loans deleted along with their member); screens catch up on Refresh.
+CREATE TRIGGER changelog_member_insert
+AFTER INSERT ON Member
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (table_name, row_key, op) VALUES ('Member', NEW.member_id, 'I');
+END$$
+
+
+CREATE TRIGGER changelog_member_update
+AFTER UPDATE ON Member
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (table_name, row_key, op) VALUES ('Member', NEW.member_id, 'U');
+END$$
+
+
+CREATE TRIGGER changelog_member_delete
+AFTER DELETE ON Member
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (table_name, row_key, op) VALUES ('Member', OLD.member_id, 'D');
+END$$
+
+
+CREATE TRIGGER changelog_book_insert
+AFTER INSERT ON Book
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (table_name, row_key, op) VALUES ('Book', NEW.book_id, 'I');
+END$$
+
+
+CREATE TRIGGER changelog_book_update
+AFTER UPDATE ON Book
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (table_name, row_key, op) VALUES ('Book', NEW.book_id, 'U');
+END$$
+
+
+CREATE TRIGGER changelog_book_delete
+AFTER DELETE ON Book
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (table_name, row_key, op) VALUES ('Book', OLD.book_id, 'D');
+END$$
+
+
+CREATE TRIGGER changelog_transaction_insert
+AFTER INSERT ON Transaction
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (table_name, row_key, op) VALUES ('Transaction', NEW.transaction_id, 'I');
+END$$
+
+
+CREATE TRIGGER changelog_transaction_update
+AFTER UPDATE ON Transaction
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (table_name, row_key, op) VALUES ('Transaction', NEW.transaction_id, 'U');
+END$$
+
+
+CREATE TRIGGER changelog_transaction_delete
+AFTER DELETE ON Transaction
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (table_name, row_key, op) VALUES ('Transaction', OLD.transaction_id, 'D');
+END$$
+
+
+-- ChangeLog only has to cover readers that fell behind, a day is plenty
+CREATE EVENT purge_change_log
+ON SCHEDULE EVERY 1 HOUR
+DO DELETE FROM ChangeLog WHERE changed_at < NOW() - INTERVAL 1 DAY$$
+
 DELIMITER ;
 
+-- Bucket and count the loans inserted before the triggers existed
+CALL RefreshLoanBuckets();
+CALL RefreshRecentStrikes();
+CALL ReconcileActiveLoanCounts();
+
+-- Seed the queue with requests that were pending before the triggers existed
+INSERT INTO PendingQueue (request_id, book_id, member_id, recent_strike_count, join_date, request_date)
+SELECT br.request_id, br.book_id, m.member_id, m.recent_strike_count, m.join_date, br.request_date
+FROM BorrowRequest br
+JOIN Member m ON m.member_id = br.member_id_requester
+WHERE br.status = 'Pending';
+
 
 DELIMITER $$
 
+CREATE PROCEDURE AllocateIds(
+    IN sequence_name_param VARCHAR(50),
+    IN block_size_param INT,
+    OUT first_value_param INT
+)
+BEGIN
+    -- FOR UPDATE locks the sequence row until the caller commits, so concurrent
+    -- callers always receive disjoint blocks
+    SELECT next_value INTO first_value_param
+    FROM IdSequence
+    WHERE sequence_name = sequence_name_param
+    FOR UPDATE;
+
+    UPDATE IdSequence
+    SET next_value = next_value + block_size_param
+    WHERE sequence_name = sequence_name_param;
+END$$
+
+
 CREATE PROCEDURE ApproveBorrowRequest(
     IN request_id_param VARCHAR(20),
     IN admin_id_param VARCHAR(20)
 )
 BEGIN
+    -- Kept for existing callers; same checks and ID format as the Ex version
+    CALL ApproveBorrowRequestEx(request_id_param, admin_id_param, NULL);
+END$$
+
+
+-- Single-call approval: locks the request, uses the given due date (NULL for
+-- the default 14 days) and returns the new transaction_id as a result row
+CREATE PROCEDURE ApproveBorrowRequestEx(
+    IN request_id_param VARCHAR(20),
+    IN admin_id_param VARCHAR(20),
+    IN due_date_param DATE
+)
+BEGIN
+    DECLARE request_status VARCHAR(50);
     DECLARE new_id_num INT;
+    DECLARE new_transaction_id VARCHAR(20);
+
+    SELECT status INTO request_status
+    FROM BorrowRequest
+    WHERE request_id = request_id_param
+    FOR UPDATE;
 
-    IF (SELECT status FROM BorrowRequest WHERE request_id = request_id_param) = 'Pending' THEN
-        SET new_id_num = (SELECT COUNT(*) + 1 FROM Transaction);
+    IF request_status = 'Pending' THEN
+        CALL AllocateIds('Transaction', 1, new_id_num);
+        SET new_transaction_id = CONCAT('T', LPAD(new_id_num, GREATEST(3, CHAR_LENGTH(new_id_num)), '0'));
 
         UPDATE BorrowRequest SET status = 'Completed' WHERE request_id = request_id_param;
 
         INSERT INTO Transaction (transaction_id, borrow_date, due_date, request_id, admin_id, extension_count)
         VALUES (
-            CONCAT('T', LPAD(new_id_num, 3, '0')),
+            new_transaction_id,
             CURDATE(),
-            DATE_ADD(CURDATE(), INTERVAL 14 DAY),
+            COALESCE(due_date_param, DATE_ADD(CURDATE(), INTERVAL 14 DAY)),
             request_id_param,
             admin_id_param,
             0
         );
+
+        SELECT new_transaction_id AS transaction_id;
     ELSE
         SIGNAL SQLSTATE '45000' SET MESSAGE_TEXT = 'Request is not pending and cannot be approved.';
     END IF;
@@ -264,22 +692,51 @@ CREATE PROCEDURE GetPrioritizedRequestList(
 )
 BEGIN
     SELECT
-        br.request_id,
-        br.request_date,
-        m.member_id,
+        pq.request_id,
+        pq.request_date,
+        pq.member_id,
+        m.name AS requester_name,
+        pq.recent_strike_count,
+        pq.join_date
+    FROM
+        PendingQueue pq
+    JOIN
+        Member m ON pq.member_id = m.member_id
+    WHERE
+        pq.book_id = book_id_param
+    ORDER BY
+        pq.recent_strike_count ASC,
+        pq.join_date ASC,
+        pq.request_date ASC,
+        pq.request_id ASC;
+END$$
+
+
+-- First limit_param entries of a book's queue
+CREATE PROCEDURE GetPrioritizedRequestListTop(
+    IN book_id_param VARCHAR(20),
+    IN limit_param INT
+)
+BEGIN
+    SELECT
+        pq.request_id,
+        pq.request_date,
+        pq.member_id,
         m.name AS requester_name,
-        m.strike_count,
-        m.join_date
+        pq.recent_strike_count,
+        pq.join_date
     FROM
-        BorrowRequest br
+        PendingQueue pq
     JOIN
-        Member m ON br.member_id_requester = m.member_id
+        Member m ON pq.member_id = m.member_id
     WHERE
-        br.book_id = book_id_param AND br.status = 'Pending'
+        pq.book_id = book_id_param
     ORDER BY
-        m.strike_count ASC,
-        m.join_date ASC,
-        br.request_date ASC;
+        pq.recent_strike_count ASC,
+        pq.join_date ASC,
+        pq.request_date ASC,
+        pq.request_id ASC
+    LIMIT limit_param;
 END$$
 
 
@@ -292,6 +749,261 @@ BEGIN
     WHERE request_id = request_id_param AND status = 'Pending';
 END$$
 
+
+-- Batch variants: request_ids_param is a JSON array of distinct request IDs.
+-- Everything happens in the caller's transaction and one result row is
+-- returned per request (request_id, transaction_id, outcome).
+-- At most one request per book is approved, the first pending one in the
+-- list, and only if the book isn't already Lent; other pending requests for
+-- the book are left pending and reported as 'Book not available'.
+CREATE PROCEDURE ApproveBorrowRequests(
+    IN request_ids_param JSON,
+    IN admin_id_param VARCHAR(20),
+    IN due_date_param DATE
+)
+BEGIN
+    DECLARE locked_count INT;
+    DECLARE approved_count INT;
+    DECLARE first_id_num INT;
+
+    -- Lock the requests and their books up front so concurrent approvals of the
+    -- same request, or of two requests for the same book, serialise
+    SELECT COUNT(*) INTO locked_count
+    FROM BorrowRequest
+    WHERE request_id IN (
+        SELECT jt.request_id
+        FROM JSON_TABLE(request_ids_param, '$[*]' COLUMNS (request_id VARCHAR(20) PATH '$')) jt
+    )
+    FOR UPDATE;
+
+    SELECT COUNT(*) INTO locked_count
+    FROM Book
+    WHERE book_id IN (
+        SELECT br.book_id
+        FROM BorrowRequest br
+        JOIN JSON_TABLE(request_ids_param, '$[*]' COLUMNS (request_id VARCHAR(20) PATH '$')) jt
+            ON br.request_id = jt.request_id
+    )
+    FOR UPDATE;
+
+    DROP TEMPORARY TABLE IF EXISTS BatchRequest;
+    CREATE TEMPORARY TABLE BatchRequest (
+        position INT PRIMARY KEY,
+        request_id VARCHAR(20) NOT NULL,
+        was_pending BOOLEAN,
+        approve BOOLEAN NOT NULL,
+        approve_rank INT,
+        transaction_id VARCHAR(20)
+    );
+
+    INSERT INTO BatchRequest (position, request_id, was_pending, approve, approve_rank)
+    SELECT
+        position,
+        request_id,
+        was_pending,
+        approve,
+        IF(approve, ROW_NUMBER() OVER (PARTITION BY approve ORDER BY position), NULL)
+    FROM (
+        SELECT
+            jt.position,
+            jt.request_id,
+            br.status = 'Pending' AS was_pending,
+            COALESCE(
+                br.status = 'Pending'
+                AND bk.status <> 'Lent'
+                AND ROW_NUMBER() OVER (PARTITION BY br.book_id, br.status = 'Pending' ORDER BY jt.position) = 1,
+                FALSE
+            ) AS approve
+        FROM JSON_TABLE(request_ids_param, '$[*]' COLUMNS (
+            position FOR ORDINALITY,
+            request_id VARCHAR(20) PATH '$'
+        )) jt
+        LEFT JOIN BorrowRequest br ON br.request_id = jt.request_id
+        LEFT JOIN Book bk ON bk.book_id = br.book_id
+    ) batch;
+
+    SELECT COUNT(*) INTO approved_count FROM BatchRequest WHERE approve;
+
+    IF approved_count > 0 THEN
+        CALL AllocateIds('Transaction', approved_count, first_id_num);
+
+        UPDATE BatchRequest
+        SET transaction_id = CONCAT('T', LPAD(first_id_num + approve_rank - 1, GREATEST(3, CHAR_LENGTH(first_id_num + approve_rank - 1)), '0'))
+        WHERE approve;
+
+        UPDATE BorrowRequest br
+        JOIN BatchRequest b ON br.request_id = b.request_id
+        SET br.status = 'Completed'
+        WHERE b.approve;
+
+        INSERT INTO Transaction (transaction_id, borrow_date, due_date, request_id, admin_id, extension_count)
+        SELECT
+            transaction_id,
+            CURDATE(),
+            COALESCE(due_date_param, DATE_ADD(CURDATE(), INTERVAL 14 DAY)),
+            request_id,
+            admin_id_param,
+            0
+        FROM BatchRequest
+        WHERE approve;
+    END IF;
+
+    SELECT
+        request_id,
+        transaction_id,
+        CASE
+            WHEN approve THEN 'Approved'
+            WHEN was_pending THEN 'Book not available'
+            WHEN was_pending IS NULL THEN 'Not found'
+            ELSE 'Not pending'
+        END AS outcome
+    FROM BatchRequest
+    ORDER BY position;
+
+    DROP TEMPORARY TABLE BatchRequest;
+END$$
+
+
+CREATE PROCEDURE DenyBorrowRequests(
+    IN request_ids_param JSON
+)
+BEGIN
+    DECLARE locked_count INT;
+
+    SELECT COUNT(*) INTO locked_count
+    FROM BorrowRequest
+    WHERE request_id IN (
+        SELECT jt.request_id
+        FROM JSON_TABLE(request_ids_param, '$[*]' COLUMNS (request_id VARCHAR(20) PATH '$')) jt
+    )
+    FOR UPDATE;
+
+    DROP TEMPORARY TABLE IF EXISTS BatchRequest;
+    CREATE TEMPORARY TABLE BatchRequest (
+        position INT PRIMARY KEY,
+        request_id VARCHAR(20) NOT NULL,
+        was_pending BOOLEAN
+    );
+
+    INSERT INTO BatchRequest (position, request_id, was_pending)
+    SELECT jt.position, jt.request_id, br.status = 'Pending'
+    FROM JSON_TABLE(request_ids_param, '$[*]' COLUMNS (
+        position FOR ORDINALITY,
+        request_id VARCHAR(20) PATH '$'
+    )) jt
+    LEFT JOIN BorrowRequest br ON br.request_id = jt.request_id;
+
+    UPDATE BorrowRequest br
+    JOIN BatchRequest b ON br.request_id = b.request_id
+    SET br.status = 'Denied'
+    WHERE b.was_pending;
+
+    SELECT
+        request_id,
+        NULL AS transaction_id,
+        CASE
+            WHEN was_pending THEN 'Denied'
+            WHEN was_pending IS NULL THEN 'Not found'
+            ELSE 'Not pending'
+        END AS outcome
+    FROM BatchRequest
+    ORDER BY position;
+
+    DROP TEMPORARY TABLE BatchRequest;
+END$$
+
+
+-- Returns a batch of loans in one transaction. The loans are stamped with a
+-- return_batch ID in the same UPDATE that returns them, which tells the return
+-- trigger to leave them alone; books, strikes and strike counts are then
+-- updated with one statement each for the whole batch.
+CREATE PROCEDURE ProcessReturns(
+    IN transaction_ids_param JSON,
+    IN return_date_param DATE
+)
+BEGIN
+    DECLARE locked_count INT;
+    DECLARE returned_on DATE DEFAULT COALESCE(return_date_param, CURDATE());
+    DECLARE batch_id BIGINT UNSIGNED DEFAULT UUID_SHORT();
+
+    SELECT COUNT(*) INTO locked_count
+    FROM Transaction
+    WHERE transaction_id IN (
+        SELECT jt.transaction_id
+        FROM JSON_TABLE(transaction_ids_param, '$[*]' COLUMNS (transaction_id VARCHAR(20) PATH '$')) jt
+    )
+    FOR UPDATE;
+
+    DROP TEMPORARY TABLE IF EXISTS BatchReturn;
+    CREATE TEMPORARY TABLE BatchReturn (
+        position INT PRIMARY KEY,
+        transaction_id VARCHAR(20) NOT NULL,
+        was_open BOOLEAN,
+        member_id VARCHAR(20),
+        book_id VARCHAR(20),
+        days_late INT
+    );
+
+    INSERT INTO BatchReturn (position, transaction_id, was_open, member_id, book_id, days_late)
+    SELECT
+        jt.position,
+        jt.transaction_id,
+        t.return_date IS NULL,
+        br.member_id_requester,
+        br.book_id,
+        DATEDIFF(returned_on, t.due_date)
+    FROM JSON_TABLE(transaction_ids_param, '$[*]' COLUMNS (
+        position FOR ORDINALITY,
+        transaction_id VARCHAR(20) PATH '$'
+    )) jt
+    LEFT JOIN Transaction t ON t.transaction_id = jt.transaction_id
+    LEFT JOIN BorrowRequest br ON br.request_id = t.request_id;
+
+    UPDATE Transaction t
+    JOIN BatchReturn b ON t.transaction_id = b.transaction_id
+    SET t.return_date = returned_on,
+        t.return_batch = batch_id
+    WHERE b.was_open;
+
+    UPDATE Book bk
+    JOIN BatchReturn b ON bk.book_id = b.book_id
+    SET bk.status = 'Available'
+    WHERE b.was_open;
+
+    -- Dated by the return, like the trigger's strikes
+    INSERT INTO Strike (member_id, transaction_id, strike_date, reason)
+    SELECT member_id, transaction_id, returned_on, CONCAT('Returned ', days_late, ' days late.')
+    FROM BatchReturn
+    WHERE was_open AND days_late > 0
+    ORDER BY position;
+
+    -- One UPDATE for every member, however many of their loans came back
+    UPDATE Member m
+    JOIN (
+        SELECT member_id, COUNT(*) AS returned_count, SUM(days_late > 0) AS late_count
+        FROM BatchReturn
+        WHERE was_open
+        GROUP BY member_id
+    ) returned ON m.member_id = returned.member_id
+    SET m.active_loan_count = m.active_loan_count - returned.returned_count,
+        m.strike_count = m.strike_count + returned.late_count,
+        m.recent_strike_count = m.recent_strike_count + returned.late_count * (returned_on > CURDATE() - INTERVAL 90 DAY);
+
+    SELECT
+        transaction_id,
+        IF(was_open, GREATEST(days_late, 0), NULL) AS days_late,
+        CASE
+            WHEN was_open AND days_late > 0 THEN 'Returned late'
+            WHEN was_open THEN 'Returned'
+            WHEN was_open IS NULL THEN 'Not found'
+            ELSE 'Already returned'
+        END AS outcome
+    FROM BatchReturn
+    ORDER BY position;
+
+    DROP TEMPORARY TABLE BatchReturn;
+END$$
+
 DELIMITER ;
 
 
@@ -301,7 +1013,8 @@ CREATE FUNCTION IsBookAvailable(
     book_id_param VARCHAR(20)
 )
 RETURNS BOOLEAN
-DETERMINISTIC
+NOT DETERMINISTIC
+READS SQL DATA
 BEGIN
     DECLARE book_status VARCHAR(50);
 
@@ -320,17 +1033,17 @@ CREATE FUNCTION GetMemberActiveLoanCount(
     member_id_param VARCHAR(20)
 )
 RETURNS INT
-DETERMINISTIC
+NOT DETERMINISTIC
+READS SQL DATA
 BEGIN
     DECLARE loan_count INT;
 
-    SELECT COUNT(*)
+    SELECT active_loan_count
     INTO loan_count
-    FROM Transaction t
-    JOIN BorrowRequest br ON t.request_id = br.request_id
-    WHERE br.member_id_requester = member_id_param AND t.return_date IS NULL;
+    FROM Member
+    WHERE member_id = member_id_param;
 
-    RETURN loan_count;
+    RETURN COALESCE(loan_count, 0);
 END$$
 
 DELIMITER ;
@@ -1,230 +1,1516 @@
 import gradio as gr
 from datetime import datetime, timedelta
+import argparse
+import asyncio
+import atexit
+import bisect
+import csv
+import getpass
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
 import pandas as pd
+import uvicorn
+from fastapi import FastAPI, Response
 import mysql.connector
 from mysql.connector import Error
+from mysql.connector.errors import PoolError
 
-# Global variable to store current user session
-current_user_session = {
-    'username': None,
-    'password': None,
-    'is_admin': False,
-    'is_authenticated': False
-}
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet import is optional
+    pa = pc = pq = None
+
+try:
+    import aiomysql
+except ImportError:  # without it the async query helpers run the sync ones on a worker thread
+    aiomysql = None
+
+# Database settings
+DB_HOST = 'localhost'
+DB_NAME = 'library_management_system'
+
+# Allowed values from the schema's CHECK constraints
+BOOK_CONDITIONS = ['Excellent', 'Good', 'Fair', 'Poor']
+BOOK_STATUSES = ['Available', 'Lent', 'Reserved', 'Maintenance']
+
+# Connection pool settings (one pool per set of credentials, i.e. per role)
+POOL_SIZE = 20                    # maximum open connections per pool
+POOL_ACQUIRE_TIMEOUT = 10         # seconds to wait for a free connection
+POOL_IDLE_TIMEOUT = 300           # close connections idle for longer than this
+POOL_HEALTH_CHECK_INTERVAL = 30   # ping connections idle for longer than this before reuse
+POOL_MAX_STATEMENTS = 32          # prepared statements kept open per connection, least recently used closed first
+
+# Number of events Gradio runs concurrently across all sessions
+GRADIO_CONCURRENCY_LIMIT = 40
+
+# Per-browser session state (held in a gr.State, never shared between users)
+def new_session():
+    """Create an unauthenticated session"""
+    return {
+        'username': None,
+        'password': None,
+        'is_admin': False,
+        'admin_id': None,  # Admin row linked to this database user (admins only)
+        'is_authenticated': False,
+        'pages': {},               # per table: {'versions', 'total', 'keys': {page size: {page: last row key}}}
+        'change_version': None,    # last change-feed position applied to this session's tables
+        'dashboard_stats': None    # dashboard numbers the live timer last sent
+    }
+
+# Connection Pool
+class PooledConnection:
+    """Connection checked out of a ConnectionPool; close() hands it back to the pool"""
+
+    def __init__(self, pool, connection):
+        self._pool = pool
+        self._connection = connection
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+    def is_connected(self):
+        # Checked-out connections were verified on checkout, avoid a ping per call
+        return self._connection is not None
+
+    def prepared_cursor(self, query):
+        """Cursor with query prepared on the underlying connection; don't close it, the pool reuses it"""
+        return self._pool.prepared_cursor(self._connection, query)
+
+    def discard_statement(self, query):
+        """Close the prepared cursor for query after it failed, so the next checkout prepares it afresh"""
+        self._pool.discard_statement(self._connection, query)
+
+    def close(self):
+        if self._connection is not None:
+            self._pool.release(self._connection)
+            self._connection = None
+
+
+class ConnectionPool:
+    """Bounded pool of MySQL connections for a single set of credentials"""
+
+    def __init__(self, username, password, size=POOL_SIZE, acquire_timeout=POOL_ACQUIRE_TIMEOUT,
+                 idle_timeout=POOL_IDLE_TIMEOUT, health_check_interval=POOL_HEALTH_CHECK_INTERVAL,
+                 max_statements=POOL_MAX_STATEMENTS):
+        self.username = username
+        self.password = password
+        self.size = size
+        self.acquire_timeout = acquire_timeout
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self.max_statements = max_statements
+        self._idle = deque()  # (connection, last_used) pairs, most recently used on the right
+        self._statements = {}  # connection -> OrderedDict of query -> prepared cursor
+        self._open = 0
+        self._in_use = 0
+        self._condition = threading.Condition()
+        self._counters = {
+            'checkouts': 0,
+            'created': 0,
+            'reconnects': 0,
+            'evicted': 0,
+            'waits': 0,
+            'wait_time': 0.0,
+            'timeouts': 0,
+            'statements_prepared': 0,
+            'statements_reused': 0
+        }
+
+    def _connect(self):
+        connection = mysql.connector.connect(
+            host=DB_HOST,
+            user=self.username,
+            password=self.password,
+            database=DB_NAME
+        )
+        with self._condition:
+            self._counters['created'] += 1
+        return connection
+
+    def _evict_idle(self, now):
+        """Pop connections idle past idle_timeout; caller holds the lock and closes them"""
+        evicted = []
+        while self._idle and now - self._idle[0][1] > self.idle_timeout:
+            evicted.append(self._idle.popleft()[0])
+        self._open -= len(evicted)
+        self._counters['evicted'] += len(evicted)
+        return evicted
+
+    def _close_quietly(self, connections):
+        for connection in connections:
+            # Closing the connection frees its prepared statements on the server
+            self._statements.pop(connection, None)
+            try:
+                connection.close()
+            except Error:
+                pass
+
+    def get_connection(self):
+        """Check out a connection, waiting up to acquire_timeout for one to free up"""
+        start = time.monotonic()
+        deadline = start + self.acquire_timeout
+        waited = False
+        connection = None
+        last_used = None
+
+        with self._condition:
+            evicted = self._evict_idle(start)
+            while not self._idle and self._open >= self.size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._counters['timeouts'] += 1
+                    self._close_quietly(evicted)
+                    raise PoolError(f"No connection available for '{self.username}' within {self.acquire_timeout}s")
+                waited = True
+                self._condition.wait(remaining)
+
+            if waited:
+                self._counters['waits'] += 1
+                self._counters['wait_time'] += time.monotonic() - start
+
+            if self._idle:
+                connection, last_used = self._idle.pop()
+            else:
+                self._open += 1
+            self._in_use += 1
+            self._counters['checkouts'] += 1
+
+        self._close_quietly(evicted)
+
+        try:
+            if connection is None:
+                connection = self._connect()
+            elif time.monotonic() - last_used > self.health_check_interval:
+                connection = self._check_health(connection)
+        except Error:
+            with self._condition:
+                self._open -= 1
+                self._in_use -= 1
+                self._condition.notify()
+            raise
+
+        return PooledConnection(self, connection)
+
+    def _check_health(self, connection):
+        """Ping a connection that sat idle, replacing it if the server dropped it"""
+        try:
+            connection.ping(reconnect=False)
+            return connection
+        except Error:
+            self._close_quietly([connection])
+            with self._condition:
+                self._counters['reconnects'] += 1
+            return self._connect()
+
+    def prepared_cursor(self, connection, query):
+        """The prepared cursor for query on a checked-out connection, preparing it on first use
+
+        Statements stay prepared for as long as the physical connection stays
+        open, so they carry over between checkouts.
+        """
+        statements = self._statements.setdefault(connection, OrderedDict())
+        cursor = statements.get(query)
+        if cursor is not None:
+            statements.move_to_end(query)
+            counter = 'statements_reused'
+        else:
+            cursor = statements[query] = connection.cursor(prepared=True)
+            if len(statements) > self.max_statements:
+                _, oldest = statements.popitem(last=False)
+                try:
+                    oldest.close()
+                except Error:
+                    pass
+            counter = 'statements_prepared'
+        
+        with self._condition:
+            self._counters[counter] += 1
+        return cursor
+
+    def discard_statement(self, connection, query):
+        """Close and forget a connection's prepared cursor for query"""
+        cursor = self._statements.get(connection, {}).pop(query, None)
+        if cursor is not None:
+            try:
+                cursor.close()
+            except Error:
+                pass
+
+    def release(self, connection):
+        """Return a connection to the pool, discarding it if it is no longer usable"""
+        try:
+            # End any open (read) transaction so the next borrower sees fresh data
+            if connection.in_transaction:
+                connection.rollback()
+            usable = True
+        except Error:
+            usable = False
+
+        with self._condition:
+            self._in_use -= 1
+            if usable:
+                self._idle.append((connection, time.monotonic()))
+            else:
+                self._open -= 1
+            self._condition.notify()
+
+        if not usable:
+            self._close_quietly([connection])
+
+    def close_all(self):
+        """Close every idle connection (checked-out ones close when released)"""
+        with self._condition:
+            connections = [connection for connection, _ in self._idle]
+            self._idle.clear()
+            self._open -= len(connections)
+        self._close_quietly(connections)
+
+    def stats(self):
+        """Snapshot of pool usage for monitoring"""
+        with self._condition:
+            stats = dict(self._counters)
+            stats.update({
+                'size': self.size,
+                'open': self._open,
+                'idle': len(self._idle),
+                'checked_out': self._in_use
+            })
+        stats['avg_wait_time'] = stats['wait_time'] / stats['waits'] if stats['waits'] else 0.0
+        return stats
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+def get_connection_pool(username, password):
+    """Get (or lazily create) the pool for a set of credentials"""
+    key = (username, password)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = ConnectionPool(username, password)
+            _pools[key] = pool
+        return pool
+
+def discard_connection_pool(username, password):
+    """Drop and close the pool for a set of credentials"""
+    with _pools_lock:
+        pool = _pools.pop((username, password), None)
+    if pool:
+        pool.close_all()
+
+def get_pool_stats():
+    """Pool statistics keyed by database user"""
+    with _pools_lock:
+        pools = list(_pools.values())
+    return {pool.username: pool.stats() for pool in pools}
 
 # Database Connection Helper with user credentials
-def get_db_connection(username=None, password=None):
+def get_db_connection(username, password):
+    """Check out a pooled connection; close() returns it to the pool"""
+    pool = get_connection_pool(username, password)
     try:
-        if username and password:
-            connection = mysql.connector.connect(
-                host='localhost',
-                user=username,
-                password=password,
-                database='library_management_system'
-            )
-        else:
-            # Use current session credentials
-            connection = mysql.connector.connect(
-                host='localhost',
-                user=current_user_session['username'],
-                password=current_user_session['password'],
-                database='library_management_system'
-            )
-        return connection
+        return pool.get_connection()
     except Error as e:
         print(f"Error connecting to MySQL: {e}")
+        if pool.stats()['open'] == 0:
+            # Don't keep pools around for credentials that never connected
+            discard_connection_pool(username, password)
         return None
 
+def get_session_connection(session):
+    """Check out a connection for an authenticated session"""
+    if not session or not session['is_authenticated']:
+        return None
+    start = time.perf_counter()
+    connection = get_db_connection(session['username'], session['password'])
+    query_metrics.observe_acquire(time.perf_counter() - start)
+    return connection
+
 # Authentication Function
+LINKED_ADMIN_QUERY = "SELECT admin_id FROM Admin WHERE db_user = %s"
+
+def get_linked_admin_id(connection, username):
+    """Admin ID whose db_user is this database account, if any"""
+    cursor = connection.cursor()
+    try:
+        cursor.execute(LINKED_ADMIN_QUERY, (username,))
+        row = cursor.fetchone()
+        return row[0] if row else None
+    finally:
+        cursor.close()
+
 def authenticate_user(username, password):
-    """Authenticate user and determine access level"""
+    """Authenticate user and build a new session for them"""
     try:
         connection = get_db_connection(username, password)
         if connection and connection.is_connected():
-            connection.close()
+            is_admin = (username == 'library_admin')
+            try:
+                admin_id = get_linked_admin_id(connection, username) if is_admin else None
+            finally:
+                connection.close()
             
-            # Store session info
-            current_user_session['username'] = username
-            current_user_session['password'] = password
-            current_user_session['is_authenticated'] = True
-            current_user_session['is_admin'] = (username == 'library_admin')
+            session = new_session()
+            session['username'] = username
+            session['password'] = password
+            session['is_authenticated'] = True
+            session['is_admin'] = is_admin
+            session['admin_id'] = admin_id
             
-            return True, current_user_session['is_admin']
+            return True, session
         else:
-            return False, False
+            return False, new_session()
     except Error as e:
         print(f"Authentication error: {e}")
-        return False, False
+        return False, new_session()
 
-# Database Query Functions
-def execute_query(query, params=None, fetch=True):
-    """Execute a query and return results"""
-    if not current_user_session['is_authenticated']:
+# Query Metrics
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)  # seconds
+SLOW_QUERY_SECONDS = 1.0          # default threshold for the slow-query log (--slow-query-seconds)
+QUERY_FINGERPRINT_LENGTH = 160    # longer statements are cut off in metric labels
+
+slow_query_log = logging.getLogger("library.slow_queries")
+
+def normalize_sql(query):
+    """A statement with its whitespace collapsed"""
+    return re.sub(r"\s+", " ", query).strip()
+
+def query_fingerprint(query):
+    """Collapse whitespace and placeholder lists so every call of a statement shares one series"""
+    text = normalize_sql(query)
+    text = re.sub(r"%s(?:\s*,\s*%s)+", "%s, ...", text)
+    return text[:QUERY_FINGERPRINT_LENGTH]
+
+def escape_label(value):
+    """Escape a Prometheus label value"""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+class Histogram:
+    """Cumulative latency histogram in the Prometheus layout"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # the last slot is +Inf
+        self.total = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.total += seconds
+
+    def render(self, name, labels=""):
+        """Prometheus text lines for this histogram"""
+        lines = []
+        cumulative = 0
+        for bound, count in zip([*self.buckets, "+Inf"], self.counts):
+            cumulative += count
+            le = f'le="{bound}"'
+            lines.append(f"{name}_bucket{{{labels + ',' if labels else ''}{le}}} {cumulative}")
+        suffix = f"{{{labels}}}" if labels else ""
+        lines.append(f"{name}_sum{suffix} {self.total}")
+        lines.append(f"{name}_count{suffix} {cumulative}")
+        return lines
+
+class QueryMetrics:
+    """Latency, row and error counters per query fingerprint, shared by every session"""
+
+    def __init__(self, slow_query_seconds=SLOW_QUERY_SECONDS):
+        self.slow_query_seconds = slow_query_seconds
+        self._lock = threading.Lock()
+        self._latency = {}   # fingerprint -> Histogram
+        self._rows = {}      # fingerprint -> rows returned or affected
+        self._errors = {}    # (fingerprint, error type) -> count
+        self._acquire = Histogram()
+
+    def observe_acquire(self, seconds):
+        with self._lock:
+            self._acquire.observe(seconds)
+
+    def observe_query(self, fingerprint, seconds, rows=0, error=None):
+        """Record one statement; error is the exception type name if it failed"""
+        with self._lock:
+            histogram = self._latency.get(fingerprint)
+            if histogram is None:
+                histogram = self._latency[fingerprint] = Histogram()
+            histogram.observe(seconds)
+            self._rows[fingerprint] = self._rows.get(fingerprint, 0) + rows
+            if error:
+                self._errors[(fingerprint, error)] = self._errors.get((fingerprint, error), 0) + 1
+        
+        if seconds >= self.slow_query_seconds:
+            slow_query_log.warning("%.3fs rows=%d error=%s %s", seconds, rows, error or "-", fingerprint)
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        lines = [
+            "# HELP library_query_duration_seconds Time spent executing each query fingerprint",
+            "# TYPE library_query_duration_seconds histogram",
+        ]
+        with self._lock:
+            for fingerprint, histogram in sorted(self._latency.items()):
+                lines.extend(histogram.render("library_query_duration_seconds", f'query="{escape_label(fingerprint)}"'))
+            
+            lines += ["# HELP library_query_rows_total Rows returned or affected per query fingerprint",
+                      "# TYPE library_query_rows_total counter"]
+            for fingerprint, rows in sorted(self._rows.items()):
+                lines.append(f'library_query_rows_total{{query="{escape_label(fingerprint)}"}} {rows}')
+            
+            lines += ["# HELP library_query_errors_total Failed queries per fingerprint and error type",
+                      "# TYPE library_query_errors_total counter"]
+            for (fingerprint, error), count in sorted(self._errors.items()):
+                lines.append(f'library_query_errors_total{{query="{escape_label(fingerprint)}",error="{escape_label(error)}"}} {count}')
+            
+            lines += ["# HELP library_connection_acquire_seconds Time spent checking connections out of the pool",
+                      "# TYPE library_connection_acquire_seconds histogram"]
+            lines.extend(self._acquire.render("library_connection_acquire_seconds"))
+        return lines
+
+query_metrics = QueryMetrics()
+
+def render_metrics():
+    """Query metrics plus connection pool stats, as served on /metrics"""
+    lines = query_metrics.render()
+    for username, stats in sorted(get_pool_stats().items()):
+        for name, value in stats.items():
+            lines.append(f'library_pool_{name}{{user="{escape_label(username)}"}} {value}')
+    lines.extend(result_cache.render())
+    return "\n".join(lines) + "\n"
+
+def configure_slow_query_log(threshold, log_path=None):
+    """Log statements slower than threshold seconds to log_path (stderr when None)"""
+    query_metrics.slow_query_seconds = threshold
+    handler = logging.FileHandler(log_path) if log_path else logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(asctime)s slow query %(message)s"))
+    slow_query_log.addHandler(handler)
+    slow_query_log.setLevel(logging.WARNING)
+    slow_query_log.propagate = False
+
+# Result Cache
+RESULT_CACHE_ENTRIES = 256     # results kept, least recently used evicted first
+RESULT_CACHE_MAX_ROWS = 1000   # bigger results aren't cached
+RESULT_CACHE_TTL = 30          # backstop for writes the change feed doesn't see (seconds)
+
+# Tables whose rows go with a deleted row through ON DELETE CASCADE foreign keys
+DELETE_CASCADES = {
+    'Member': ('BorrowRequest', 'Strike', 'PendingQueue', 'Wishlist', 'Reviews'),
+    'Book': ('BorrowRequest', 'PendingQueue', 'Wishlist', 'Reviews', 'CategorisedAs'),
+    'BorrowRequest': ('Transaction', 'PendingQueue'),
+    'Transaction': ('Strike', 'Feedback'),
+    'Category': ('CategorisedAs',),
+    'Admin': ('Transaction',),
+}
+
+# Tables a write can change through triggers, on top of the one written
+WRITE_CASCADES = {
+    'Transaction': ('Book', 'Member', 'Strike', 'PendingQueue'),
+    'BorrowRequest': ('PendingQueue',),
+    'Member': ('PendingQueue',),
+}
+
+# Tables read by procedures whose results may be cached, and written by the rest
+# (a procedure missing from PROCEDURE_WRITES drops the whole cache)
+PROCEDURE_READS = {
+    'GetPrioritizedRequestListTop': ('PendingQueue', 'Member'),
+}
+PROCEDURE_WRITES = {
+    'ApproveBorrowRequestEx': ('BorrowRequest', 'Transaction'),
+    'ApproveBorrowRequests': ('BorrowRequest', 'Transaction'),
+    'DenyBorrowRequest': ('BorrowRequest',),
+    'DenyBorrowRequests': ('BorrowRequest',),
+    'ProcessReturns': ('Transaction',),
+    'ReconcileStrikeCounts': ('Member',),
+    'ReconcileActiveLoanCounts': ('Member',),
+}
+
+def read_tables(query):
+    """Tables a SELECT reads from"""
+    query = re.sub(r"'[^']*'", "''", query)  # column labels like 'Join Date' aren't tables
+    return set(re.findall(r"\b(?:FROM|JOIN)\s+`?(\w+)", query, re.IGNORECASE))
+
+def deleted_tables(table):
+    """A table deleted from, plus every table its foreign keys cascade the delete into"""
+    tables, pending = set(), [table]
+    while pending:
+        current = pending.pop()
+        if current not in tables:
+            tables.add(current)
+            pending.extend(DELETE_CASCADES.get(current, ()))
+    return tables
+
+def written_tables(query):
+    """Tables a write statement changes, or None if it can't be told"""
+    match = re.match(r"\s*(INSERT(?:\s+IGNORE)?\s+INTO|REPLACE\s+INTO|UPDATE|DELETE\s+FROM)\s+`?(\w+)", query, re.IGNORECASE)
+    if not match:
         return None
+    verb, table = match.groups()
+    return tuple(deleted_tables(table)) if verb.upper().startswith('DELETE') else (table,)
+
+class ResultCache:
+    """Shared LRU of read results, tagged with the version of every table they read
+
+    Writes bump the versions of the tables they change, and an entry is only
+    served while all of its tables are still at the versions seen before the
+    read ran, so a write racing a read can't leave a stale result behind.
+    """
+
+    def __init__(self, max_entries=RESULT_CACHE_ENTRIES, max_rows=RESULT_CACHE_MAX_ROWS, ttl=RESULT_CACHE_TTL):
+        self.max_entries = max_entries
+        self.max_rows = max_rows
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (result, {table: version}, expires_at)
+        self._versions = {}            # table -> version
+        self.hits = self.misses = self.evictions = 0
+
+    def versions(self, tables):
+        """Current versions of some tables, taken before reading them ('*' moves on every full drop)"""
+        with self._lock:
+            return {table: self._versions.get(table, 0) for table in (*tables, '*')}
+
+    def get(self, key):
+        """A cached result, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                result, versions, expires_at = entry
+                if time.monotonic() < expires_at and all(self._versions.get(table, 0) == version for table, version in versions.items()):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return result
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, result, versions):
+        """Cache a result read at the given table versions"""
+        if len(result) > self.max_rows:
+            return
+        with self._lock:
+            if any(self._versions.get(table, 0) != version for table, version in versions.items()):
+                return  # a write landed while it was being read
+            self._entries[key] = (result, versions, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, tables=None):
+        """Bump the versions of written tables (and those their triggers change); None drops everything"""
+        with self._lock:
+            if tables is None:
+                self._entries.clear()
+                self._versions['*'] = self._versions.get('*', 0) + 1
+                return
+            for table in tables:
+                for changed in (table, *WRITE_CASCADES.get(table, ())):
+                    self._versions[changed] = self._versions.get(changed, 0) + 1
+
+    def render(self):
+        """Prometheus text lines for the cache counters"""
+        with self._lock:
+            return [
+                "# HELP library_result_cache_requests_total Cached reads served (hit) or run against MySQL (miss)",
+                "# TYPE library_result_cache_requests_total counter",
+                f'library_result_cache_requests_total{{result="hit"}} {self.hits}',
+                f'library_result_cache_requests_total{{result="miss"}} {self.misses}',
+                "# HELP library_result_cache_evictions_total Results dropped to stay within the entry limit",
+                "# TYPE library_result_cache_evictions_total counter",
+                f"library_result_cache_evictions_total {self.evictions}",
+                "# HELP library_result_cache_entries Results currently cached",
+                "# TYPE library_result_cache_entries gauge",
+                f"library_result_cache_entries {len(self._entries)}",
+            ]
+
+result_cache = ResultCache()
+
+def result_cache_key(kind, query, params):
+    return (kind, normalize_sql(query), tuple(params or ()))
+
+def fresh_result(result):
+    """Frames are copied on the way out of the cache, handlers modify the ones they get"""
+    return result.copy() if isinstance(result, pd.DataFrame) else result
+
+def cached_read(key, tables, read):
+    """Serve a read from result_cache, calling read() on a miss"""
+    result = result_cache.get(key)
+    if result is None:
+        versions = result_cache.versions(tables)
+        result = read()
+        if result is not None:
+            result_cache.put(key, result, versions)
+    return fresh_result(result)
+
+async def cached_read_async(key, tables, read):
+    """cached_read for an async read()"""
+    result = result_cache.get(key)
+    if result is None:
+        versions = result_cache.versions(tables)
+        result = await read()
+        if result is not None:
+            result_cache.put(key, result, versions)
+    return fresh_result(result)
+
+# Database Query Functions
+def execute_query(session, query, params=None, fetch=True, cache=False):
+    """Execute a query and return results
+
+    With cache=True a SELECT is served from result_cache while none of the
+    tables it reads have been written.
+    """
+    if cache:
+        return cached_read(result_cache_key('rows', query, params), read_tables(query),
+                           lambda: execute_query(session, query, params))
     
-    connection = get_db_connection()
+    fingerprint = query_fingerprint(query)
+    connection = get_session_connection(session)
     if not connection:
+        query_metrics.observe_query(fingerprint, 0.0, error="NoConnection")
         return None
     
+    cursor = None
+    start = time.perf_counter()
+    rows, error = 0, None
     try:
         cursor = connection.cursor(dictionary=True)
         cursor.execute(query, params or ())
         
         if fetch:
             result = cursor.fetchall()
+            rows = len(result)
             return result
         else:
             connection.commit()
+            rows = max(cursor.rowcount, 0)
             return True
     except Error as e:
+        error = type(e).__name__
         print(f"Database error: {e}")
         return None
     finally:
-        if connection.is_connected():
+        query_metrics.observe_query(fingerprint, time.perf_counter() - start, rows, error)
+        if not fetch:
+            result_cache.invalidate(written_tables(query))
+        if cursor is not None:
             cursor.close()
-            connection.close()
+        connection.close()
 
-def call_procedure(proc_name, params=None):
-    """Call a stored procedure"""
-    if not current_user_session['is_authenticated']:
-        return None
+def call_procedure(session, proc_name, params=None, cache=False):
+    """Call a stored procedure
+
+    Only read-only procedures listed in PROCEDURE_READS may pass cache=True;
+    any other call invalidates the tables in PROCEDURE_WRITES.
+    """
+    if cache:
+        return cached_read(result_cache_key('call', proc_name, params), PROCEDURE_READS[proc_name],
+                           lambda: call_procedure(session, proc_name, params))
     
-    connection = get_db_connection()
+    fingerprint = f"CALL {proc_name}"
+    connection = get_session_connection(session)
     if not connection:
+        query_metrics.observe_query(fingerprint, 0.0, error="NoConnection")
         return None
     
+    cursor = None
+    start = time.perf_counter()
+    results, error = [], None
     try:
         cursor = connection.cursor(dictionary=True)
         cursor.callproc(proc_name, params or ())
         
         # Fetch results if any
-        results = []
         for result in cursor.stored_results():
             results.extend(result.fetchall())
         
         connection.commit()
         return results
     except Error as e:
+        error = type(e).__name__
         print(f"Procedure error: {e}")
         return None
     finally:
-        if connection.is_connected():
+        query_metrics.observe_query(fingerprint, time.perf_counter() - start, len(results), error)
+        if proc_name not in PROCEDURE_READS:
+            result_cache.invalidate(PROCEDURE_WRITES.get(proc_name))
+        if cursor is not None:
+            cursor.close()
+        connection.close()
+
+def build_frame(columns, rows):
+    """DataFrame from tuple rows, with no per-row dict in between"""
+    if not rows:
+        return pd.DataFrame(columns=columns)
+    return pd.DataFrame.from_records(rows, columns=columns)
+
+def fetch_frame(session, query, params=None, cache=False, prepared=False):
+    """Run a SELECT and return its rows as a DataFrame (None on error)
+
+    Rows come back as plain tuples rather than one dict per row, and the
+    frame is built straight from them; use it for anything that ends up in
+    a table on screen. cache works as for execute_query. prepared=True
+    runs the query as a server-side prepared statement kept on the pooled
+    connection, for fixed statements that are run over and over.
+    """
+    if cache:
+        return cached_read(result_cache_key('frame', query, params), read_tables(query),
+                           lambda: fetch_frame(session, query, params, prepared=prepared))
+    
+    fingerprint = query_fingerprint(query)
+    connection = get_session_connection(session)
+    if not connection:
+        query_metrics.observe_query(fingerprint, 0.0, error="NoConnection")
+        return None
+    
+    cursor = None
+    start = time.perf_counter()
+    rows, error = [], None
+    try:
+        cursor = connection.prepared_cursor(query) if prepared else connection.cursor()
+        cursor.execute(query, params or ())
+        rows = cursor.fetchall()
+        return build_frame(list(cursor.column_names), rows)
+    except Error as e:
+        error = type(e).__name__
+        print(f"Database error: {e}")
+        if prepared:
+            # The statement may be left half read or invalid, don't hand it to the next checkout
+            connection.discard_statement(query)
+        return None
+    finally:
+        query_metrics.observe_query(fingerprint, time.perf_counter() - start, len(rows), error)
+        if cursor is not None and not prepared:
+            cursor.close()
+        connection.close()
+
+# Async Query Functions
+_async_pools = {}
+_async_pools_lock = asyncio.Lock()
+
+async def get_async_pool(username, password):
+    """Get (or lazily create) the aiomysql pool for a set of credentials"""
+    key = (username, password)
+    async with _async_pools_lock:
+        pool = _async_pools.get(key)
+        if pool is None:
+            pool = await aiomysql.create_pool(
+                host=DB_HOST, user=username, password=password, db=DB_NAME,
+                minsize=0, maxsize=POOL_SIZE, pool_recycle=POOL_IDLE_TIMEOUT, autocommit=False
+            )
+            _async_pools[key] = pool
+        return pool
+
+@asynccontextmanager
+async def async_session_connection(session):
+    """Async counterpart of get_session_connection; yields None when no connection is available"""
+    if not session or not session['is_authenticated']:
+        yield None
+        return
+    
+    start = time.perf_counter()
+    try:
+        pool = await get_async_pool(session['username'], session['password'])
+        connection = await asyncio.wait_for(pool.acquire(), POOL_ACQUIRE_TIMEOUT)
+    except (aiomysql.Error, asyncio.TimeoutError) as e:
+        print(f"Error connecting to MySQL: {e}")
+        yield None
+        return
+    finally:
+        query_metrics.observe_acquire(time.perf_counter() - start)
+    
+    try:
+        yield connection
+    except asyncio.CancelledError:
+        # A query cancelled mid-result leaves the protocol out of step, don't reuse the connection
+        connection.close()
+        raise
+    finally:
+        if not connection.closed:
+            try:
+                # Like the sync pool, never hand back a connection with an open transaction
+                await connection.rollback()
+            except aiomysql.Error:
+                connection.close()
+        pool.release(connection)
+
+async def execute_query_async(session, query, params=None, fetch=True):
+    """execute_query without blocking the event loop during MySQL I/O"""
+    if aiomysql is None:
+        return await asyncio.to_thread(execute_query, session, query, params, fetch)
+    
+    fingerprint = query_fingerprint(query)
+    async with async_session_connection(session) as connection:
+        if connection is None:
+            query_metrics.observe_query(fingerprint, 0.0, error="NoConnection")
+            return None
+        start = time.perf_counter()
+        rows, error = 0, None
+        try:
+            async with connection.cursor(aiomysql.DictCursor) as cursor:
+                await cursor.execute(query, params or ())
+                if fetch:
+                    result = list(await cursor.fetchall())
+                    rows = len(result)
+                    return result
+                rows = max(cursor.rowcount, 0)
+            await connection.commit()
+            return True
+        except aiomysql.Error as e:
+            error = type(e).__name__
+            print(f"Database error: {e}")
+            return None
+        finally:
+            query_metrics.observe_query(fingerprint, time.perf_counter() - start, rows, error)
+            if not fetch:
+                result_cache.invalidate(written_tables(query))
+
+async def call_procedure_async(session, proc_name, params=None, cache=False):
+    """call_procedure without blocking the event loop during MySQL I/O"""
+    if cache:
+        return await cached_read_async(result_cache_key('call', proc_name, params), PROCEDURE_READS[proc_name],
+                                       lambda: call_procedure_async(session, proc_name, params))
+    if aiomysql is None:
+        return await asyncio.to_thread(call_procedure, session, proc_name, params)
+    
+    fingerprint = f"CALL {proc_name}"
+    async with async_session_connection(session) as connection:
+        if connection is None:
+            query_metrics.observe_query(fingerprint, 0.0, error="NoConnection")
+            return None
+        start = time.perf_counter()
+        results, error = [], None
+        try:
+            async with connection.cursor(aiomysql.DictCursor) as cursor:
+                await cursor.callproc(proc_name, params or ())
+                while True:
+                    if cursor.description:
+                        results.extend(await cursor.fetchall())
+                    if not await cursor.nextset():
+                        break
+            await connection.commit()
+            return results
+        except aiomysql.Error as e:
+            error = type(e).__name__
+            print(f"Procedure error: {e}")
+            return None
+        finally:
+            query_metrics.observe_query(fingerprint, time.perf_counter() - start, len(results), error)
+            if proc_name not in PROCEDURE_READS:
+                result_cache.invalidate(PROCEDURE_WRITES.get(proc_name))
+
+async def fetch_frame_async(session, query, params=None, prepared=False):
+    """fetch_frame without blocking the event loop during MySQL I/O (aiomysql has no prepared statements)"""
+    if aiomysql is None:
+        return await asyncio.to_thread(fetch_frame, session, query, params, prepared=prepared)
+    
+    fingerprint = query_fingerprint(query)
+    async with async_session_connection(session) as connection:
+        if connection is None:
+            query_metrics.observe_query(fingerprint, 0.0, error="NoConnection")
+            return None
+        start = time.perf_counter()
+        rows, error = [], None
+        try:
+            async with connection.cursor() as cursor:
+                await cursor.execute(query, params or ())
+                rows = await cursor.fetchall()
+                columns = [column[0] for column in cursor.description]
+            return build_frame(columns, rows)
+        except aiomysql.Error as e:
+            error = type(e).__name__
+            print(f"Database error: {e}")
+            return None
+        finally:
+            query_metrics.observe_query(fingerprint, time.perf_counter() - start, len(rows), error)
+
+# Paginated Table Loaders
+TABLE_PAGE_SIZE = 50
+
+# Tables shown page by page. 'query' has {where} and {order} placeholders filled
+# in by fetch_table_page; 'keys' are the (column, output label) pairs the pages are
+# keyed on, which must be unique together and backed by an index.
+PAGED_TABLES = {
+    'members': {
+        'query': """
+            SELECT member_id as 'Member ID', name as 'Name', email as 'Email', 
+                   phone as 'Phone', join_date as 'Join Date', strike_count as 'Strikes'
+            FROM Member
+            {where}
+            ORDER BY {order}
+        """,
+        'keys': [('member_id', 'Member ID')],
+        'count_query': "SELECT COUNT(*) as count FROM Member",
+        'label': 'members'
+    },
+    'books': {
+        'query': """
+            SELECT book_id as 'Book ID', title as 'Title', author as 'Author', 
+                   edition as 'Edition', condition_val as 'Condition', status as 'Status'
+            FROM Book
+            {where}
+            ORDER BY {order}
+        """,
+        'keys': [('book_id', 'Book ID')],
+        'count_query': "SELECT COUNT(*) as count FROM Book",
+        'label': 'books'
+    },
+    'available_books': {
+        'query': """
+            SELECT book_id as 'Book ID', title as 'Title', author as 'Author', 
+                   edition as 'Edition', condition_val as 'Condition'
+            FROM Book
+            {where}
+            ORDER BY {order}
+        """,
+        'filters': ["status = 'Available'"],
+        'keys': [('title', 'Title'), ('book_id', 'Book ID')],
+        'count_query': "SELECT COUNT(*) as count FROM Book WHERE status = 'Available'",
+        'label': 'available books'
+    },
+    'strikes': {
+        'query': """
+            SELECT 
+                s.strike_id as 'Strike ID',
+                s.member_id as 'Member ID',
+                m.name as 'Member Name',
+                s.transaction_id as 'Transaction ID',
+                s.strike_date as 'Strike Date',
+                s.reason as 'Reason'
+            FROM Strike s
+            JOIN Member m ON s.member_id = m.member_id
+            {where}
+            ORDER BY {order}
+        """,
+        'keys': [('s.strike_id', 'Strike ID')],
+        'descending': True,  # newest strikes first
+        'count_query': "SELECT COUNT(*) as count FROM Strike",
+        'label': 'strikes'
+    }
+}
+
+def build_keyset_condition(columns, after, descending=False):
+    """Condition for rows sorting after key `after`, as (condition, params)
+
+    Written as a > x OR (a = x AND b > y) rather than (a, b) > (x, y): MySQL
+    doesn't range-scan an index on a row constructor inequality, so every page
+    would re-read the index from the start.
+    """
+    operator = '<' if descending else '>'
+    branches, params = [], []
+    for i, column in enumerate(columns):
+        terms = [f"{equal} = %s" for equal in columns[:i]] + [f"{column} {operator} %s"]
+        branches.append(terms[0] if len(terms) == 1 else f"({' AND '.join(terms)})")
+        params.extend(after[:i + 1])
+    condition = branches[0] if len(branches) == 1 else f"({' OR '.join(branches)})"
+    return condition, tuple(params)
+
+def build_table_query(table_key, after=None):
+    """Build the SELECT for a paged table, optionally starting after a key; returns (query, params)"""
+    table = PAGED_TABLES[table_key]
+    descending = table.get('descending', False)
+    
+    conditions = list(table.get('filters', []))
+    params = ()
+    if after is not None:
+        condition, params = build_keyset_condition([column for column, _ in table['keys']], after, descending)
+        conditions.append(condition)
+    
+    where = "WHERE " + " AND ".join(conditions) if conditions else ""
+    order = ", ".join(f"{column} {'DESC' if descending else 'ASC'}" for column, _ in table['keys'])
+    return table['query'].format(where=where, order=order), params
+
+def fetch_table_page(table_key, after, page_size, session):
+    """Fetch the page following key `after` (None for the first page); returns (DataFrame, last key)"""
+    query, params = build_table_query(table_key, after)
+    df = fetch_frame(session, query + " LIMIT %s", params + (page_size,), cache=True, prepared=True)
+    if df is None or df.empty:
+        return pd.DataFrame() if df is None else df, None
+    
+    # tolist() hands back plain Python values, which the connector can bind (numpy ints it can't)
+    last_key = tuple(df[label].tolist()[-1] for _, label in PAGED_TABLES[table_key]['keys'])
+    return df, last_key
+
+def forget_stale_pages(table_key, session):
+    """Return a table's page state, starting it afresh once result_cache has seen a write to the table
+
+    Each table has its own entry and a stale one is replaced rather than
+    cleared, so loads of other tables running in worker threads (prefetch_tabs)
+    never see a dict change under them, and a superseded load still running
+    only writes to the entry that was dropped.
+    """
+    table = PAGED_TABLES[table_key]
+    versions = result_cache.versions(read_tables(table['query']) | read_tables(table['count_query']))
+    state = session['pages'].get(table_key)
+    if state is None or state['versions'] != versions:
+        # Rows were added or removed since, the old boundaries would skip or repeat some
+        state = session['pages'][table_key] = {'versions': versions, 'total': None, 'keys': {}}
+    return state
+
+def load_table_page(table_key, page, page_size, session):
+    """Load page N of a table by key, remembering page boundaries in the session
+
+    Returns the page, the page number actually shown and a summary line.
+    """
+    state = forget_stale_pages(table_key, session)
+    boundaries = state['keys'].setdefault(page_size, {})
+    page = max(page, 1)
+    
+    # Step forward from the closest page whose end key we already know
+    known_page = max((p for p in list(boundaries) if p < page), default=0)
+    after = boundaries.get(known_page)
+    for current_page in range(known_page + 1, page + 1):
+        df, last_key = fetch_table_page(table_key, after, page_size, session)
+        if last_key is None:
+            break
+        boundaries[current_page] = last_key
+        after = last_key
+    
+    if df.empty and page > 1:
+        # Ran past the last page, show the last one instead
+        return load_table_page(table_key, current_page - 1, page_size, session)
+    
+    if page == 1 or state['total'] is None:
+        count = execute_query(session, PAGED_TABLES[table_key]['count_query'], cache=True)
+        state['total'] = count[0]['count'] if count else 0
+    total = state['total']
+    pages = max((total + page_size - 1) // page_size, 1)
+    return df, page, f"Page {page} of {pages} · {total} {PAGED_TABLES[table_key]['label']}"
+
+def stream_query(session, query, params=None, batch_size=TABLE_PAGE_SIZE):
+    """Yield result rows in batches from an unbuffered cursor, holding one connection for the whole pass"""
+    connection = get_session_connection(session)
+    if not connection:
+        return
+    
+    cursor = None
+    try:
+        cursor = connection.cursor(dictionary=True, buffered=False)
+        cursor.execute(query, params or ())
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield rows
+    except Error as e:
+        print(f"Database error: {e}")
+    finally:
+        if cursor is not None:
+            try:
+                # An abandoned stream must be drained before the connection is reused
+                cursor.fetchall()
+            except Error:
+                pass
             cursor.close()
+        connection.close()
+
+EXPORT_FILE_TTL = 600  # seconds an export stays on disk (Gradio serves its own copy)
+EXPORT_DIR = tempfile.mkdtemp(prefix="library_exports_")
+atexit.register(shutil.rmtree, EXPORT_DIR, ignore_errors=True)
+
+def remove_old_exports(max_age=EXPORT_FILE_TTL):
+    """Delete export files older than max_age seconds"""
+    cutoff = time.time() - max_age
+    for entry in os.scandir(EXPORT_DIR):
+        try:
+            if entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+        except OSError:
+            pass  # already gone
+
+def export_table_csv(table_key, session):
+    """Stream a whole table into a CSV file and return its path"""
+    remove_old_exports()
+    query, params = build_table_query(table_key)
+    with tempfile.NamedTemporaryFile("w", newline="", suffix=f"_{table_key}.csv", dir=EXPORT_DIR, delete=False) as export_file:
+        writer = None
+        for rows in stream_query(session, query, params):
+            if writer is None:
+                writer = csv.DictWriter(export_file, fieldnames=list(rows[0].keys()))
+                writer.writeheader()
+            writer.writerows(rows)
+    return export_file.name
+
+# ID Allocation
+ID_BLOCK_SIZE = 20  # IDs reserved per round trip to the IdSequence table
+
+class IdAllocator:
+    """Hands out prefixed IDs from blocks reserved in the IdSequence table
+
+    Blocks are reserved under a row lock by the AllocateIds procedure, so IDs are
+    unique across processes (and with IDs the stored procedures allocate). IDs
+    left in a block when the process exits are skipped, not reused.
+    """
+
+    def __init__(self, sequence_name, prefix, width=3, block_size=ID_BLOCK_SIZE):
+        self.sequence_name = sequence_name
+        self.prefix = prefix
+        self.width = width
+        self.block_size = block_size
+        self._next = 0
+        self._end = 0
+        self._lock = threading.Lock()
+
+    def _reserve_block(self, session):
+        connection = get_session_connection(session)
+        if not connection:
+            return None
+        
+        cursor = None
+        try:
+            cursor = connection.cursor()
+            result_args = cursor.callproc('AllocateIds', (self.sequence_name, self.block_size, 0))
+            connection.commit()
+            return result_args[2]
+        except Error as e:
+            print(f"ID allocation error: {e}")
+            return None
+        finally:
+            if cursor is not None:
+                cursor.close()
             connection.close()
 
+    def next_id(self, session):
+        """Next ID for this sequence, or None if a block could not be reserved"""
+        with self._lock:
+            if self._next >= self._end:
+                first_value = self._reserve_block(session)
+                if first_value is None:
+                    return None
+                self._next = first_value
+                self._end = first_value + self.block_size
+            value = self._next
+            self._next += 1
+        return f"{self.prefix}{str(value).zfill(self.width)}"
+
+
+borrow_request_ids = IdAllocator('BorrowRequest', 'BR')
+
 # Dashboard Functions
-def get_dashboard_stats():
-    """Get dashboard statistics"""
-    total_members_query = "SELECT COUNT(*) as count FROM Member"
-    total_books_query = "SELECT COUNT(*) as count FROM Book"
-    active_loans_query = "SELECT COUNT(*) as count FROM Transaction WHERE return_date IS NULL"
-    pending_requests_query = "SELECT COUNT(*) as count FROM BorrowRequest WHERE status = 'Pending'"
+DASHBOARD_CACHE_TTL = 15  # seconds a dashboard snapshot is served before re-querying
+
+_dashboard_cache = {'stats': None, 'expires_at': 0.0}
+_dashboard_cache_lock = threading.Lock()
+
+def invalidate_dashboard_cache():
+    """Drop the cached dashboard snapshot (called by every write path)"""
+    with _dashboard_cache_lock:
+        _dashboard_cache['stats'] = None
+        _dashboard_cache['expires_at'] = 0.0
+
+DASHBOARD_STATS_QUERY = """
+    SELECT
+        (SELECT COUNT(*) FROM Member) as total_members,
+        (SELECT COUNT(*) FROM Book) as total_books,
+        (SELECT COUNT(*) FROM Transaction WHERE return_date IS NULL) as active_loans,
+        (SELECT COUNT(*) FROM BorrowRequest WHERE status = 'Pending') as pending_requests,
+        (SELECT COUNT(*) FROM Transaction WHERE loan_bucket = 'Overdue') as overdue_loans,
+        (SELECT COUNT(*) FROM Transaction WHERE loan_bucket = 'DueSoon') as due_soon_loans
+"""
+
+def cached_dashboard_stats():
+    """The cached dashboard snapshot, or None once it has expired"""
+    with _dashboard_cache_lock:
+        if _dashboard_cache['stats'] is not None and time.monotonic() < _dashboard_cache['expires_at']:
+            return _dashboard_cache['stats']
+    return None
+
+def store_dashboard_stats(results):
+    """Shape DASHBOARD_STATS_QUERY results into the stats tuple and cache it"""
+    if not results:
+        return 0, 0, 0, 0, 0, 0
     
-    total_members = execute_query(total_members_query)[0]['count']
-    total_books = execute_query(total_books_query)[0]['count']
-    active_loans = execute_query(active_loans_query)[0]['count']
-    pending_requests = execute_query(pending_requests_query)[0]['count']
+    row = results[0]
+    stats = (row['total_members'], row['total_books'], row['active_loans'], row['pending_requests'],
+             row['overdue_loans'], row['due_soon_loans'])
     
-    return total_members, total_books, active_loans, pending_requests
+    with _dashboard_cache_lock:
+        _dashboard_cache['stats'] = stats
+        _dashboard_cache['expires_at'] = time.monotonic() + DASHBOARD_CACHE_TTL
+    return stats
 
-# Member Functions
-def get_all_members():
-    """Retrieve all members from database"""
-    query = """
-        SELECT member_id as 'Member ID', name as 'Name', email as 'Email', 
-               phone as 'Phone', join_date as 'Join Date', strike_count as 'Strikes'
-        FROM Member
-        ORDER BY member_id
+def get_dashboard_stats(session):
+    """Get dashboard statistics (one query per DASHBOARD_CACHE_TTL window)"""
+    stats = cached_dashboard_stats()
+    if stats is not None:
+        return stats
+    return store_dashboard_stats(execute_query(session, DASHBOARD_STATS_QUERY))
+
+async def get_dashboard_stats_async(session):
+    """Async get_dashboard_stats"""
+    stats = cached_dashboard_stats()
+    if stats is not None:
+        return stats
+    return store_dashboard_stats(await execute_query_async(session, DASHBOARD_STATS_QUERY))
+
+# Availability Cache
+AVAILABILITY_CACHE_TTL = 60  # backstop for writes made outside the app
+
+_availability_cache = {'book_status': {}, 'member_loans': {}}
+_availability_cache_lock = threading.Lock()
+
+AVAILABILITY_QUERIES = {
+    'book_status': "SELECT status AS value FROM Book WHERE book_id = %s",
+    'member_loans': "SELECT active_loan_count AS value FROM Member WHERE member_id = %s",
+}
+
+# Books and borrowers behind a set of requests or loans, for targeted invalidation
+LOAN_PARTIES_QUERY = """
+    SELECT br.book_id, br.member_id_requester AS member_id
+    FROM BorrowRequest br
+    LEFT JOIN Transaction t ON t.request_id = br.request_id
+    WHERE {column} IN ({placeholders})
+"""
+
+def cached_lookup(kind, key, session):
+    """Read-through lookup of a book's status or a member's open loans (None if no such row)"""
+    with _availability_cache_lock:
+        entry = _availability_cache[kind].get(key)
+        if entry is not None and time.monotonic() < entry[1]:
+            return entry[0]
+    
+    results = execute_query(session, AVAILABILITY_QUERIES[kind], (key,))
+    if not results:
+        return None  # misses aren't cached, the row may be added at any time
+    
+    value = results[0]['value']
+    with _availability_cache_lock:
+        _availability_cache[kind][key] = (value, time.monotonic() + AVAILABILITY_CACHE_TTL)
+    return value
+
+def get_book_status(book_id, session):
+    """Cached Book.status"""
+    return cached_lookup('book_status', book_id, session)
+
+def get_member_active_loans(member_id, session):
+    """Cached Member.active_loan_count"""
+    return cached_lookup('member_loans', member_id, session)
+
+def invalidate_availability(book_ids=(), member_ids=()):
+    """Drop cached entries for the given books and members"""
+    with _availability_cache_lock:
+        for book_id in book_ids:
+            _availability_cache['book_status'].pop(book_id, None)
+        for member_id in member_ids:
+            _availability_cache['member_loans'].pop(member_id, None)
+
+def clear_availability_cache(kind=None):
+    """Drop every cached book status and loan count, or every entry of one kind"""
+    with _availability_cache_lock:
+        for entries in ([_availability_cache[kind]] if kind else _availability_cache.values()):
+            entries.clear()
+
+def loan_parties_queries(request_ids=(), transaction_ids=()):
+    """LOAN_PARTIES_QUERY for each non-empty ID list, as (query, params)"""
+    for column, ids in (('br.request_id', list(request_ids)), ('t.transaction_id', list(transaction_ids))):
+        if ids:
+            yield LOAN_PARTIES_QUERY.format(column=column, placeholders=", ".join(["%s"] * len(ids))), tuple(ids)
+
+def invalidate_parties(parties):
+    """Drop cached entries for rows from LOAN_PARTIES_QUERY"""
+    invalidate_availability(
+        book_ids={row['book_id'] for row in parties or []},
+        member_ids={row['member_id'] for row in parties or []}
+    )
+
+def invalidate_loan_parties(session, request_ids=(), transaction_ids=()):
+    """Drop cached entries for the books and borrowers of approved requests or returned loans"""
+    for query, params in loan_parties_queries(request_ids, transaction_ids):
+        invalidate_parties(execute_query(session, query, params))
+
+async def invalidate_loan_parties_async(session, request_ids=(), transaction_ids=()):
+    """Async invalidate_loan_parties"""
+    for query, params in loan_parties_queries(request_ids, transaction_ids):
+        invalidate_parties(await execute_query_async(session, query, params))
+
+# Search Functions
+SEARCH_PAGE_SIZE = 50
+PAGE_SIZE_CHOICES = [25, 50, 100]
+SEARCH_DEBOUNCE_SECONDS = 0.3  # quiet time after a keystroke before the query runs
+FULLTEXT_MIN_TOKEN_LENGTH = 3  # InnoDB ignores shorter words (innodb_ft_min_token_size)
+ID_MATCH_RELEVANCE = 1000      # exact ID prefix hits rank above any full-text score
+LIKE_MATCH_RELEVANCE = 1       # substring hits, searched only when no word can go to the FULLTEXT index
+
+# InnoDB's default stopword list (INFORMATION_SCHEMA.INNODB_FT_DEFAULT_STOPWORD): these
+# words are never indexed, so requiring one ("+the*") would match no rows at all
+FULLTEXT_STOPWORDS = frozenset({
+    'a', 'about', 'an', 'are', 'as', 'at', 'be', 'by', 'com', 'de', 'en', 'for', 'from', 'how', 'i', 'in',
+    'is', 'it', 'la', 'of', 'on', 'or', 'that', 'the', 'this', 'to', 'was', 'what', 'when', 'where', 'who',
+    'will', 'with', 'und', 'www'
+})
+
+def escape_like(text):
+    """Escape LIKE wildcards so text matches literally (MySQL's default escape is a backslash)"""
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def build_fulltext_query(search_term):
+    """Turn free text into a BOOLEAN MODE query requiring every indexed word as a prefix
+
+    Short words and stopwords are left out, since the index holds neither.
     """
-    results = execute_query(query)
-    return pd.DataFrame(results) if results else pd.DataFrame()
+    words = [word for word in re.findall(r"\w+", search_term)
+             if len(word) >= FULLTEXT_MIN_TOKEN_LENGTH and word.lower() not in FULLTEXT_STOPWORDS]
+    return " ".join(f"+{word}*" for word in words)
+
+_search_tasks = {}  # (id(session), search box) -> task running that box's latest search
 
-def search_members(search_term):
-    """Search members by name, email, or ID"""
-    if not search_term:
-        return get_all_members()
+async def run_latest_search(session, search_key, search_fn, *args, debounce=SEARCH_DEBOUNCE_SECONDS):
+    """Run an async search, cancelling the one still in flight for the same box; None if superseded
+
+    Cancelling an aiomysql query closes its connection rather than letting it
+    run on; searches that fall back to a worker thread finish in the thread
+    and have their result dropped. A superseded load_table_page can still be
+    writing page boundaries then, which forget_stale_pages allows for.
+    """
+    async def search():
+        if debounce:
+            # Waiting out the debounce doesn't hold a worker thread or a connection
+            await asyncio.sleep(debounce)
+        return await search_fn(*args)
     
-    query = """
-        SELECT member_id as 'Member ID', name as 'Name', email as 'Email', 
-               phone as 'Phone', join_date as 'Join Date', strike_count as 'Strikes'
-        FROM Member
-        WHERE member_id LIKE %s OR name LIKE %s OR email LIKE %s
-        ORDER BY member_id
+    key = (id(session), search_key)
+    previous = _search_tasks.get(key)
+    if previous is not None:
+        previous.cancel()
+    task = _search_tasks[key] = asyncio.ensure_future(search())
+    try:
+        return await task
+    except asyncio.CancelledError:
+        if asyncio.current_task().cancelling():
+            raise  # this event itself was cancelled, not superseded
+        return None
+    finally:
+        if _search_tasks.get(key) is task:
+            del _search_tasks[key]
+
+# Searchable tables: (table, key column, FULLTEXT columns, output columns)
+SEARCH_SPECS = {
+    'members': (
+        "Member", "member_id", "name, email",
+        """member_id as 'Member ID', name as 'Name', email as 'Email', 
+           phone as 'Phone', join_date as 'Join Date', strike_count as 'Strikes'"""
+    ),
+    'books': (
+        "Book", "book_id", "title, author",
+        """book_id as 'Book ID', title as 'Title', author as 'Author', 
+           edition as 'Edition', condition_val as 'Condition', status as 'Status'"""
+    )
+}
+
+def build_ranked_search_query(search_key, search_term, page=1, page_size=SEARCH_PAGE_SIZE):
+    """Build the ID-prefix + FULLTEXT search for a table; returns (query, params)"""
+    table, key_column, fulltext_columns, select_columns = SEARCH_SPECS[search_key]
+    id_prefix = escape_like(search_term.strip()) + "%"
+    fulltext_query = build_fulltext_query(search_term)
+    
+    branches = [f"SELECT {key_column} as match_key, {ID_MATCH_RELEVANCE} as relevance FROM {table} WHERE {key_column} LIKE %s"]
+    params = [id_prefix]
+    if fulltext_query:
+        match = f"MATCH({fulltext_columns}) AGAINST (%s IN BOOLEAN MODE)"
+        branches.append(f"SELECT {key_column}, {match} FROM {table} WHERE {match}")
+        params.extend([fulltext_query, fulltext_query])
+    elif re.search(r"\w", search_term):
+        # Only stopwords or short words ("The It", "Up"): scan for the text instead
+        columns = [column.strip() for column in fulltext_columns.split(",")]
+        contains = "%" + escape_like(search_term.strip()) + "%"
+        branches.append(f"SELECT {key_column}, {LIKE_MATCH_RELEVANCE} FROM {table} WHERE "
+                        + " OR ".join(f"{column} LIKE %s" for column in columns))
+        params.extend([contains] * len(columns))
+    
+    query = f"""
+        SELECT {select_columns}
+        FROM (
+            SELECT match_key, MAX(relevance) as relevance
+            FROM ({" UNION ALL ".join(branches)}) matches
+            GROUP BY match_key
+        ) ranked
+        JOIN {table} ON {table}.{key_column} = ranked.match_key
+        ORDER BY ranked.relevance DESC, {table}.{key_column}
+        LIMIT %s OFFSET %s
     """
-    search_pattern = f"%{search_term}%"
-    results = execute_query(query, (search_pattern, search_pattern, search_pattern))
-    return pd.DataFrame(results) if results else pd.DataFrame()
+    params.extend([page_size, (max(page, 1) - 1) * page_size])
+    return query, tuple(params)
 
-def add_member(member_id, name, email, phone):
+def ranked_search(session, search_key, search_term, page=1, page_size=SEARCH_PAGE_SIZE):
+    """Search a table by ID prefix and FULLTEXT index, best matches first"""
+    query, params = build_ranked_search_query(search_key, search_term, page, page_size)
+    df = fetch_frame(session, query, params)
+    return pd.DataFrame() if df is None else df
+
+async def ranked_search_async(session, search_key, search_term, page=1, page_size=SEARCH_PAGE_SIZE):
+    """Async ranked_search"""
+    query, params = build_ranked_search_query(search_key, search_term, page, page_size)
+    df = await fetch_frame_async(session, query, params)
+    return pd.DataFrame() if df is None else df
+
+# Member Functions
+async def search_members_async(search_term, page, page_size, session):
+    """Search members by name, email, or ID prefix (ranked, one page)"""
+    return await ranked_search_async(session, 'members', search_term, page, page_size)
+
+def add_member(member_id, name, email, phone, members, page, page_size, search_term, session):
     """Add a new member to the database"""
-    if not current_user_session['is_admin']:
-        return "Access Denied: Admin privileges required", get_all_members(), member_id, name, email, phone
+    unchanged = (gr.update(),) * 3
+    if not session['is_admin']:
+        return "Access Denied: Admin privileges required", *unchanged, member_id, name, email, phone
     
     if not all([member_id, name, email, phone]):
-        return "Please fill all fields", get_all_members(), "", "", "", ""
+        return "Please fill all fields", *unchanged, "", "", "", ""
     
     query = """
         INSERT INTO Member (member_id, name, phone, email, join_date, strike_count)
         VALUES (%s, %s, %s, %s, CURDATE(), 0)
     """
-    result = execute_query(query, (member_id, name, phone, email), fetch=False)
+    result = execute_query(session, query, (member_id, name, phone, email), fetch=False)
+    invalidate_dashboard_cache()
     
     if result:
-        return f"Added member: {name}", get_all_members(), "", "", "", ""
+        return f"Added member: {name}", *patch_page('members', members, [member_id], page, page_size, session, search_term), "", "", "", ""
     else:
-        return "Error adding member (ID might already exist)", get_all_members(), member_id, name, email, phone
+        return "Error adding member (ID might already exist)", *unchanged, member_id, name, email, phone
 
-def delete_member(member_id):
+def delete_member(member_id, members, page, page_size, search_term, session):
     """Delete a member from the database"""
-    if not current_user_session['is_admin']:
-        return "Access Denied: Admin privileges required", get_all_members()
+    unchanged = (gr.update(),) * 3
+    if not session['is_admin']:
+        return "Access Denied: Admin privileges required", *unchanged
     
     if not member_id:
-        return "Please enter a Member ID", get_all_members()
+        return "Please enter a Member ID", *unchanged
     
     query = "DELETE FROM Member WHERE member_id = %s"
-    result = execute_query(query, (member_id,), fetch=False)
+    result = execute_query(session, query, (member_id,), fetch=False)
+    invalidate_dashboard_cache()
+    if result:
+        # Loans of the books they owned went with them, and no trigger can count those off
+        reconcile_active_loan_counts(session)
+    clear_availability_cache('member_loans')
     
     if result:
-        return f"Deleted member: {member_id}", get_all_members()
+        return f"Deleted member: {member_id}", *patch_page('members', members, [member_id], page, page_size, session, search_term)
     else:
-        return f"Error deleting member (ID might not exist or has dependencies)", get_all_members()
+        return f"Error deleting member (ID might not exist or has dependencies)", *unchanged
 
 # Book Functions
-def get_all_books():
-    """Retrieve all books from database"""
-    query = """
-        SELECT book_id as 'Book ID', title as 'Title', author as 'Author', 
-               edition as 'Edition', condition_val as 'Condition', status as 'Status'
-        FROM Book
-        ORDER BY book_id
-    """
-    results = execute_query(query)
-    return pd.DataFrame(results) if results else pd.DataFrame()
+async def search_books_async(search_term, page, page_size, session):
+    """Search books by title, author, or ID prefix (ranked, one page)"""
+    return await ranked_search_async(session, 'books', search_term, page, page_size)
 
-def search_books(search_term):
-    """Search books by title, author, or ID"""
-    if not search_term:
-        return get_all_books()
-    
-    query = """
-        SELECT book_id as 'Book ID', title as 'Title', author as 'Author', 
-               edition as 'Edition', condition_val as 'Condition', status as 'Status'
-        FROM Book
-        WHERE book_id LIKE %s OR title LIKE %s OR author LIKE %s
-        ORDER BY book_id
-    """
-    search_pattern = f"%{search_term}%"
-    results = execute_query(query, (search_pattern, search_pattern, search_pattern))
-    return pd.DataFrame(results) if results else pd.DataFrame()
-
-def add_book(book_id, title, author, edition, condition):
+def add_book(book_id, title, author, edition, condition, books, page, page_size, search_term, session):
     """Add a new book to the database"""
-    if not current_user_session['is_admin']:
-        return "Access Denied: Admin privileges required", get_all_books(), book_id, title, author, edition, condition
+    unchanged = (gr.update(),) * 3
+    if not session['is_admin']:
+        return "Access Denied: Admin privileges required", *unchanged, book_id, title, author, edition, condition
     
     if not all([book_id, title, author]):
-        return "Please fill required fields (Book ID, Title, Author)", get_all_books(), "", "", "", "", condition
+        return "Please fill required fields (Book ID, Title, Author)", *unchanged, "", "", "", "", condition
     
     edition = edition or "First"
     condition = condition or "Good"
@@ -233,644 +1519,1216 @@ def add_book(book_id, title, author, edition, condition):
         INSERT INTO Book (book_id, author, title, edition, condition_val, status, purchase_date)
         VALUES (%s, %s, %s, %s, %s, 'Available', CURDATE())
     """
-    result = execute_query(query, (book_id, author, title, edition, condition), fetch=False)
+    result = execute_query(session, query, (book_id, author, title, edition, condition), fetch=False)
+    invalidate_dashboard_cache()
     
     if result:
-        return f"Added book: {title}", get_all_books(), "", "", "", "First", "Good"
+        return f"Added book: {title}", *patch_page('books', books, [book_id], page, page_size, session, search_term), "", "", "", "First", "Good"
     else:
-        return "Error adding book (ID might already exist)", get_all_books(), book_id, title, author, edition, condition
+        return "Error adding book (ID might already exist)", *unchanged, book_id, title, author, edition, condition
 
-def delete_book(book_id):
+def delete_book(book_id, books, page, page_size, search_term, session):
     """Delete a book from the database"""
-    if not current_user_session['is_admin']:
-        return "Access Denied: Admin privileges required", get_all_books()
+    unchanged = (gr.update(),) * 3
+    if not session['is_admin']:
+        return "Access Denied: Admin privileges required", *unchanged
     
     if not book_id:
-        return "Please enter a Book ID", get_all_books()
+        return "Please enter a Book ID", *unchanged
     
     query = "DELETE FROM Book WHERE book_id = %s"
-    result = execute_query(query, (book_id,), fetch=False)
+    result = execute_query(session, query, (book_id,), fetch=False)
+    invalidate_dashboard_cache()
+    invalidate_availability(book_ids=[book_id])
+    clear_availability_cache('member_loans')  # its open loans went with it
     
     if result:
-        return f"Deleted book: {book_id}", get_all_books()
+        return f"Deleted book: {book_id}", *patch_page('books', books, [book_id], page, page_size, session, search_term)
     else:
-        return f"Error deleting book (ID might not exist or has dependencies)", get_all_books()
+        return f"Error deleting book (ID might not exist or has dependencies)", *unchanged
 
-def update_book_status(book_id, new_status):
+def update_book_status(book_id, new_status, books, page, page_size, search_term, session):
     """Update book status"""
-    if not current_user_session['is_admin']:
-        return "Access Denied: Admin privileges required", get_all_books()
+    unchanged = (gr.update(),) * 3
+    if not session['is_admin']:
+        return "Access Denied: Admin privileges required", *unchanged
     
     if not book_id or not new_status:
-        return "Please provide Book ID and Status", get_all_books()
+        return "Please provide Book ID and Status", *unchanged
     
     query = "UPDATE Book SET status = %s WHERE book_id = %s"
-    result = execute_query(query, (new_status, book_id), fetch=False)
+    result = execute_query(session, query, (new_status, book_id), fetch=False)
+    invalidate_dashboard_cache()
+    invalidate_availability(book_ids=[book_id])
     
     if result:
-        return f"Updated {book_id} status to {new_status}", get_all_books()
+        return f"Updated {book_id} status to {new_status}", *patch_page('books', books, [book_id], page, page_size, session, search_term)
     else:
-        return f"Error updating book status (Book ID might not exist)", get_all_books()
+        return f"Error updating book status (Book ID might not exist)", *unchanged
 
 # Borrow Request Creation Functions
-def create_borrow_request(member_id_requester, member_id_owner, book_id):
+def create_borrow_request(member_id_requester, member_id_owner, book_id, session):
     """Create a new borrow request"""
     if not all([member_id_requester, member_id_owner, book_id]):
-        return "Please fill all fields", get_member_requests(""), "", "", ""
+        return "Please fill all fields", get_member_requests("", session), "", "", ""
+    
+    # Unknown IDs are caught from the availability cache before the insert
+    if get_book_status(book_id, session) is None:
+        return f"Book {book_id} does not exist", get_member_requests(member_id_requester, session), member_id_requester, member_id_owner, book_id
+    if get_member_active_loans(member_id_requester, session) is None:
+        return f"Member {member_id_requester} does not exist", get_member_requests(member_id_requester, session), member_id_requester, member_id_owner, book_id
     
     # Generate new request ID
-    query = "SELECT COUNT(*) as count FROM BorrowRequest"
-    result = execute_query(query)
-    new_id_num = result[0]['count'] + 1
-    request_id = f"BR{str(new_id_num).zfill(3)}"
+    request_id = borrow_request_ids.next_id(session)
+    if not request_id:
+        return "Error creating request (could not allocate a request ID)", get_member_requests(member_id_requester, session), member_id_requester, member_id_owner, book_id
     
     # Insert new request
     query = """
         INSERT INTO BorrowRequest (request_id, request_date, status, member_id_requester, member_id_owner, book_id)
         VALUES (%s, CURDATE(), 'Pending', %s, %s, %s)
     """
-    result = execute_query(query, (request_id, member_id_requester, member_id_owner, book_id), fetch=False)
+    result = execute_query(session, query, (request_id, member_id_requester, member_id_owner, book_id), fetch=False)
+    invalidate_dashboard_cache()
     
     if result:
-        return f"Created request {request_id} for book {book_id}", get_member_requests(member_id_requester), "", "", ""
+        return f"Created request {request_id} for book {book_id}", get_member_requests(member_id_requester, session), "", "", ""
     else:
-        return "Error creating request (Check Member IDs and Book ID exist)", get_member_requests(member_id_requester), member_id_requester, member_id_owner, book_id
+        return "Error creating request (Check Member IDs and Book ID exist)", get_member_requests(member_id_requester, session), member_id_requester, member_id_owner, book_id
+
+MEMBER_REQUESTS_QUERY = """
+    SELECT 
+        br.request_id as 'Request ID',
+        b.title as 'Book Title',
+        br.book_id as 'Book ID',
+        br.request_date as 'Request Date',
+        br.status as 'Status',
+        CASE 
+            WHEN br.status = 'Completed' THEN 
+                CONCAT('Approved - Txn: ', t.transaction_id)
+            WHEN br.status = 'Pending' THEN 'Waiting for approval'
+            ELSE 'Request denied'
+        END as 'Details'
+    FROM BorrowRequest br
+    JOIN Book b ON br.book_id = b.book_id
+    LEFT JOIN Transaction t ON t.request_id = br.request_id
+    WHERE br.member_id_requester = %s
+    ORDER BY br.request_date DESC
+"""
 
-def get_member_requests(member_id):
+def get_member_requests(member_id, session):
     """Get all requests for a specific member"""
     if not member_id:
         return pd.DataFrame()
     
+    df = fetch_frame(session, MEMBER_REQUESTS_QUERY, (member_id,), prepared=True)
+    return pd.DataFrame() if df is None else df
+
+# Strike Management Functions
+STRIKE_WINDOW_DAYS = 90  # keep in step with RefreshRecentStrikes and ReconcileStrikeCounts
+
+MEMBER_STRIKES_QUERY = """
+    SELECT 
+        s.strike_id as 'Strike ID',
+        s.member_id as 'Member ID',
+        m.name as 'Member Name',
+        s.transaction_id as 'Transaction ID',
+        s.strike_date as 'Strike Date',
+        s.reason as 'Reason'
+    FROM Strike s
+    JOIN Member m ON s.member_id = m.member_id
+    WHERE s.member_id = %s
+    ORDER BY s.strike_id DESC
+    LIMIT %s OFFSET %s
+"""
+
+async def get_member_strikes_async(member_id, page, page_size, session):
+    """One page of a member's strikes, newest first"""
+    params = (member_id.strip(), page_size, (page - 1) * page_size)
+    df = await fetch_frame_async(session, MEMBER_STRIKES_QUERY, params, prepared=True)
+    return pd.DataFrame() if df is None else df
+
+def reconcile_strike_counts(session):
+    """Rebuild every member's strike counts from the Strike table; returns how many were wrong"""
+    results = call_procedure(session, 'ReconcileStrikeCounts')
+    if results is None:
+        return None
+    return results[0]['members_corrected'] if results else 0
+
+def reconcile_active_loan_counts(session):
+    """Recount every member's open loans; returns how many counts were wrong"""
+    results = call_procedure(session, 'ReconcileActiveLoanCounts')
+    if results is None:
+        return None
+    return results[0]['members_corrected'] if results else 0
+
+# Borrow Request Functions (Admin)
+PRIORITY_QUEUE_LIMIT = 100  # queue entries shown per book
+
+async def get_prioritized_requests_async(book_id, session):
+    """Get the top of a book's prioritized borrow request queue"""
+    return shape_request_queue(await call_procedure_async(session, 'GetPrioritizedRequestListTop', (book_id, PRIORITY_QUEUE_LIMIT), cache=True))
+
+def shape_request_queue(results):
+    """Number the queue rows from GetPrioritizedRequestListTop for display"""
+    if not results:
+        return pd.DataFrame(columns=["Priority", "Request ID", "Member", "Recent Strikes", "Requested Date", "Member Since"])
+    
+    data = []
+    for i, req in enumerate(results, 1):
+        data.append({
+            "Priority": i,
+            "Request ID": req['request_id'],
+            "Member": f"{req['requester_name']} ({req['member_id']})",
+            "Recent Strikes": req['recent_strike_count'],
+            "Requested Date": req['request_date'],
+            "Member Since": req['join_date']
+        })
+    return pd.DataFrame(data)
+
+PENDING_REQUESTS_QUERY = """
+    SELECT p.book_id, b.title, b.author, p.pending_count
+    FROM (
+        SELECT book_id, COUNT(*) as pending_count
+        FROM BorrowRequest
+        WHERE status = 'Pending'
+        GROUP BY book_id
+    ) p
+    JOIN Book b ON b.book_id = p.book_id
+    ORDER BY p.book_id
+"""
+
+def get_all_pending_requests(session):
+    """Get pending request counts per book (one grouped pass over the status index)"""
+    results = execute_query(session, PENDING_REQUESTS_QUERY)
+    return results if results else []
+
+def pending_book_choices(pending):
+    """Book selector choices for the pending summary: label for display, book_id as the value"""
+    return [(f"{book['title']} by {book['author']} ({book['book_id']}) - {book['pending_count']} pending", book['book_id']) for book in pending]
+
+def check_approval(request_id, custom_due_date, session):
+    """Handler outputs for an approval that can't go ahead, or None if it can"""
+    if not session['is_admin']:
+        return "Access Denied: Admin privileges required", gr.update(), ""
+    
+    if not request_id:
+        return "Please enter a Request ID", gr.update(), ""
+    
+    if not session['admin_id']:
+        return f"No Admin record is linked to database user {session['username']}", gr.update(), custom_due_date
+    
+    due_date = (custom_due_date or "").strip()
+    if due_date and not is_valid_date(due_date):
+        return "Custom due date must be YYYY-MM-DD", gr.update(), custom_due_date
+    return None
+
+def approval_outputs(request_id, custom_due_date, results, queue):
+    """Handler outputs once ApproveBorrowRequestEx has run"""
+    if not results:
+        return f"Error approving request {request_id}", gr.update(), ""
+    
+    transaction_id = results[0]['transaction_id']
+    due_text = f"due date: {custom_due_date}" if custom_due_date else "default 14 days"
+    return f"Approved request: {request_id} as {transaction_id} ({due_text})", drop_queue_rows(queue, [request_id]), ""
+
+async def approve_request_async(request_id, custom_due_date, queue, session):
+    """Approve a borrow request with optional custom due date"""
+    rejected = check_approval(request_id, custom_due_date, session)
+    if rejected:
+        return rejected
+    
+    custom_due_date = (custom_due_date or "").strip() or None
+    # Due date and approving admin go straight into the new transaction
+    results = await call_procedure_async(session, 'ApproveBorrowRequestEx', (request_id, session['admin_id'], custom_due_date))
+    invalidate_dashboard_cache()
+    await invalidate_loan_parties_async(session, request_ids=[request_id])
+    return approval_outputs(request_id, custom_due_date, results, queue)
+
+async def deny_request_async(request_id, queue, session):
+    """Deny a borrow request"""
+    if not session['is_admin']:
+        return "Access Denied: Admin privileges required", gr.update()
+    
+    if not request_id:
+        return "Please enter a Request ID", gr.update()
+    
+    results = await call_procedure_async(session, 'DenyBorrowRequest', (request_id,))
+    invalidate_dashboard_cache()
+    
+    if results is not None:
+        return f"Denied request: {request_id}", drop_queue_rows(queue, [request_id])
+    else:
+        return f"Error denying request {request_id}", gr.update()
+
+# Batch Approval Functions
+BATCH_RESULT_COLUMNS = ["Request ID", "Transaction ID", "Outcome"]
+
+def parse_id_list(text):
+    """Split a comma/space/newline separated list of IDs, dropping duplicates"""
+    return list(dict.fromkeys(item for item in re.split(r"[\s,;]+", text or "") if item))
+
+def is_valid_date(text):
+    """True if text is a YYYY-MM-DD date"""
+    try:
+        datetime.strptime(text, '%Y-%m-%d')
+        return True
+    except ValueError:
+        return False
+
+def run_request_batch(proc_name, params, session):
+    """Call a batch approval procedure and shape its per-request results"""
+    results = call_procedure(session, proc_name, params)
+    invalidate_dashboard_cache()
+    if results is None:
+        return None
+    summary = pd.DataFrame(results, columns=['request_id', 'transaction_id', 'outcome'])
+    summary.columns = BATCH_RESULT_COLUMNS
+    return summary
+
+def summarize_batch(action, summary):
+    """Status line for a batch, e.g. 'Approved 3 of 4 requests'"""
+    done = int((summary["Outcome"] == action).sum())
+    return f"{action} {done} of {len(summary)} requests"
+
+def approve_requests_batch(request_ids, custom_due_date, session):
+    """Approve several borrow requests in one transaction"""
+    if not session['is_admin']:
+        return "Access Denied: Admin privileges required", pd.DataFrame(columns=BATCH_RESULT_COLUMNS)
+    
+    request_ids = parse_id_list(request_ids) if isinstance(request_ids, str) else list(dict.fromkeys(request_ids or []))
+    if not request_ids:
+        return "Please select at least one request", pd.DataFrame(columns=BATCH_RESULT_COLUMNS)
+    
+    if not session['admin_id']:
+        return f"No Admin record is linked to database user {session['username']}", pd.DataFrame(columns=BATCH_RESULT_COLUMNS)
+    
+    custom_due_date = (custom_due_date or "").strip() or None
+    if custom_due_date and not is_valid_date(custom_due_date):
+        return "Custom due date must be YYYY-MM-DD", pd.DataFrame(columns=BATCH_RESULT_COLUMNS)
+    
+    summary = run_request_batch('ApproveBorrowRequests', (json.dumps(request_ids), session['admin_id'], custom_due_date), session)
+    invalidate_loan_parties(session, request_ids=request_ids)
+    if summary is None:
+        return "Error approving requests, no changes were made", pd.DataFrame(columns=BATCH_RESULT_COLUMNS)
+    return summarize_batch("Approved", summary), summary
+
+def deny_requests_batch(request_ids, session):
+    """Deny several borrow requests in one transaction"""
+    if not session['is_admin']:
+        return "Access Denied: Admin privileges required", pd.DataFrame(columns=BATCH_RESULT_COLUMNS)
+    
+    request_ids = parse_id_list(request_ids) if isinstance(request_ids, str) else list(dict.fromkeys(request_ids or []))
+    if not request_ids:
+        return "Please select at least one request", pd.DataFrame(columns=BATCH_RESULT_COLUMNS)
+    
+    summary = run_request_batch('DenyBorrowRequests', (json.dumps(request_ids),), session)
+    if summary is None:
+        return "Error denying requests, no changes were made", pd.DataFrame(columns=BATCH_RESULT_COLUMNS)
+    return summarize_batch("Denied", summary), summary
+
+# Active Loans Functions
+DUE_SOON_DAYS = 2  # keep in step with the LoanBucket function in the schema
+
+# UI choice -> Transaction.loan_bucket value (None lists every open loan)
+LOAN_BUCKETS = {
+    'All': None,
+    'Overdue': 'Overdue',
+    'Due soon': 'DueSoon',
+    'Active': 'Active',
+}
+
+ACTIVE_LOANS_COLUMNS = ['Transaction ID', 'Book', 'Book ID', 'Member', 'Member ID', 'Borrow Date', 'Due Date', 'Status']
+
+ACTIVE_LOANS_QUERY = """
+    SELECT 
+        t.transaction_id as 'Transaction ID',
+        b.title as 'Book',
+        b.book_id as 'Book ID',
+        m.name as 'Member',
+        m.member_id as 'Member ID',
+        t.borrow_date as 'Borrow Date',
+        t.due_date as 'Due Date'
+    FROM Transaction t
+    JOIN BorrowRequest br ON t.request_id = br.request_id
+    JOIN Book b ON br.book_id = b.book_id
+    JOIN Member m ON br.member_id_requester = m.member_id
+    WHERE {where}
+    ORDER BY t.due_date ASC
+"""
+
+def build_active_loans_query(bucket='All'):
+    """Active loans query for one bucket, as (query, params)"""
+    loan_bucket = LOAN_BUCKETS.get(bucket)
+    if loan_bucket is None:
+        return ACTIVE_LOANS_QUERY.format(where="t.return_date IS NULL"), ()
+    return ACTIVE_LOANS_QUERY.format(where="t.loan_bucket = %s"), (loan_bucket,)
+
+def loan_bucket_name(due_date, today=None):
+    """LOAN_BUCKETS choice an open loan with this due date falls in"""
+    days = (due_date - (today or datetime.now().date())).days
+    if days < 0:
+        return 'Overdue'
+    if days <= DUE_SOON_DAYS:
+        return 'Due soon'
+    return 'Active'
+
+def loan_status_label(due_date, today=None):
+    """Overdue / due-soon label for an open loan's due date"""
+    today = today or datetime.now().date()
+    days = (due_date - today).days
+    if days < 0:
+        return f"Overdue ({-days} days)"
+    if days <= DUE_SOON_DAYS:
+        return f"Due in {days} days"
+    return "Active"
+
+def get_active_loans(bucket, session):
+    """Get active loans in one bucket (All, Overdue, Due soon or Active) with status"""
+    return shape_active_loans(fetch_frame(session, *build_active_loans_query(bucket), prepared=True))
+
+async def get_active_loans_async(bucket, session):
+    """Async get_active_loans"""
+    return shape_active_loans(await fetch_frame_async(session, *build_active_loans_query(bucket), prepared=True))
+
+def shape_active_loans(df):
+    """Active loans frame with its status label"""
+    if df is not None and not df.empty:
+        today = datetime.now().date()
+        df['Status'] = [loan_status_label(due, today) for due in df['Due Date'].tolist()]
+        return df
+    return pd.DataFrame(columns=ACTIVE_LOANS_COLUMNS)
+
+def process_return(transaction_id, bucket, loans, session):
+    """Process a book return"""
+    if not session['is_admin']:
+        return "Access Denied: Admin privileges required", gr.update()
+    
+    if not transaction_id:
+        return "Please enter a Transaction ID", gr.update()
+    
     query = """
-        SELECT 
-            br.request_id as 'Request ID',
-            b.title as 'Book Title',
-            br.book_id as 'Book ID',
-            br.request_date as 'Request Date',
-            br.status as 'Status',
-            CASE 
-                WHEN br.status = 'Completed' THEN 
-                    CONCAT('Approved - Txn: ', t.transaction_id)
-                WHEN br.status = 'Pending' THEN 'Waiting for approval'
-                ELSE 'Request denied'
-            END as 'Details'
-        FROM BorrowRequest br
-        JOIN Book b ON br.book_id = b.book_id
-        LEFT JOIN Transaction t ON t.request_id = br.request_id
-        WHERE br.member_id_requester = %s
-        ORDER BY br.request_date DESC
+        UPDATE Transaction
+        SET return_date = CURDATE()
+        WHERE transaction_id = %s AND return_date IS NULL
     """
-    results = execute_query(query, (member_id,))
-    return pd.DataFrame(results) if results else pd.DataFrame()
+    result = execute_query(session, query, (transaction_id,), fetch=False)
+    invalidate_dashboard_cache()
+    invalidate_loan_parties(session, transaction_ids=[transaction_id])
+    
+    if result:
+        return f"Processed return for transaction: {transaction_id}", patch_loans(loans, [transaction_id], bucket, session)
+    else:
+        return f"Transaction ID not found or already returned", gr.update()
 
-def get_available_books_for_request():
-    """Get books available for borrowing"""
-    query = """
-        SELECT book_id as 'Book ID', title as 'Title', author as 'Author', 
-               edition as 'Edition', condition_val as 'Condition'
-        FROM Book
-        WHERE status = 'Available'
-        ORDER BY title
+# Batch Returns
+RETURN_RESULT_COLUMNS = ["Transaction ID", "Days Late", "Outcome"]
+
+def read_barcode_file(file_path):
+    """Transaction IDs from a scanned-barcode file (one per line, or comma separated)"""
+    with open(file_path, encoding='utf-8-sig') as f:
+        return parse_id_list(f.read())
+
+def process_returns_batch(transaction_ids, barcode_file, bucket, loans, session):
+    """Return many loans in one transaction, issuing late strikes for the whole batch at once"""
+    empty = pd.DataFrame(columns=RETURN_RESULT_COLUMNS)
+    if not session['is_admin']:
+        return "Access Denied: Admin privileges required", empty, gr.update()
+    
+    transaction_ids = parse_id_list(transaction_ids)
+    if barcode_file is not None:
+        file_path = barcode_file if isinstance(barcode_file, str) else barcode_file.name
+        try:
+            transaction_ids = list(dict.fromkeys(transaction_ids + read_barcode_file(file_path)))
+        except (OSError, UnicodeDecodeError) as e:
+            return f"Could not read barcode file: {e}", empty, gr.update()
+    
+    if not transaction_ids:
+        return "Please enter Transaction IDs or upload a barcode file", empty, gr.update()
+    
+    results = call_procedure(session, 'ProcessReturns', (json.dumps(transaction_ids), None))
+    invalidate_dashboard_cache()
+    invalidate_loan_parties(session, transaction_ids=transaction_ids)
+    if results is None:
+        return "Error processing returns, no changes were made", empty, gr.update()
+    
+    summary = pd.DataFrame(results, columns=['transaction_id', 'days_late', 'outcome'])
+    summary.columns = RETURN_RESULT_COLUMNS
+    returned = int(summary["Outcome"].isin(["Returned", "Returned late"]).sum())
+    late = int((summary["Outcome"] == "Returned late").sum())
+    status = f"Returned {returned} of {len(summary)} loans, {late} late (strikes issued)"
+    return status, summary, patch_loans(loans, transaction_ids, bucket, session)
+
+# Query Plan Checks
+EXPLAIN_ROW_THRESHOLD = 1000  # full table scans estimated above this many rows fail the check
+EXPLAIN_SEARCH_TERMS = {'members': 'smith', 'books': 'gatsby'}  # sample searches that go to the FULLTEXT index
+EXPLAIN_SAMPLE_KEYS = {  # sample rows from the seed data, per table
+    'Member': ('M001', 'M002'),
+    'Book': ('B001', 'B002'),
+    'BorrowRequest': ('BR001', 'BR002'),
+    'Transaction': ('T001', 'T002'),
+}
+EXPLAIN_AVAILABILITY_TABLES = {'book_status': 'Book', 'member_loans': 'Member'}
+
+# Same SELECT as the GetPrioritizedRequestListTop procedure (EXPLAIN can't look inside a CALL)
+PRIORITIZED_REQUESTS_QUERY = """
+    SELECT pq.request_id, pq.request_date, pq.member_id, m.name AS requester_name, pq.recent_strike_count, pq.join_date
+    FROM PendingQueue pq
+    JOIN Member m ON pq.member_id = m.member_id
+    WHERE pq.book_id = %s
+    ORDER BY pq.recent_strike_count ASC, pq.join_date ASC, pq.request_date ASC, pq.request_id ASC
+    LIMIT %s
+"""
+
+def collect_explain_queries():
+    """Every read query the app issues, as (name, query, sample params)"""
+    queries = [
+        ('dashboard stats', DASHBOARD_STATS_QUERY, ()),
+        ('member requests', MEMBER_REQUESTS_QUERY, ('M001',)),
+        ('pending requests', PENDING_REQUESTS_QUERY, ()),
+        ('prioritized requests', PRIORITIZED_REQUESTS_QUERY, ('B001', PRIORITY_QUEUE_LIMIT)),
+        ('member strikes', MEMBER_STRIKES_QUERY, ('M001', TABLE_PAGE_SIZE, 0)),
+        ('active loans', *build_active_loans_query()),
+        ('overdue loans', *build_active_loans_query('Overdue')),
+    ]
+    for table_key, table in PAGED_TABLES.items():
+        first_query, first_params = build_table_query(table_key)
+        next_query, next_params = build_table_query(table_key, after=('M001',) * len(table['keys']))
+        queries.append((f"{table_key} first page", first_query + " LIMIT %s", first_params + (TABLE_PAGE_SIZE,)))
+        queries.append((f"{table_key} next page", next_query + " LIMIT %s", next_params + (TABLE_PAGE_SIZE,)))
+        queries.append((f"{table_key} count", table['count_query'], ()))
+    for search_key in SEARCH_SPECS:
+        query, params = build_ranked_search_query(search_key, EXPLAIN_SEARCH_TERMS[search_key])
+        queries.append((f"{search_key} search", query, params))
+    
+    # Lookups behind the caches and the change feed
+    queries.append(('linked admin', LINKED_ADMIN_QUERY, ('library_admin',)))
+    for kind, query in AVAILABILITY_QUERIES.items():
+        queries.append((f"{kind} lookup", query, (EXPLAIN_SAMPLE_KEYS[EXPLAIN_AVAILABILITY_TABLES[kind]][0],)))
+    for column, table in (('request_ids', 'BorrowRequest'), ('transaction_ids', 'Transaction')):
+        for query, params in loan_parties_queries(**{column: EXPLAIN_SAMPLE_KEYS[table]}):
+            queries.append((f"loan parties by {table}", query, params))
+    queries.append(('change log bounds', CHANGE_LOG_BOUNDS_QUERY, ()))
+    queries.append(('change log latest', CHANGE_LOG_LATEST_QUERY, ()))
+    queries.append(('change log', build_change_log_query([]), (0, CHANGE_POLL_BATCH)))
+    queries.append(('change log with holes', build_change_log_query([1, 2]), (2, 1, 2, CHANGE_POLL_BATCH)))
+    for view, spec in LIVE_VIEWS.items():
+        keys = EXPLAIN_SAMPLE_KEYS[spec['table']]
+        queries.append((f"{view} live rows", build_live_rows_query(view, len(keys)), keys))
+    return queries
+
+def explain_queries(session, row_threshold=EXPLAIN_ROW_THRESHOLD):
+    """EXPLAIN every app query and flag full scans of big tables
+
+    Returns one row per plan step; 'problem' is set for steps that scan a whole
+    base table estimated above row_threshold rows (or when EXPLAIN fails).
     """
-    results = execute_query(query)
-    return pd.DataFrame(results) if results else pd.DataFrame()
+    report = []
+    for name, query, params in collect_explain_queries():
+        plan = execute_query(session, "EXPLAIN " + query, params)
+        if not plan:
+            report.append({'query': name, 'table': None, 'type': None, 'key': None, 'rows': None, 'problem': 'EXPLAIN failed'})
+            continue
+        for step in plan:
+            table = step.get('table') or ''
+            rows = step.get('rows') or 0
+            # Derived tables (<derived2>, <union3,4>) are planned from their own steps
+            full_scan = step.get('type') == 'ALL' and not table.startswith('<') and rows > row_threshold
+            report.append({
+                'query': name,
+                'table': table,
+                'type': step.get('type'),
+                'key': step.get('key'),
+                'rows': rows,
+                'problem': f"full scan of {rows} rows" if full_scan else None
+            })
+    return report
 
-# Strike Management Functions
-def get_all_strikes():
-    """Get all strikes with member and transaction details"""
-    query = """
-        SELECT 
-            s.strike_id as 'Strike ID',
-            s.member_id as 'Member ID',
-            m.name as 'Member Name',
-            s.transaction_id as 'Transaction ID',
-            s.strike_date as 'Strike Date',
-            s.reason as 'Reason'
-        FROM Strike s
-        JOIN Member m ON s.member_id = m.member_id
-        ORDER BY s.strike_date DESC
+# Bulk Import Functions
+IMPORT_CHUNK_SIZE = 1000
+IMPORT_REJECTS_SHOWN = 200  # rejects listed in the UI; the CLI prints them all
+
+# What each import target accepts. 'columns' is the file header / INSERT column
+# order; 'defaults' fill blank optional fields (callables are evaluated per import).
+IMPORT_SPECS = {
+    'members': {
+        'table': 'Member',
+        'columns': ['member_id', 'name', 'email', 'phone', 'join_date'],
+        'required': ['member_id', 'name', 'email', 'phone'],
+        'max_lengths': {'member_id': 20, 'name': 255, 'email': 255, 'phone': 15},
+        'dates': ['join_date'],
+        'defaults': {'join_date': lambda: datetime.now().strftime('%Y-%m-%d')},
+        'insert': """
+            INSERT INTO Member (member_id, name, email, phone, join_date, strike_count)
+            VALUES (%s, %s, %s, %s, %s, 0)
+        """
+    },
+    'books': {
+        'table': 'Book',
+        'columns': ['book_id', 'title', 'author', 'edition', 'condition_val', 'status', 'purchase_date'],
+        'required': ['book_id', 'title', 'author'],
+        'max_lengths': {'book_id': 20, 'title': 255, 'author': 255, 'edition': 50},
+        'allowed': {'condition_val': BOOK_CONDITIONS, 'status': BOOK_STATUSES},
+        'dates': ['purchase_date'],
+        'defaults': {
+            'edition': 'First',
+            'condition_val': 'Good',
+            'status': 'Available',
+            'purchase_date': lambda: datetime.now().strftime('%Y-%m-%d')
+        },
+        'insert': """
+            INSERT INTO Book (book_id, title, author, edition, condition_val, status, purchase_date)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+        """
+    },
+    'categories': {
+        'table': 'Category',
+        'columns': ['category_id', 'category_name'],
+        'required': ['category_id', 'category_name'],
+        'max_lengths': {'category_id': 20, 'category_name': 255},
+        'insert': "INSERT INTO Category (category_id, category_name) VALUES (%s, %s)"
+    },
+    'category_assignments': {
+        'table': 'CategorisedAs',
+        'columns': ['book_id', 'category_id'],
+        'required': ['book_id', 'category_id'],
+        'max_lengths': {'book_id': 20, 'category_id': 20},
+        'insert': "INSERT INTO CategorisedAs (book_id, category_id) VALUES (%s, %s)"
+    }
+}
+
+def parquet_batch_as_strings(batch):
+    """A Parquet record batch as strings, the way the CSV reader sees a file: dates as YYYY-MM-DD, nulls empty"""
+    columns = {}
+    for name, column in zip(batch.schema.names, batch.columns):
+        if pa.types.is_date(column.type) or pa.types.is_timestamp(column.type):
+            column = pc.strftime(column, format='%Y-%m-%d')
+        columns[name] = pc.fill_null(pc.cast(column, pa.string()), '').to_pylist()
+    return pd.DataFrame(columns, dtype=str)
+
+def read_import_chunks(file_path, chunk_size=IMPORT_CHUNK_SIZE):
+    """Yield a CSV or Parquet file as DataFrames of strings, chunk by chunk"""
+    if file_path.lower().endswith('.parquet'):
+        if pq is None:
+            raise ValueError("Parquet import needs the pyarrow package")
+        for batch in pq.ParquetFile(file_path).iter_batches(batch_size=chunk_size):
+            yield parquet_batch_as_strings(batch)
+    else:
+        yield from pd.read_csv(file_path, chunksize=chunk_size, dtype=str, keep_default_na=False)
+
+def validate_import_row(spec, row, defaults):
+    """Return (values in INSERT order, None) or (None, reason) for one input row"""
+    values = []
+    for column in spec['columns']:
+        value = str(row.get(column, '') or '').strip()
+        if not value:
+            if column in spec['required']:
+                return None, f"missing {column}"
+            value = defaults.get(column)
+        if column in spec.get('allowed', {}) and value not in spec['allowed'][column]:
+            return None, f"{column} must be one of {', '.join(spec['allowed'][column])}"
+        if value and len(value) > spec.get('max_lengths', {}).get(column, len(value)):
+            return None, f"{column} longer than {spec['max_lengths'][column]} characters"
+        if value and column in spec.get('dates', []):
+            try:
+                datetime.strptime(value, '%Y-%m-%d')
+            except ValueError:
+                return None, f"{column} must be a YYYY-MM-DD date"
+        values.append(value)
+    return tuple(values), None
+
+def bulk_import(target, file_path, session, chunk_size=IMPORT_CHUNK_SIZE):
+    """Stream a CSV/Parquet file into a table in batches
+
+    Each chunk is validated, then inserted with one executemany and committed.
+    If the database rejects the batch (e.g. a duplicate key), that chunk is
+    retried row by row so only the offending rows are rejected.
+    Returns a report with loaded/rejected counts, rows/sec and the rejects.
+    """
+    spec = IMPORT_SPECS[target]
+    defaults = {column: (value() if callable(value) else value) for column, value in spec.get('defaults', {}).items()}
+    report = {'target': target, 'loaded': 0, 'rejected': 0, 'seconds': 0.0, 'rows_per_sec': 0.0, 'rejects': []}
+    
+    if not session['is_admin']:
+        report['rejects'].append((None, "Access Denied: Admin privileges required"))
+        return report
+    
+    connection = get_session_connection(session)
+    if not connection:
+        report['rejects'].append((None, "Could not connect to the database"))
+        return report
+    
+    start = time.monotonic()
+    line_number = 1  # header line
+    cursor = None
+    try:
+        cursor = connection.cursor()
+        for chunk in read_import_chunks(file_path, chunk_size):
+            batch = []
+            for row in chunk.to_dict('records'):
+                line_number += 1
+                values, reason = validate_import_row(spec, row, defaults)
+                if reason:
+                    report['rejects'].append((line_number, reason))
+                else:
+                    batch.append((line_number, values))
+            if not batch:
+                continue
+            
+            try:
+                cursor.executemany(spec['insert'], [values for _, values in batch])
+                connection.commit()
+                report['loaded'] += len(batch)
+            except Error:
+                connection.rollback()
+                for row_line, values in batch:
+                    try:
+                        cursor.execute(spec['insert'], values)
+                        connection.commit()
+                        report['loaded'] += 1
+                    except Error as e:
+                        connection.rollback()
+                        report['rejects'].append((row_line, e.msg))
+    except (Error, ValueError, OSError) as e:
+        print(f"Import error: {e}")
+        report['rejects'].append((None, str(e)))
+    finally:
+        if cursor is not None:
+            cursor.close()
+        connection.close()
+    
+    invalidate_dashboard_cache()
+    result_cache.invalidate(written_tables(spec['insert']))
+    report['rejected'] = sum(1 for line, _ in report['rejects'] if line is not None)
+    report['seconds'] = time.monotonic() - start
+    report['rows_per_sec'] = report['loaded'] / report['seconds'] if report['seconds'] else 0.0
+    return report
+
+def format_import_report(report):
+    """One-line summary of a bulk import"""
+    return (f"{report['target']}: loaded {report['loaded']} rows, rejected {report['rejected']} "
+            f"in {report['seconds']:.1f}s ({report['rows_per_sec']:.0f} rows/sec)")
+
+def import_file(target, uploaded_file, session):
+    """Gradio handler for the Bulk Import tab"""
+    if not session['is_admin']:
+        return "Access Denied: Admin privileges required", pd.DataFrame()
+    
+    if not target or uploaded_file is None:
+        return "Please choose what to import and a CSV/Parquet file", pd.DataFrame()
+    
+    file_path = uploaded_file if isinstance(uploaded_file, str) else uploaded_file.name
+    report = bulk_import(target, file_path, session)
+    rejects = pd.DataFrame(report['rejects'][:IMPORT_REJECTS_SHOWN], columns=['Line', 'Reason'])
+    return format_import_report(report), rejects
+
+# Post-login Prefetch
+PREFETCH_TABLES = ['members', 'books', 'available_books', 'strikes']
+
+async def prefetch_tabs(session, page_sizes=None, bucket='All'):
+    """Load every tab's first screen concurrently, right after login
+
+    Table pages go through load_table_page, so their page boundaries and totals
+    are cached in the session just as if each tab had been refreshed by hand.
+    Returns None for a session that isn't logged in.
+    """
+    if not session or not session['is_authenticated']:
+        return None
+    
+    page_sizes = page_sizes or {}
+    pages = [
+        asyncio.to_thread(load_table_page, table_key, 1, int(page_sizes.get(table_key, TABLE_PAGE_SIZE)), session)
+        for table_key in PREFETCH_TABLES
+    ]
+    pending = execute_query_async(session, PENDING_REQUESTS_QUERY) if session['is_admin'] else asyncio.sleep(0, [])
+    stats, loans, pending, *table_pages = await asyncio.gather(
+        get_dashboard_stats_async(session),
+        get_active_loans_async(bucket, session),
+        pending,
+        *pages
+    )
+    return {
+        'dashboard': stats,
+        'loans': loans,
+        'pending': pending or [],
+        **dict(zip(PREFETCH_TABLES, table_pages))
+    }
+
+# Live Updates
+CHANGE_POLL_SECONDS = 3          # how often the change feed polls ChangeLog (and sessions pick up changes)
+CHANGE_POLL_BATCH = 500          # ChangeLog rows read per poll
+CHANGE_FEED_HISTORY = 200        # polls kept for sessions that are catching up
+CHANGE_FEED_IDLE_SECONDS = 60    # stop polling when no session has asked for changes this long
+CHANGE_HOLE_SECONDS = 300        # how long a skipped ChangeLog version is waited for before it counts as rolled back
+CHANGE_HOLE_LIMIT = 1000         # skipped versions waited for at once, the oldest are given up first
+CHANGE_LOG_RETENTION_SECONDS = 24 * 3600  # ChangeLog kept by the purge_change_log event
+CHANGE_LOG_PURGE_MARGIN = 600    # allowance for the event's schedule and clock differences
+
+# ChangeLog versions are allocated when a row is written but become visible when
+# its transaction commits, so a poll can see version 11 before version 10. The
+# versions skipped over ("holes") are read again by later polls.
+CHANGE_LOG_QUERY = """
+    SELECT version, table_name, row_key, op
+    FROM ChangeLog
+    WHERE version > %s{holes}
+    ORDER BY version
+    LIMIT %s
+"""
+
+CHANGE_LOG_BOUNDS_QUERY = "SELECT MIN(version) AS oldest, MAX(version) AS latest FROM ChangeLog"
+CHANGE_LOG_LATEST_QUERY = "SELECT COALESCE(MAX(version), 0) AS version FROM ChangeLog"
+
+def build_change_log_query(holes):
+    """CHANGE_LOG_QUERY, also reading the skipped versions `holes`"""
+    return CHANGE_LOG_QUERY.format(holes=f" OR version IN ({', '.join(['%s'] * len(holes))})" if holes else "")
+
+# Screens kept live: ChangeLog table feeding them, key column shown (and the
+# column it is read from), and whether new rows are added (paged tables only
+# patch rows already on the page)
+LIVE_VIEWS = {
+    'members': {'table': 'Member', 'column': 'member_id', 'key': 'Member ID', 'inserts': False},
+    'books': {'table': 'Book', 'column': 'book_id', 'key': 'Book ID', 'inserts': False},
+    'available_books': {'table': 'Book', 'column': 'book_id', 'key': 'Book ID', 'inserts': False},
+    'loans': {'table': 'Transaction', 'column': 't.transaction_id', 'key': 'Transaction ID', 'inserts': True},
+}
+
+def build_live_rows_query(view, count):
+    """Query for the current on-screen version of `count` rows of a live view
+
+    Rows outside the view's filters (a book that is no longer available, a
+    returned loan) aren't selected, so they read as deleted.
+    """
+    column = LIVE_VIEWS[view]['column']
+    placeholders = ", ".join(["%s"] * count)
+    if view == 'loans':
+        return ACTIVE_LOANS_QUERY.format(where=f"t.return_date IS NULL AND {column} IN ({placeholders})")
+    table = PAGED_TABLES[view]
+    conditions = table.get('filters', []) + [f"{column} IN ({placeholders})"]
+    return table['query'].format(where="WHERE " + " AND ".join(conditions), order=column)
+
+def fetch_live_rows(view, keys, session):
+    """Current rows for some keys of a live view as {key: row}; keys without a row were deleted (None on error)"""
+    rows = execute_query(session, build_live_rows_query(view, len(keys)), tuple(keys))
+    if rows is None:
+        return None
+    key_column = LIVE_VIEWS[view]['key']
+    return {str(row[key_column]): row for row in rows}
+
+class ChangeFeed:
+    """One ChangeLog poller per process, fanning row diffs out to every open session
+
+    Each poll turns new ChangeLog entries into {view: {key: row or None}} diffs,
+    reading the changed rows once however many sessions are watching. Sessions
+    ask for everything after the last position they applied, a
+    (generation, step) pair where the step counts the polls that produced
+    diffs. Counting polls rather than ChangeLog versions means a late-committed
+    version found by a later poll still moves sessions on. The generation moves
+    whenever the feed had to start over, which sends every session back to a
+    full reload.
     """
-    results = execute_query(query)
-    return pd.DataFrame(results) if results else pd.DataFrame()
 
-# Borrow Request Functions (Admin)
-def get_prioritized_requests(book_id):
-    """Get prioritized borrow requests for a book"""
-    results = call_procedure('GetPrioritizedRequestList', (book_id,))
+    def __init__(self, poll_interval=CHANGE_POLL_SECONDS, history=CHANGE_FEED_HISTORY):
+        self.poll_interval = poll_interval
+        self.history = history
+        self.version = None      # highest ChangeLog version read
+        self._holes = {}         # {skipped version: monotonic deadline} for versions that may still commit
+        self._last_poll = None   # monotonic time of the last successful poll
+        self._generation = 0     # bumped when changes may have been missed
+        self._step = 0           # polls that produced diffs
+        self._floor = 0          # oldest step sessions can still catch up from
+        self._batches = []       # (step, diffs) per poll that saw changes, oldest first
+        self._lock = threading.Lock()
+        self._session = None     # credentials of the latest session asking for changes
+        self._thread = None
+        self._last_demand = 0.0
+
+    def ensure_running(self, session):
+        """Start the poller if it has stopped; it polls as the latest session asking"""
+        with self._lock:
+            self._last_demand = time.monotonic()
+            self._session = dict(session)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="change-feed", daemon=True)
+                self._thread.start()
+
+    def release(self, session):
+        """Stop polling with a session's credentials when it logs out"""
+        with self._lock:
+            if self._session and (self._session['username'], self._session['password']) == (session['username'], session['password']):
+                self._session = None
+
+    def _run(self):
+        resumed = True
+        while True:
+            with self._lock:
+                session = self._session
+                if session is None or time.monotonic() - self._last_demand >= CHANGE_FEED_IDLE_SECONDS:
+                    # Nobody is watching; the next ensure_running starts a new poller
+                    self._thread = None
+                    return
+            if resumed:
+                resumed = not self.check_gap(session)
+            else:
+                self.poll(session)
+            time.sleep(self.poll_interval)
+
+    def check_gap(self, session):
+        """After a pause, start over if ChangeLog entries not yet read may have been purged; False on error
+
+        purge_change_log only deletes entries older than a day, and the entries
+        not read yet were written around or after the last poll, so a shorter
+        pause can't have lost any. Versions missing for other reasons (rolled
+        back, or not committed yet) are poll's to wait for.
+        """
+        if self.version is None or self._last_poll is None:
+            return True
+        if time.monotonic() - self._last_poll < CHANGE_LOG_RETENTION_SECONDS - CHANGE_LOG_PURGE_MARGIN:
+            return True
+        
+        bounds = execute_query(session, CHANGE_LOG_BOUNDS_QUERY)
+        if bounds is None:
+            return False
+        oldest, latest = bounds[0]['oldest'], bounds[0]['latest']
+        if oldest is not None and oldest <= self.version + 1:
+            return True
+        
+        # Changes in between may be gone for good: drop every cache and send sessions back to a reload
+        with self._lock:
+            self._generation += 1
+            self.version = self.version if latest is None else latest
+            self._floor = self._step
+            self._holes.clear()
+            self._batches.clear()
+        invalidate_dashboard_cache()
+        clear_availability_cache()
+        result_cache.invalidate(None)
+        return True
+
+    def poll(self, session):
+        """Read new ChangeLog entries (and any skipped ones that have committed since) and record the row diffs they imply"""
+        if self.version is None:
+            latest = execute_query(session, CHANGE_LOG_LATEST_QUERY)
+            if latest:
+                with self._lock:
+                    self.version = latest[0]['version']
+                    self._last_poll = time.monotonic()
+            return
+        
+        with self._lock:
+            holes = sorted(self._holes)
+        changes = execute_query(session, build_change_log_query(holes), (self.version, *holes, CHANGE_POLL_BATCH))
+        if changes is None:
+            return
+        if not changes:
+            with self._lock:
+                self._track_holes([], time.monotonic())
+            return
+        
+        keys_by_table = {}
+        for change in changes:
+            keys_by_table.setdefault(change['table_name'], set()).add(change['row_key'])
+        
+        # Writes from other processes and desks show up in this process's caches too
+        invalidate_dashboard_cache()
+        invalidate_availability(book_ids=keys_by_table.get('Book', ()), member_ids=keys_by_table.get('Member', ()))
+        deleted = {change['table_name'] for change in changes if change['op'] == 'D'}
+        result_cache.invalidate(set(keys_by_table).union(*(deleted_tables(table) for table in deleted)))
+        
+        diffs = {}
+        for view, spec in LIVE_VIEWS.items():
+            keys = sorted(keys_by_table.get(spec['table'], ()))
+            if not keys:
+                continue
+            rows = fetch_live_rows(view, keys, session)
+            if rows is None:
+                return  # try the same changes again next poll
+            diffs[view] = {key: rows.get(key) for key in keys}
+        
+        with self._lock:
+            self._track_holes(changes, time.monotonic())
+            if diffs:
+                self._step += 1
+                self._batches.append((self._step, diffs))
+                if len(self._batches) > self.history:
+                    self._floor = self._batches.pop(0)[0]
+
+    def _track_holes(self, changes, now):
+        """Move past `changes`, remembering the versions they skip; caller holds the lock"""
+        read = {change['version'] for change in changes}
+        latest = max(read | {self.version})
+        for version in range(max(self.version + 1, latest - CHANGE_HOLE_LIMIT), latest):
+            if version not in read:
+                self._holes[version] = now + CHANGE_HOLE_SECONDS
+        # A hole still empty after CHANGE_HOLE_SECONDS was rolled back (or is a gap in AUTO_INCREMENT)
+        self._holes = {version: deadline for version, deadline in self._holes.items()
+                       if version not in read and deadline > now}
+        for version in sorted(self._holes)[:max(len(self._holes) - CHANGE_HOLE_LIMIT, 0)]:
+            del self._holes[version]
+        self.version = latest
+        self._last_poll = now
+
+    def position(self):
+        """Current (generation, step), or None before the first poll"""
+        with self._lock:
+            return None if self.version is None else (self._generation, self._step)
+
+    def changes_since(self, position):
+        """Merged diffs after `position` as (current position, diffs)
+
+        diffs is None when `position` is older than the history kept or from
+        before the feed started over, in which case the caller can only catch
+        up by reloading.
+        """
+        with self._lock:
+            current = None if self.version is None else (self._generation, self._step)
+            if current is None or position is None:
+                return current, {}
+            generation, step = position
+            if generation != self._generation or step < self._floor:
+                return current, None
+            merged = {}
+            for batch_step, diffs in self._batches:
+                if batch_step > step:
+                    for view, rows in diffs.items():
+                        merged.setdefault(view, {}).update(rows)
+            return current, merged
+
+change_feed = ChangeFeed()
+
+def apply_row_diffs(df, rows, key_column, inserts=False, sort_by=None):
+    """Patch a displayed table with {key: row or None}; None means the row is gone
+
+    Rows already on screen are updated in place or removed; rows that aren't
+    are added only when `inserts` is set. Returns None if nothing visible changed.
+    """
+    if not isinstance(df, pd.DataFrame) or key_column not in df.columns or not rows:
+        return None
+    
+    df = df.reset_index(drop=True)
+    on_screen = df[key_column].astype(str)
+    changed = False
+    
+    gone = on_screen.isin([key for key, row in rows.items() if row is None])
+    if gone.any():
+        df, on_screen = df[~gone].reset_index(drop=True), on_screen[~gone].reset_index(drop=True)
+        changed = True
+    
+    for key, row in rows.items():
+        if row is None:
+            continue
+        values = [row.get(column) for column in df.columns]
+        matches = df.index[on_screen == key]
+        if len(matches):
+            df.loc[matches[0]] = values
+            changed = True
+        elif inserts:
+            df.loc[len(df)] = values
+            on_screen.loc[len(on_screen)] = key
+            changed = True
+    
+    if not changed:
+        return None
+    if sort_by:
+        df = df.sort_values(sort_by, key=lambda column: column.astype(str), kind="stable").reset_index(drop=True)
+    return df
+
+def apply_live_changes(session, members, books, available_books, loans, bucket):
+    """Timer handler: bring this session's live tables and dashboard up to the change feed's position"""
+    no_change = (gr.update(),) * 4
+    if not session or not session['is_authenticated']:
+        return *no_change, *(gr.update(),) * 6  # and the six dashboard numbers
     
-    if not results:
-        return pd.DataFrame(columns=["Priority", "Request ID", "Member", "Strikes", "Requested Date", "Member Since"])
+    change_feed.ensure_running(session)
+    position, diffs = change_feed.changes_since(session['change_version'])
+    session['change_version'] = position
+    if diffs is None:
+        return *reload_live_tables(session, members, books, available_books, bucket), *live_dashboard(session)
+    if not diffs:
+        return *no_change, *live_dashboard(session)
     
-    data = []
-    for i, req in enumerate(results, 1):
-        data.append({
-            "Priority": i,
-            "Request ID": req['request_id'],
-            "Member": f"{req['requester_name']} ({req['member_id']})",
-            "Strikes": req['strike_count'],
-            "Requested Date": req['request_date'],
-            "Member Since": req['join_date']
-        })
-    return pd.DataFrame(data)
+    patched = (
+        apply_row_diffs(members, diffs.get('members', {}), LIVE_VIEWS['members']['key']),
+        apply_row_diffs(books, diffs.get('books', {}), LIVE_VIEWS['books']['key']),
+        apply_row_diffs(available_books, diffs.get('available_books', {}), LIVE_VIEWS['available_books']['key']),
+        apply_row_diffs(loans, live_loan_rows(diffs.get('loans', {}), bucket), LIVE_VIEWS['loans']['key'],
+                        inserts=True, sort_by='Due Date'),
+    )
+    return *(gr.update() if df is None else df for df in patched), *live_dashboard(session)
 
-def get_all_pending_requests():
-    """Get all pending borrow requests grouped by book"""
-    query = """
-        SELECT DISTINCT br.book_id, b.title, b.author,
-               (SELECT COUNT(*) FROM BorrowRequest WHERE book_id = br.book_id AND status = 'Pending') as pending_count
-        FROM BorrowRequest br
-        JOIN Book b ON br.book_id = b.book_id
-        WHERE br.status = 'Pending'
-        ORDER BY br.book_id
+def live_dashboard(session):
+    """Dashboard numbers for the live timer, left alone when they match what this session last showed
+
+    The snapshot comes from the dashboard cache, which the change feed
+    invalidates, so the sessions of one process share one query per
+    DASHBOARD_CACHE_TTL at most.
     """
-    results = execute_query(query)
-    return results if results else []
+    stats = get_dashboard_stats(session)
+    if session['dashboard_stats'] == stats:
+        return (gr.update(),) * len(stats)
+    session['dashboard_stats'] = stats
+    return stats
 
-def approve_request(request_id, custom_due_date=None):
-    """Approve a borrow request with optional custom due date"""
-    if not current_user_session['is_admin']:
-        return "Access Denied: Admin privileges required", None, ""
+def reload_live_tables(session, members, books, available_books, bucket):
+    """Re-read everything on screen, for a session too far behind the change feed to patch"""
+    refreshed = []
+    for view, df in (('members', members), ('books', books), ('available_books', available_books)):
+        key_column = LIVE_VIEWS[view]['key']
+        keys = [str(key) for key in df[key_column].tolist()] if isinstance(df, pd.DataFrame) and key_column in df.columns else []
+        rows = fetch_live_rows(view, keys, session) if keys else None
+        patched = None if rows is None else apply_row_diffs(df, {key: rows.get(key) for key in keys}, key_column)
+        refreshed.append(gr.update() if patched is None else patched)
+    return (*refreshed, get_active_loans(bucket, session))
+
+def live_loan_rows(rows, bucket):
+    """Label loan diffs with their status; loans outside the chosen bucket count as gone"""
+    today = datetime.now().date()
+    labelled = {}
+    for key, row in rows.items():
+        if row is not None and LOAN_BUCKETS.get(bucket) and loan_bucket_name(row['Due Date'], today) != bucket:
+            row = None
+        elif row is not None:
+            row = dict(row, Status=loan_status_label(row['Due Date'], today))
+        labelled[key] = row
+    return labelled
+
+# Write handlers return the table with just the written rows patched in
+def patch_table(view, table, keys, session, shape=None, sort_by=None, keep=None):
+    """A live view's table after a write to `keys`, or None when it has to be reloaded
+
+    Only the written rows are re-read and applied to what is on screen. When the
+    session is behind the change feed other writes are still on their way, so
+    the caller reloads in full instead. keep(key) decides whether a row that
+    isn't on screen yet is added. Returns gr.update() if nothing visible changed.
+    """
+    keys = [str(key) for key in keys]
+    if session['change_version'] != change_feed.position():
+        return None
     
-    if not request_id:
-        return "Please enter a Request ID", None, ""
+    rows = fetch_live_rows(view, keys, session)
+    if rows is None:
+        return None
     
-    # If custom due date is provided, we need to use a modified procedure
-    if custom_due_date:
-        results = call_procedure('ApproveBorrowRequest', (request_id, 'A001'))
-        
-        if results is not None:
-            connection = get_db_connection()
-            if connection:
-                try:
-                    cursor = connection.cursor()
-                    cursor.execute("SELECT transaction_id FROM Transaction WHERE request_id = %s", (request_id,))
-                    result = cursor.fetchone()
-                    
-                    if result:
-                        transaction_id = result[0]
-                        cursor.execute(
-                            "UPDATE Transaction SET due_date = %s WHERE transaction_id = %s",
-                            (custom_due_date, transaction_id)
-                        )
-                        connection.commit()
-                        return f"Approved request: {request_id} with due date: {custom_due_date}", None, ""
-                    else:
-                        return f"Approved request: {request_id} (default 14 days)", None, ""
-                except Error as e:
-                    print(f"Error updating due date: {e}")
-                    return f"Approved request: {request_id} (default 14 days)", None, ""
-                finally:
-                    if connection.is_connected():
-                        cursor.close()
-                        connection.close()
-            else:
-                return f"Approved request: {request_id} (default 14 days)", None, ""
-        else:
-            return f"Error approving request {request_id}", None, ""
-    else:
-        results = call_procedure('ApproveBorrowRequest', (request_id, 'A001'))
-        
-        if results is not None:
-            return f"Approved request: {request_id} (default 14 days)", None, ""
-        else:
-            return f"Error approving request {request_id}", None, ""
+    rows = {key: rows.get(key) for key in keys}
+    if shape:
+        rows = shape(rows)
+    if keep and isinstance(table, pd.DataFrame) and LIVE_VIEWS[view]['key'] in table.columns:
+        on_screen = set(table[LIVE_VIEWS[view]['key']].astype(str))
+        rows = {key: row for key, row in rows.items() if row is None or key in on_screen or keep(key)}
+    patched = apply_row_diffs(table, rows, LIVE_VIEWS[view]['key'], inserts=True,
+                              sort_by=sort_by or LIVE_VIEWS[view]['key'])
+    return gr.update() if patched is None else patched
 
-def deny_request(request_id):
-    """Deny a borrow request"""
-    if not current_user_session['is_admin']:
-        return "Access Denied: Admin privileges required", None
+def patch_page(view, table, keys, page, page_size, session, search_term=None):
+    """One page of a paged table after a write to `keys`, as (table, page, page info)
+
+    New rows are only added when their key sorts within the page shown (or
+    after it, on a page that isn't full). When the page can't be patched,
+    page 1 is reloaded and the pager moves with it. A page of search results
+    is in relevance order and only holds matching rows, so the search is run
+    again instead.
+    """
+    page, page_size = max(int(page or 1), 1), int(page_size)
+    if search_term:
+        return ranked_search(session, view, search_term, page, page_size), gr.update(), gr.update()
     
-    if not request_id:
-        return "Please enter a Request ID", None
+    key_column = LIVE_VIEWS[view]['key']
+    shown = table[key_column].astype(str).tolist() if isinstance(table, pd.DataFrame) and key_column in table.columns else []
     
-    results = call_procedure('DenyBorrowRequest', (request_id,))
+    def keep(key):
+        if not shown:
+            return page == 1
+        return (page == 1 or key > shown[0]) and (key < shown[-1] or len(shown) < page_size)
     
-    if results is not None:
-        return f"Denied request: {request_id}", None
-    else:
-        return f"Error denying request {request_id}", None
+    patched = patch_table(view, table, keys, session, keep=keep)
+    if patched is None:
+        return load_table_page(view, 1, page_size, session)
+    if isinstance(patched, pd.DataFrame) and len(patched) > page_size:
+        # The last row has moved on to the next page
+        patched = patched.head(page_size)
+    return patched, gr.update(), gr.update()
 
-# Active Loans Functions
-def get_active_loans():
-    """Get all active loans with status"""
-    query = """
-        SELECT 
-            t.transaction_id as 'Transaction ID',
-            b.title as 'Book',
-            b.book_id as 'Book ID',
-            m.name as 'Member',
-            m.member_id as 'Member ID',
-            t.borrow_date as 'Borrow Date',
-            t.due_date as 'Due Date',
-            CASE 
-                WHEN t.due_date < CURDATE() THEN CONCAT('Overdue (', DATEDIFF(CURDATE(), t.due_date), ' days)')
-                WHEN DATEDIFF(t.due_date, CURDATE()) <= 2 THEN CONCAT('Due in ', DATEDIFF(t.due_date, CURDATE()), ' days')
-                ELSE 'Active'
-            END as 'Status'
-        FROM Transaction t
-        JOIN BorrowRequest br ON t.request_id = br.request_id
-        JOIN Book b ON br.book_id = b.book_id
-        JOIN Member m ON br.member_id_requester = m.member_id
-        WHERE t.return_date IS NULL
-        ORDER BY t.due_date ASC
-    """
-    results = execute_query(query)
-    if results:
-        df = pd.DataFrame(results)
-        return df
-    return pd.DataFrame(columns=['Transaction ID', 'Book', 'Book ID', 'Member', 'Member ID', 'Borrow Date', 'Due Date', 'Status'])
+def patch_loans(loans, transaction_ids, bucket, session):
+    """Active loans table after returns or approvals touching these loans"""
+    patched = patch_table('loans', loans, transaction_ids, session,
+                          shape=lambda rows: live_loan_rows(rows, bucket), sort_by='Due Date')
+    return get_active_loans(bucket, session) if patched is None else patched
 
-def process_return(transaction_id):
-    """Process a book return"""
-    if not current_user_session['is_admin']:
-        return "Access Denied: Admin privileges required", get_active_loans()
+def drop_queue_rows(queue, request_ids):
+    """Priority queue table without requests that were just approved or denied"""
+    patched = apply_row_diffs(queue, {str(request_id): None for request_id in request_ids}, "Request ID")
+    if patched is None:
+        return gr.update()
+    patched["Priority"] = range(1, len(patched) + 1)
+    return patched
+
+# Table Paging Controls
+def create_pager():
+    """Previous/Next buttons, page-size picker and page summary under a table"""
+    with gr.Row():
+        prev_btn = gr.Button("◀ Previous", size="sm")
+        page = gr.Number(label="Page", value=1, precision=0, minimum=1, interactive=False)
+        page_size = gr.Dropdown(label="Rows per page", choices=PAGE_SIZE_CHOICES, value=TABLE_PAGE_SIZE)
+        next_btn = gr.Button("Next ▶", size="sm")
+    page_info = gr.Markdown()
+    return prev_btn, page, page_size, next_btn, page_info
+
+async def show_table_page(table_key, search_fn, search_term, page, page_size, session, debounce=0):
+    """Render one page of a table, or of its search results (search_fn is async) when a term is given"""
+    page = max(int(page or 1), 1)
+    page_size = int(page_size)
     
-    if not transaction_id:
-        return "Please enter a Transaction ID", get_active_loans()
+    if search_term and search_fn:
+        results = await run_latest_search(session, table_key, search_fn, search_term, page, page_size, session, debounce=debounce)
+        if results is None:
+            return gr.update(), gr.update(), gr.update()
+        if results.empty and page > 1:
+            # Ran past the last page of matches, stay where we were
+            return gr.update(), page - 1, gr.update()
+        return results, page, f"Page {page} · matches for “{search_term}”"
     
-    query = """
-        UPDATE Transaction
-        SET return_date = CURDATE()
-        WHERE transaction_id = %s AND return_date IS NULL
-    """
-    result = execute_query(query, (transaction_id,), fetch=False)
+    # Keyset paging stays on the sync pool, off the event loop
+    results = await run_latest_search(
+        session, table_key, asyncio.to_thread, load_table_page, table_key, page, page_size, session, debounce=debounce
+    )
+    if results is None:
+        return gr.update(), gr.update(), gr.update()
+    return results
+
+def wire_pager(table_key, table, pager, session_state, search_box=None, search_fn=None):
+    """Hook a table's pager (and optional search box) up to show_table_page"""
+    prev_btn, page, page_size, next_btn, page_info = pager
+    outputs = [table, page, page_info]
+    has_search = search_box is not None
+    if not has_search:
+        search_box = gr.State(None)
     
-    if result:
-        return f"Processed return for transaction: {transaction_id}", get_active_loans()
-    else:
-        return f"Transaction ID not found or already returned", get_active_loans()
-
-# Login Interface
-def create_login_interface():
-    with gr.Blocks(title="Library Management System - Login", theme=gr.themes.Soft(primary_hue="violet")) as login_demo:
-        gr.Markdown("# 📚 Library Management System")
-        gr.Markdown("## Login")
-        gr.Markdown("Please enter your MySQL credentials to access the system")
-        
-        with gr.Row():
-            with gr.Column(scale=1):
-                pass
-            with gr.Column(scale=2):
-                username_input = gr.Textbox(label="Username", placeholder="e.g., library_admin or library_user")
-                password_input = gr.Textbox(label="Password", type="password", placeholder="Enter your password")
-                login_btn = gr.Button("Login", variant="primary", size="lg")
-                login_status = gr.Textbox(label="Status", interactive=False)
-                
-                gr.Markdown("---")
-                gr.Markdown("### Demo Credentials:")
-                gr.Markdown("**Admin Access:** `library_admin` / `library123`")
-                gr.Markdown("**Read-Only Access:** `library_user` / `library123`")
-            with gr.Column(scale=1):
-                pass
-        
-        def handle_login(username, password):
-            if not username or not password:
-                return "Please enter both username and password", gr.Tabs(selected=0)
-            
-            success, is_admin = authenticate_user(username, password)
-            
-            if success:
-                access_level = "Administrator" if is_admin else "Read-Only User"
-                return f"✓ Login successful! Welcome, {username} ({access_level})", gr.Tabs(selected=1)
-            else:
-                return "✗ Login failed. Invalid credentials.", gr.Tabs(selected=0)
-        
-        login_btn.click(
-            handle_login,
-            inputs=[username_input, password_input],
-            outputs=[login_status]
-        )
+    async def first_page(search_term, size, session):
+        return await show_table_page(table_key, search_fn, search_term, 1, size, session)
     
-    return login_demo
-
-# Main Application Interface
-def create_main_interface():
-    with gr.Blocks(title="Library Management System", theme=gr.themes.Soft(primary_hue="violet")) as main_demo:
-        # Header with user info and logout
-        with gr.Row():
-            gr.Markdown("# 📚 Library Management System")
-        
-        with gr.Row():
-            user_info = gr.Markdown(f"**Logged in as:** {current_user_session['username']} | **Access Level:** {'Admin' if current_user_session['is_admin'] else 'Read-Only'}")
-            logout_btn = gr.Button("Logout", variant="stop", size="sm", scale=0)
-        
-        with gr.Tabs() as tabs:
-            # Dashboard Tab
-            with gr.Tab("Dashboard"):
-                gr.Markdown("## Dashboard")
-                gr.Markdown("Overview of your library management system")
-                
-                with gr.Row():
-                    total_members_display = gr.Number(label="Total Members", interactive=False)
-                    total_books_display = gr.Number(label="Total Books", interactive=False)
-                    active_loans_display = gr.Number(label="Active Loans", interactive=False)
-                    pending_requests_display = gr.Number(label="Pending Requests", interactive=False)
-                
-                refresh_dashboard_btn = gr.Button("Refresh Dashboard", variant="primary")
-                
-                def refresh_dashboard():
-                    stats = get_dashboard_stats()
-                    return stats[0], stats[1], stats[2], stats[3]
-                
-                refresh_dashboard_btn.click(
-                    refresh_dashboard,
-                    outputs=[total_members_display, total_books_display, active_loans_display, pending_requests_display]
-                )
-                
-                gr.Markdown("### Quick Actions")
-                gr.Markdown("Use the tabs above to manage members, books, process borrow requests, and handle returns.")
-                
-                # Load initial stats
-                main_demo.load(refresh_dashboard, outputs=[total_members_display, total_books_display, active_loans_display, pending_requests_display])
-            
-            # Members Tab
-            with gr.Tab("Members"):
-                gr.Markdown("## Member Management")
-                gr.Markdown("Manage library members and their information")
-                
-                with gr.Row():
-                    member_search = gr.Textbox(label="Search members by name, email, or ID...", scale=4)
-                    refresh_members_btn = gr.Button("Refresh", scale=1)
-                
-                members_table = gr.Dataframe(
-                    label="Members List", 
-                    interactive=False,
-                    wrap=True,
-                    column_widths=["15%", "20%", "25%", "15%", "15%", "10%"]
-                )
-                
-                if current_user_session['is_admin']:
-                    with gr.Accordion("Add New Member", open=False):
-                        with gr.Row():
-                            new_member_id = gr.Textbox(label="Member ID (e.g., M013)")
-                            new_member_name = gr.Textbox(label="Name")
-                        with gr.Row():
-                            new_member_email = gr.Textbox(label="Email")
-                            new_member_phone = gr.Textbox(label="Phone")
-                        submit_member = gr.Button("Add Member", variant="primary")
-                        member_status = gr.Textbox(label="Status", interactive=False)
-                    
-                    with gr.Accordion("Delete Member", open=False):
-                        gr.Markdown("**Warning:** Deleting a member will also delete all related records (requests, transactions, etc.)")
-                        delete_member_id = gr.Textbox(label="Member ID to Delete", placeholder="e.g., M013")
-                        delete_member_btn = gr.Button("Delete Member", variant="stop")
-                        delete_member_status = gr.Textbox(label="Status", interactive=False)
-                    
-                    submit_member.click(
-                        add_member, 
-                        inputs=[new_member_id, new_member_name, new_member_email, new_member_phone], 
-                        outputs=[member_status, members_table, new_member_id, new_member_name, new_member_email, new_member_phone]
-                    )
-                    delete_member_btn.click(
-                        delete_member,
-                        inputs=[delete_member_id],
-                        outputs=[delete_member_status, members_table]
-                    )
-                else:
-                    gr.Markdown("**Note:** You have read-only access. Contact an administrator to add or delete members.")
-                
-                # Load initial data
-                main_demo.load(lambda: get_all_members(), outputs=members_table)
-                
-                member_search.change(search_members, inputs=[member_search], outputs=[members_table])
-                refresh_members_btn.click(lambda: get_all_members(), outputs=[members_table])
-            
-            # Books Tab
-            with gr.Tab("Books"):
-                gr.Markdown("## Book Catalog")
-                gr.Markdown("Manage your library's book collection")
-                
-                with gr.Row():
-                    book_search = gr.Textbox(label="Search books by title, author, or ID...", scale=4)
-                    refresh_books_btn = gr.Button("Refresh", scale=1)
-                
-                books_table = gr.Dataframe(
-                    label="Book Collection", 
-                    interactive=False,
-                    wrap=True,
-                    column_widths=["12%", "28%", "20%", "12%", "13%", "15%"]
-                )
-                
-                if current_user_session['is_admin']:
-                    with gr.Accordion("Add New Book", open=False):
-                        with gr.Row():
-                            new_book_id = gr.Textbox(label="Book ID (e.g., B017)")
-                            new_book_title = gr.Textbox(label="Title")
-                        with gr.Row():
-                            new_book_author = gr.Textbox(label="Author")
-                            new_book_edition = gr.Textbox(label="Edition", value="First")
-                        new_book_condition = gr.Dropdown(label="Condition", choices=["Excellent", "Good", "Fair", "Poor"], value="Good")
-                        submit_book = gr.Button("Add Book", variant="primary")
-                        book_status = gr.Textbox(label="Status", interactive=False)
-                    
-                    with gr.Accordion("Update Book Status", open=False):
-                        gr.Markdown("**Change a book's availability status**")
-                        with gr.Row():
-                            update_book_id = gr.Textbox(label="Book ID", placeholder="e.g., B001")
-                            update_book_status_dropdown = gr.Dropdown(
-                                label="New Status", 
-                                choices=["Available", "Lent", "Reserved", "Maintenance"],
-                                value="Available"
-                            )
-                        update_status_btn = gr.Button("Update Status", variant="secondary")
-                        update_status_message = gr.Textbox(label="Status", interactive=False)
-                    
-                    with gr.Accordion("Delete Book", open=False):
-                        gr.Markdown("**Warning:** Deleting a book will also delete all related records (requests, transactions, etc.)")
-                        delete_book_id = gr.Textbox(label="Book ID to Delete", placeholder="e.g., B017")
-                        delete_book_btn = gr.Button("Delete Book", variant="stop")
-                        delete_book_status = gr.Textbox(label="Status", interactive=False)
-                    
-                    submit_book.click(
-                        add_book, 
-                        inputs=[new_book_id, new_book_title, new_book_author, new_book_edition, new_book_condition], 
-                        outputs=[book_status, books_table, new_book_id, new_book_title, new_book_author, new_book_edition, new_book_condition]
-                    )
-                    update_status_btn.click(update_book_status, inputs=[update_book_id, update_book_status_dropdown], outputs=[update_status_message, books_table])
-                    delete_book_btn.click(
-                        delete_book,
-                        inputs=[delete_book_id],
-                        outputs=[delete_book_status, books_table]
-                    )
-                else:
-                    gr.Markdown("**Note:** You have read-only access. Contact an administrator to add, update, or delete books.")
-                
-                # Load initial data
-                main_demo.load(lambda: get_all_books(), outputs=books_table)
-                
-                book_search.change(search_books, inputs=[book_search], outputs=[books_table])
-                refresh_books_btn.click(lambda: get_all_books(), outputs=[books_table])
-            
-            # Request Book Tab (Member Side)
-            with gr.Tab("Request Book"):
-                gr.Markdown("## Request a Book")
-                gr.Markdown("Members can request to borrow available books")
-                
-                with gr.Row():
-                    gr.Markdown("### Step 1: View Available Books")
-                
-                refresh_available_books = gr.Button("Refresh Available Books")
-                available_books_table = gr.Dataframe(label="Available Books", interactive=False)
-                
-                with gr.Row():
-                    gr.Markdown("### Step 2: Create Borrow Request")
-                
-                with gr.Row():
-                    req_member_id = gr.Textbox(label="Your Member ID (Requester)", placeholder="e.g., M001")
-                    req_owner_id = gr.Textbox(label="Owner Member ID", placeholder="e.g., M002", value="M001")
-                
-                req_book_id = gr.Textbox(label="Book ID to Request", placeholder="e.g., B001")
-                
-                gr.Markdown("**Note:** Owner ID is typically an admin/staff member ID (default: M001)")
-                
-                create_request_btn = gr.Button("Submit Request", variant="primary")
-                request_create_status = gr.Textbox(label="Status", interactive=False)
-                
-                with gr.Row():
-                    gr.Markdown("### Step 3: View Your Requests")
-                
-                view_requests_member_id = gr.Textbox(label="Enter Your Member ID", placeholder="e.g., M001")
-                view_requests_btn = gr.Button("View My Requests")
-                member_requests_table = gr.Dataframe(label="Your Borrow Requests", interactive=False)
-                
-                # Event handlers
-                refresh_available_books.click(lambda: get_available_books_for_request(), outputs=[available_books_table])
-                create_request_btn.click(
-                    create_borrow_request, 
-                    inputs=[req_member_id, req_owner_id, req_book_id], 
-                    outputs=[request_create_status, member_requests_table, req_member_id, req_owner_id, req_book_id]
-                )
-                view_requests_btn.click(
-                    get_member_requests,
-                    inputs=[view_requests_member_id],
-                    outputs=[member_requests_table]
-                )
-                
-                # Load initial data
-                main_demo.load(lambda: get_available_books_for_request(), outputs=[available_books_table])
-            
-            # Borrow Requests Tab (Admin Only)
-            if current_user_session['is_admin']:
-                with gr.Tab("Borrow Requests"):
-                    gr.Markdown("## Borrow Requests")
-                    gr.Markdown("Review and process pending borrow requests (prioritized by strikes and seniority)")
-                    
-                    book_selector = gr.Dropdown(label="Select Book to View Requests", choices=[], interactive=True)
-                    refresh_requests_btn = gr.Button("Refresh Book List", variant="secondary")
-                    
-                    def load_books_with_requests():
-                        pending = get_all_pending_requests()
-                        if pending:
-                            choices = [f"{book['title']} by {book['author']} ({book['book_id']}) - {book['pending_count']} pending" for book in pending]
-                            return gr.Dropdown(choices=choices)
-                        return gr.Dropdown(choices=[])
-                    
-                    requests_table = gr.Dataframe(
-                        label="Priority Queue", 
-                        interactive=False,
-                        wrap=True,
-                        column_widths=["10%", "15%", "25%", "10%", "20%", "20%"]
-                    )
-                    
-                    gr.Markdown("### Approve or Deny Request")
-                    
-                    with gr.Row():
-                        request_id_input = gr.Textbox(label="Request ID (e.g., BR007)", scale=2)
-                        due_date_input = gr.Textbox(
-                            label="Custom Due Date (Optional - YYYY-MM-DD)", 
-                            placeholder="e.g., 2025-11-15 or leave empty for 14 days",
-                            scale=2
-                        )
-                    
-                    gr.Markdown("**Tip:** Leave due date empty to use default 14-day loan period")
-                    
-                    with gr.Row():
-                        approve_btn = gr.Button("Approve", variant="primary")
-                        deny_btn = gr.Button("Deny", variant="stop")
-                    
-                    request_status = gr.Textbox(label="Status", interactive=False)
-                    
-                    def show_requests(book_selection):
-                        if not book_selection:
-                            return pd.DataFrame()
-                        # Extract book_id from selection
-                        book_id = book_selection.split('(')[1].split(')')[0]
-                        return get_prioritized_requests(book_id)
-                    
-                    refresh_requests_btn.click(load_books_with_requests, outputs=[book_selector])
-                    book_selector.change(show_requests, inputs=[book_selector], outputs=[requests_table])
-                    
-                    approve_btn.click(approve_request, inputs=[request_id_input, due_date_input], outputs=[request_status, requests_table, due_date_input])
-                    deny_btn.click(deny_request, inputs=[request_id_input], outputs=[request_status, requests_table])
-                    
-                    # Load initial data
-                    main_demo.load(load_books_with_requests, outputs=[book_selector])
-            
-            # Active Loans Tab
-            with gr.Tab("Active Loans"):
-                gr.Markdown("## Active Loans")
-                gr.Markdown("View and manage active transactions")
-                
-                if not current_user_session['is_admin']:
-                    gr.Markdown("**Note:** You have read-only access. Contact an administrator to process returns.")
-                else:
-                    gr.Markdown("Late returns will automatically issue strikes to members")
-                
-                refresh_loans_btn = gr.Button("Refresh Active Loans")
-                loans_table = gr.Dataframe(
-                    label="Current Loans", 
-                    interactive=False,
-                    wrap=True,
-                    column_widths=["10%", "20%", "10%", "15%", "10%", "12%", "12%", "11%"]
-                )
-                
-                if current_user_session['is_admin']:
-                    with gr.Row():
-                        transaction_id_input = gr.Textbox(label="Transaction ID (e.g., T001)")
-                        process_return_btn = gr.Button("Process Return", variant="primary")
-                    
-                    return_status = gr.Textbox(label="Status", interactive=False)
-                    
-                    process_return_btn.click(process_return, inputs=[transaction_id_input], outputs=[return_status, loans_table])
-                
-                refresh_loans_btn.click(lambda: get_active_loans(), outputs=[loans_table])
-                
-                # Load initial data
-                main_demo.load(lambda: get_active_loans(), outputs=[loans_table])
-            
-            # Strikes Tab
-            with gr.Tab("Strikes"):
-                gr.Markdown("## Strike History")
-                gr.Markdown("View all issued strikes and their reasons")
-                
-                refresh_strikes_btn = gr.Button("Refresh Strikes")
-                strikes_table = gr.Dataframe(label="All Strikes", interactive=False)
-                
-                gr.Markdown("### Strike Information")
-                gr.Markdown("""
-                - Strikes are automatically issued when books are returned late
-                - Members with more strikes have lower priority in borrow request queues
-                - Strike count is tracked in the Members tab
-                """)
-                
-                refresh_strikes_btn.click(lambda: get_all_strikes(), outputs=[strikes_table])
-                
-                # Load initial data
-                main_demo.load(lambda: get_all_strikes(), outputs=[strikes_table])
-        
-        def handle_logout():
-            current_user_session['username'] = None
-            current_user_session['password'] = None
-            current_user_session['is_admin'] = False
-            current_user_session['is_authenticated'] = False
-            return None
-        
-        logout_btn.click(handle_logout, outputs=None)
+    async def previous_page(search_term, page_no, size, session):
+        return await show_table_page(table_key, search_fn, search_term, page_no - 1, size, session)
+    
+    async def next_page(search_term, page_no, size, session):
+        return await show_table_page(table_key, search_fn, search_term, page_no + 1, size, session)
     
-    return main_demo
+    async def search_first_page(search_term, size, session):
+        return await show_table_page(table_key, search_fn, search_term, 1, size, session, debounce=SEARCH_DEBOUNCE_SECONDS)
+    
+    first_inputs = [search_box, page_size, session_state]
+    page_inputs = [search_box, page, page_size, session_state]
+    if has_search:
+        # Each keystroke starts straight away and cancels the search it supersedes
+        search_box.change(search_first_page, inputs=first_inputs, outputs=outputs, trigger_mode="multiple")
+    page_size.change(first_page, inputs=first_inputs, outputs=outputs)
+    prev_btn.click(previous_page, inputs=page_inputs, outputs=outputs)
+    next_btn.click(next_page, inputs=page_inputs, outputs=outputs)
+    return first_page, first_inputs, outputs
 
 # Combined Application with Login and Main Interface
-with gr.Blocks(title="Library Management System", theme=gr.themes.Soft(primary_hue="violet")) as demo:
+with gr.Blocks(title="Library Management System", theme=gr.themes.Soft(primary_hue="violet"),
+               delete_cache=(EXPORT_FILE_TTL, EXPORT_FILE_TTL)) as demo:
+    session_state = gr.State(new_session())
+    
     with gr.Tabs() as main_tabs:
         with gr.Tab("Login", id=0):
             gr.Markdown("# 📚 Library Management System")
@@ -914,15 +2772,20 @@ with gr.Blocks(title="Library Management System", theme=gr.themes.Soft(primary_h
                         active_loans_display = gr.Number(label="Active Loans", interactive=False)
                         pending_requests_display = gr.Number(label="Pending Requests", interactive=False)
                     
+                    with gr.Row():
+                        overdue_loans_display = gr.Number(label="Overdue Loans", interactive=False)
+                        due_soon_loans_display = gr.Number(label=f"Due Within {DUE_SOON_DAYS} Days", interactive=False)
+                    
                     refresh_dashboard_btn = gr.Button("Refresh Dashboard", variant="primary")
                     
-                    def refresh_dashboard():
-                        stats = get_dashboard_stats()
-                        return stats[0], stats[1], stats[2], stats[3]
+                    async def refresh_dashboard(session):
+                        return await get_dashboard_stats_async(session)
                     
                     refresh_dashboard_btn.click(
                         refresh_dashboard,
-                        outputs=[total_members_display, total_books_display, active_loans_display, pending_requests_display]
+                        inputs=[session_state],
+                        outputs=[total_members_display, total_books_display, active_loans_display, pending_requests_display,
+                                 overdue_loans_display, due_soon_loans_display]
                     )
                     
                     gr.Markdown("### Quick Actions")
@@ -944,6 +2807,10 @@ with gr.Blocks(title="Library Management System", theme=gr.themes.Soft(primary_h
                         column_widths=["15%", "20%", "25%", "15%", "15%", "10%"]
                     )
                     
+                    members_pager = create_pager()
+                    export_members_btn = gr.Button("Export CSV", size="sm")
+                    members_export_file = gr.File(label="Members Export", visible=False)
+                    
                     admin_member_accordion = gr.Accordion("Add New Member (Admin Only)", open=False, visible=False)
                     with admin_member_accordion:
                         with gr.Row():
@@ -966,17 +2833,24 @@ with gr.Blocks(title="Library Management System", theme=gr.themes.Soft(primary_h
                     
                     submit_member.click(
                         add_member, 
-                        inputs=[new_member_id, new_member_name, new_member_email, new_member_phone], 
-                        outputs=[member_status, members_table, new_member_id, new_member_name, new_member_email, new_member_phone]
+                        inputs=[new_member_id, new_member_name, new_member_email, new_member_phone, members_table, members_pager[1], members_pager[2], member_search, session_state], 
+                        outputs=[member_status, members_table, members_pager[1], members_pager[4], new_member_id, new_member_name, new_member_email, new_member_phone]
                     )
                     delete_member_btn.click(
                         delete_member,
-                        inputs=[delete_member_id],
-                        outputs=[delete_member_status, members_table]
+                        inputs=[delete_member_id, members_table, members_pager[1], members_pager[2], member_search, session_state],
+                        outputs=[delete_member_status, members_table, members_pager[1], members_pager[4]]
                     )
                     
-                    member_search.change(search_members, inputs=[member_search], outputs=[members_table])
-                    refresh_members_btn.click(lambda: get_all_members(), outputs=[members_table])
+                    show_first_members_page, members_page_inputs, members_page_outputs = wire_pager(
+                        'members', members_table, members_pager, session_state, member_search, search_members_async
+                    )
+                    export_members_btn.click(
+                        lambda session: gr.update(value=export_table_csv('members', session), visible=True),
+                        inputs=[session_state],
+                        outputs=[members_export_file]
+                    )
+                    refresh_members_btn.click(show_first_members_page, inputs=members_page_inputs, outputs=members_page_outputs)
                 
                 # Books Tab
                 with gr.Tab("Books"):
@@ -994,6 +2868,10 @@ with gr.Blocks(title="Library Management System", theme=gr.themes.Soft(primary_h
                         column_widths=["12%", "28%", "20%", "12%", "13%", "15%"]
                     )
                     
+                    books_pager = create_pager()
+                    export_books_btn = gr.Button("Export CSV", size="sm")
+                    books_export_file = gr.File(label="Books Export", visible=False)
+                    
                     add_book_accordion = gr.Accordion("Add New Book (Admin Only)", open=False, visible=False)
                     with add_book_accordion:
                         with gr.Row():
@@ -1002,7 +2880,7 @@ with gr.Blocks(title="Library Management System", theme=gr.themes.Soft(primary_h
                         with gr.Row():
                             new_book_author = gr.Textbox(label="Author")
                             new_book_edition = gr.Textbox(label="Edition", value="First")
-                        new_book_condition = gr.Dropdown(label="Condition", choices=["Excellent", "Good", "Fair", "Poor"], value="Good")
+                        new_book_condition = gr.Dropdown(label="Condition", choices=BOOK_CONDITIONS, value="Good")
                         submit_book = gr.Button("Add Book", variant="primary")
                         book_status = gr.Textbox(label="Status", interactive=False)
                     
@@ -1013,7 +2891,7 @@ with gr.Blocks(title="Library Management System", theme=gr.themes.Soft(primary_h
                             update_book_id = gr.Textbox(label="Book ID", placeholder="e.g., B001")
                             update_book_status_dropdown = gr.Dropdown(
                                 label="New Status", 
-                                choices=["Available", "Lent", "Reserved", "Maintenance"],
+                                choices=BOOK_STATUSES,
                                 value="Available"
                             )
                         update_status_btn = gr.Button("Update Status", variant="secondary")
@@ -1030,18 +2908,29 @@ with gr.Blocks(title="Library Management System", theme=gr.themes.Soft(primary_h
                     
                     submit_book.click(
                         add_book, 
-                        inputs=[new_book_id, new_book_title, new_book_author, new_book_edition, new_book_condition], 
-                        outputs=[book_status, books_table, new_book_id, new_book_title, new_book_author, new_book_edition, new_book_condition]
+                        inputs=[new_book_id, new_book_title, new_book_author, new_book_edition, new_book_condition, books_table, books_pager[1], books_pager[2], book_search, session_state], 
+                        outputs=[book_status, books_table, books_pager[1], books_pager[4], new_book_id, new_book_title, new_book_author, new_book_edition, new_book_condition]
+                    )
+                    update_status_btn.click(
+                        update_book_status,
+                        inputs=[update_book_id, update_book_status_dropdown, books_table, books_pager[1], books_pager[2], book_search, session_state],
+                        outputs=[update_status_message, books_table, books_pager[1], books_pager[4]]
                     )
-                    update_status_btn.click(update_book_status, inputs=[update_book_id, update_book_status_dropdown], outputs=[update_status_message, books_table])
                     delete_book_btn.click(
                         delete_book,
-                        inputs=[delete_book_id],
-                        outputs=[delete_book_status, books_table]
+                        inputs=[delete_book_id, books_table, books_pager[1], books_pager[2], book_search, session_state],
+                        outputs=[delete_book_status, books_table, books_pager[1], books_pager[4]]
                     )
                     
-                    book_search.change(search_books, inputs=[book_search], outputs=[books_table])
-                    refresh_books_btn.click(lambda: get_all_books(), outputs=[books_table])
+                    show_first_books_page, books_page_inputs, books_page_outputs = wire_pager(
+                        'books', books_table, books_pager, session_state, book_search, search_books_async
+                    )
+                    export_books_btn.click(
+                        lambda session: gr.update(value=export_table_csv('books', session), visible=True),
+                        inputs=[session_state],
+                        outputs=[books_export_file]
+                    )
+                    refresh_books_btn.click(show_first_books_page, inputs=books_page_inputs, outputs=books_page_outputs)
                 
                 # Request Book Tab
                 with gr.Tab("Request Book"):
@@ -1053,6 +2942,7 @@ with gr.Blocks(title="Library Management System", theme=gr.themes.Soft(primary_h
                     
                     refresh_available_books = gr.Button("Refresh Available Books")
                     available_books_table = gr.Dataframe(label="Available Books", interactive=False)
+                    available_books_pager = create_pager()
                     
                     with gr.Row():
                         gr.Markdown("### Step 2: Create Borrow Request")
@@ -1075,15 +2965,18 @@ with gr.Blocks(title="Library Management System", theme=gr.themes.Soft(primary_h
                     view_requests_btn = gr.Button("View My Requests")
                     member_requests_table = gr.Dataframe(label="Your Borrow Requests", interactive=False)
                     
-                    refresh_available_books.click(lambda: get_available_books_for_request(), outputs=[available_books_table])
+                    show_first_available_page, available_page_inputs, available_page_outputs = wire_pager(
+                        'available_books', available_books_table, available_books_pager, session_state
+                    )
+                    refresh_available_books.click(show_first_available_page, inputs=available_page_inputs, outputs=available_page_outputs)
                     create_request_btn.click(
                         create_borrow_request, 
-                        inputs=[req_member_id, req_owner_id, req_book_id], 
+                        inputs=[req_member_id, req_owner_id, req_book_id, session_state], 
                         outputs=[request_create_status, member_requests_table, req_member_id, req_owner_id, req_book_id]
                     )
                     view_requests_btn.click(
                         get_member_requests,
-                        inputs=[view_requests_member_id],
+                        inputs=[view_requests_member_id, session_state],
                         outputs=[member_requests_table]
                     )
                 
@@ -1095,12 +2988,8 @@ with gr.Blocks(title="Library Management System", theme=gr.themes.Soft(primary_h
                     book_selector = gr.Dropdown(label="Select Book to View Requests", choices=[], interactive=True)
                     refresh_requests_btn = gr.Button("Refresh Book List", variant="secondary")
                     
-                    def load_books_with_requests():
-                        pending = get_all_pending_requests()
-                        if pending:
-                            choices = [f"{book['title']} by {book['author']} ({book['book_id']}) - {book['pending_count']} pending" for book in pending]
-                            return gr.Dropdown(choices=choices)
-                        return gr.Dropdown(choices=[])
+                    def load_books_with_requests(session):
+                        return gr.Dropdown(choices=pending_book_choices(get_all_pending_requests(session)))
                     
                     requests_table = gr.Dataframe(
                         label="Priority Queue", 
@@ -1127,17 +3016,37 @@ with gr.Blocks(title="Library Management System", theme=gr.themes.Soft(primary_h
                     
                     request_status = gr.Textbox(label="Status", interactive=False)
                     
-                    def show_requests(book_selection):
-                        if not book_selection:
-                            return pd.DataFrame()
-                        book_id = book_selection.split('(')[1].split(')')[0]
-                        return get_prioritized_requests(book_id)
-                    
-                    refresh_requests_btn.click(load_books_with_requests, outputs=[book_selector])
-                    book_selector.change(show_requests, inputs=[book_selector], outputs=[requests_table])
-                    
-                    approve_btn.click(approve_request, inputs=[request_id_input, due_date_input], outputs=[request_status, requests_table, due_date_input])
-                    deny_btn.click(deny_request, inputs=[request_id_input], outputs=[request_status, requests_table])
+                    with gr.Accordion("Batch Approve / Deny", open=False):
+                        gr.Markdown("Tick requests from the priority queue and process them together in one transaction (the custom due date above applies to all approvals). Only the first ticked request can be approved while the book is free; the others stay pending as 'Book not available'")
+                        batch_request_ids = gr.CheckboxGroup(label="Requests in Queue", choices=[])
+                        with gr.Row():
+                            batch_approve_btn = gr.Button("Approve Selected", variant="primary")
+                            batch_deny_btn = gr.Button("Deny Selected", variant="stop")
+                        batch_status = gr.Textbox(label="Status", interactive=False)
+                        batch_results_table = gr.Dataframe(label="Batch Results", interactive=False)
+                    
+                    async def show_requests(book_id, session):
+                        if not book_id:
+                            return pd.DataFrame(), gr.update(choices=[], value=[])
+                        queue = await get_prioritized_requests_async(book_id, session)
+                        return queue, gr.update(choices=list(queue["Request ID"]), value=[])
+                    
+                    refresh_requests_btn.click(load_books_with_requests, inputs=[session_state], outputs=[book_selector])
+                    book_selector.change(show_requests, inputs=[book_selector, session_state], outputs=[requests_table, batch_request_ids])
+                    
+                    batch_approve_btn.click(
+                        approve_requests_batch,
+                        inputs=[batch_request_ids, due_date_input, session_state],
+                        outputs=[batch_status, batch_results_table]
+                    ).then(show_requests, inputs=[book_selector, session_state], outputs=[requests_table, batch_request_ids])
+                    batch_deny_btn.click(
+                        deny_requests_batch,
+                        inputs=[batch_request_ids, session_state],
+                        outputs=[batch_status, batch_results_table]
+                    ).then(show_requests, inputs=[book_selector, session_state], outputs=[requests_table, batch_request_ids])
+                    
+                    approve_btn.click(approve_request_async, inputs=[request_id_input, due_date_input, requests_table, session_state], outputs=[request_status, requests_table, due_date_input])
+                    deny_btn.click(deny_request_async, inputs=[request_id_input, requests_table, session_state], outputs=[request_status, requests_table])
                 
                 # Active Loans Tab
                 with gr.Tab("Active Loans"):
@@ -1147,7 +3056,9 @@ with gr.Blocks(title="Library Management System", theme=gr.themes.Soft(primary_h
                     admin_note_loans = gr.Markdown("Late returns will automatically issue strikes to members", visible=False)
                     readonly_note_loans = gr.Markdown("**Note:** You have read-only access. Contact an administrator to process returns.", visible=False)
                     
-                    refresh_loans_btn = gr.Button("Refresh Active Loans")
+                    with gr.Row():
+                        loan_bucket_filter = gr.Radio(list(LOAN_BUCKETS), value='All', label="Show", scale=3)
+                        refresh_loans_btn = gr.Button("Refresh Active Loans", scale=1)
                     loans_table = gr.Dataframe(
                         label="Current Loans", 
                         interactive=False,
@@ -1155,40 +3066,92 @@ with gr.Blocks(title="Library Management System", theme=gr.themes.Soft(primary_h
                         column_widths=["10%", "20%", "10%", "15%", "10%", "12%", "12%", "11%"]
                     )
                     
-                    return_section = gr.Row(visible=False)
+                    return_section = gr.Column(visible=False)
                     with return_section:
-                        transaction_id_input = gr.Textbox(label="Transaction ID (e.g., T001)")
-                        process_return_btn = gr.Button("Process Return", variant="primary")
+                        with gr.Row():
+                            transaction_id_input = gr.Textbox(label="Transaction ID (e.g., T001)")
+                            process_return_btn = gr.Button("Process Return", variant="primary")
+                        
+                        with gr.Accordion("Batch Returns", open=False):
+                            gr.Markdown("Return a drop-box load in one transaction: list the Transaction IDs and/or upload the scanner's barcode file (one ID per line)")
+                            with gr.Row():
+                                batch_return_ids = gr.Textbox(label="Transaction IDs", placeholder="T001, T002, ...", lines=3, scale=2)
+                                barcode_file_input = gr.File(label="Barcode File", file_types=[".txt", ".csv"], scale=1)
+                            batch_return_btn = gr.Button("Process Returns", variant="primary")
+                            batch_return_status = gr.Textbox(label="Status", interactive=False)
+                            batch_return_table = gr.Dataframe(label="Return Results", interactive=False)
                     
                     return_status = gr.Textbox(label="Status", interactive=False, visible=False)
                     
-                    process_return_btn.click(process_return, inputs=[transaction_id_input], outputs=[return_status, loans_table])
-                    refresh_loans_btn.click(lambda: get_active_loans(), outputs=[loans_table])
+                    process_return_btn.click(process_return, inputs=[transaction_id_input, loan_bucket_filter, loans_table, session_state], outputs=[return_status, loans_table])
+                    batch_return_btn.click(
+                        process_returns_batch,
+                        inputs=[batch_return_ids, barcode_file_input, loan_bucket_filter, loans_table, session_state],
+                        outputs=[batch_return_status, batch_return_table, loans_table]
+                    )
+                    refresh_loans_btn.click(get_active_loans_async, inputs=[loan_bucket_filter, session_state], outputs=[loans_table])
+                    loan_bucket_filter.change(get_active_loans_async, inputs=[loan_bucket_filter, session_state], outputs=[loans_table])
                 
                 # Strikes Tab
                 with gr.Tab("Strikes"):
                     gr.Markdown("## Strike History")
                     gr.Markdown("View all issued strikes and their reasons")
                     
-                    refresh_strikes_btn = gr.Button("Refresh Strikes")
+                    with gr.Row():
+                        strike_member_filter = gr.Textbox(label="Filter by Member ID (e.g., M005)", scale=4)
+                        refresh_strikes_btn = gr.Button("Refresh Strikes", scale=1)
                     strikes_table = gr.Dataframe(label="All Strikes", interactive=False)
+                    strikes_pager = create_pager()
+                    export_strikes_btn = gr.Button("Export CSV", size="sm")
+                    strikes_export_file = gr.File(label="Strikes Export", visible=False)
                     
                     gr.Markdown("### Strike Information")
-                    gr.Markdown("""
+                    gr.Markdown(f"""
                     - Strikes are automatically issued when books are returned late
-                    - Members with more strikes have lower priority in borrow request queues
+                    - Members with more strikes in the last {STRIKE_WINDOW_DAYS} days have lower priority in borrow request queues
                     - Strike count is tracked in the Members tab
                     """)
                     
-                    refresh_strikes_btn.click(lambda: get_all_strikes(), outputs=[strikes_table])
+                    show_first_strikes_page, strikes_page_inputs, strikes_page_outputs = wire_pager(
+                        'strikes', strikes_table, strikes_pager, session_state,
+                        search_box=strike_member_filter, search_fn=get_member_strikes_async
+                    )
+                    refresh_strikes_btn.click(show_first_strikes_page, inputs=strikes_page_inputs, outputs=strikes_page_outputs)
+                    export_strikes_btn.click(
+                        lambda session: gr.update(value=export_table_csv('strikes', session), visible=True),
+                        inputs=[session_state],
+                        outputs=[strikes_export_file]
+                    )
+                
+                # Bulk Import Tab (Admin Only)
+                with gr.Tab("Bulk Import", visible=False) as bulk_import_tab:
+                    gr.Markdown("## Bulk Import")
+                    gr.Markdown("Load members, books, categories or category assignments from a CSV or Parquet file")
+                    gr.Markdown("""
+                    - **members:** member_id, name, email, phone, join_date (optional)
+                    - **books:** book_id, title, author, edition, condition_val, status, purchase_date (last four optional)
+                    - **categories:** category_id, category_name
+                    - **category_assignments:** book_id, category_id
+                    """)
+                    
+                    with gr.Row():
+                        import_target = gr.Dropdown(label="Import Into", choices=list(IMPORT_SPECS), value="books")
+                        import_upload = gr.File(label="CSV or Parquet File", file_types=[".csv", ".parquet"])
+                    import_btn = gr.Button("Import", variant="primary")
+                    import_status = gr.Textbox(label="Status", interactive=False)
+                    import_rejects = gr.Dataframe(label="Rejected Rows", interactive=False)
+                    
+                    import_btn.click(import_file, inputs=[import_target, import_upload, session_state], outputs=[import_status, import_rejects])
     
     def handle_login(username, password):
+        hidden = [gr.update(visible=False)] * 13
         if not username or not password:
-            return "Please enter both username and password", gr.update(selected=0), gr.update(visible=False), "", gr.update(visible=False), gr.update(visible=False), gr.update(visible=False), gr.update(visible=False), gr.update(visible=False), gr.update(visible=False), gr.update(visible=False), gr.update(visible=False), gr.update(visible=False), gr.update(visible=False)
+            return ("Please enter both username and password", gr.update(selected=0), gr.update(visible=False), "", *hidden, new_session())
         
-        success, is_admin = authenticate_user(username, password)
+        success, session = authenticate_user(username, password)
         
         if success:
+            is_admin = session['is_admin']
             access_level = "Administrator" if is_admin else "Read-Only User"
             user_info_text = f"**Logged in as:** {username} | **Access Level:** {access_level}"
             
@@ -1206,15 +3169,17 @@ with gr.Blocks(title="Library Management System", theme=gr.themes.Soft(primary_h
                 gr.update(visible=is_admin),  # delete_book_accordion
                 gr.update(visible=not is_admin),  # readonly_book_note
                 gr.update(visible=is_admin),  # borrow_requests_tab
+                gr.update(visible=is_admin),  # bulk_import_tab
                 gr.update(visible=is_admin),  # admin_note_loans
                 gr.update(visible=not is_admin),  # readonly_note_loans
                 gr.update(visible=is_admin),  # return_section
-                gr.update(visible=is_admin)  # return_status
+                gr.update(visible=is_admin),  # return_status
+                session  # This browser's session
             )
         else:
-            return "✗ Login failed. Invalid credentials.", gr.update(selected=0), gr.update(visible=False), "", gr.update(visible=False), gr.update(visible=False), gr.update(visible=False), gr.update(visible=False), gr.update(visible=False), gr.update(visible=False), gr.update(visible=False), gr.update(visible=False), gr.update(visible=False), gr.update(visible=False), gr.update(visible=False), gr.update(visible=False)
+            return ("✗ Login failed. Invalid credentials.", gr.update(selected=0), gr.update(visible=False), "", *hidden, session)
     
-    login_btn.click(
+    login_event = login_btn.click(
         handle_login,
         inputs=[username_input, password_input],
         outputs=[
@@ -1230,24 +3195,153 @@ with gr.Blocks(title="Library Management System", theme=gr.themes.Soft(primary_h
             delete_book_accordion,
             readonly_book_note,
             borrow_requests_tab,
+            bulk_import_tab,
             admin_note_loans,
             readonly_note_loans,
             return_section,
-            return_status
+            return_status,
+            session_state
         ]
     )
     
-    def handle_logout():
-        current_user_session['username'] = None
-        current_user_session['password'] = None
-        current_user_session['is_admin'] = False
-        current_user_session['is_authenticated'] = False
-        return gr.update(selected=0), gr.update(visible=False), "", "", ""
+    # Fill every tab in the background once the login has gone through
+    prefetch_outputs = [
+        total_members_display, total_books_display, active_loans_display, pending_requests_display,
+        overdue_loans_display, due_soon_loans_display,
+        *members_page_outputs, *books_page_outputs, *available_page_outputs, *strikes_page_outputs,
+        loans_table, book_selector
+    ]
+    
+    async def prefetch_after_login(session, bucket, members_size, books_size, available_size, strikes_size):
+        page_sizes = {'members': members_size, 'books': books_size, 'available_books': available_size, 'strikes': strikes_size}
+        prefetched = await prefetch_tabs(session, page_sizes, bucket)
+        if prefetched is None:
+            return [gr.update()] * len(prefetch_outputs)
+        return (
+            *prefetched['dashboard'],
+            *prefetched['members'], *prefetched['books'], *prefetched['available_books'], *prefetched['strikes'],
+            prefetched['loans'],
+            gr.Dropdown(choices=pending_book_choices(prefetched['pending']))
+        )
+    
+    login_event.then(
+        prefetch_after_login,
+        inputs=[session_state, loan_bucket_filter, members_pager[2], books_pager[2], available_books_pager[2], strikes_pager[2]],
+        outputs=prefetch_outputs
+    )
+    
+    # Keep the members, books, available books and loans tables and the dashboard
+    # live from the shared change feed
+    live_timer = gr.Timer(CHANGE_POLL_SECONDS)
+    live_timer.tick(
+        apply_live_changes,
+        inputs=[session_state, members_table, books_table, available_books_table, loans_table, loan_bucket_filter],
+        outputs=[members_table, books_table, available_books_table, loans_table,
+                 total_members_display, total_books_display, active_loans_display, pending_requests_display,
+                 overdue_loans_display, due_soon_loans_display],
+        show_progress="hidden"
+    )
+    
+    def handle_logout(session):
+        change_feed.release(session)
+        return gr.update(selected=0), gr.update(visible=False), "", "", "", new_session()
     
     logout_btn.click(
         handle_logout, 
-        outputs=[main_tabs, main_tab, username_input, password_input, login_status]
+        inputs=[session_state],
+        outputs=[main_tabs, main_tab, username_input, password_input, login_status, session_state]
     )
 
+def create_app():
+    """The Gradio UI mounted on a FastAPI app that also serves Prometheus /metrics"""
+    app = FastAPI()
+    
+    @app.get("/metrics")
+    def metrics():
+        return Response(render_metrics(), media_type="text/plain; version=0.0.4")
+    
+    demo.queue(default_concurrency_limit=GRADIO_CONCURRENCY_LIMIT)
+    return gr.mount_gradio_app(app, demo, path="/")
+
+def main():
+    parser = argparse.ArgumentParser(description="Library Management System")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7860)
+    parser.add_argument("--slow-query-seconds", type=float, default=SLOW_QUERY_SECONDS,
+                        help="Log queries slower than this")
+    parser.add_argument("--slow-query-log", help="Slow-query log file (stderr when omitted)")
+    subparsers = parser.add_subparsers(dest="command")
+    import_parser = subparsers.add_parser("import", help="Bulk import a CSV or Parquet file")
+    import_parser.add_argument("target", choices=list(IMPORT_SPECS))
+    import_parser.add_argument("file")
+    import_parser.add_argument("--user", default="library_admin")
+    import_parser.add_argument("--password", help="Prompted for when omitted")
+    import_parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE)
+    explain_parser = subparsers.add_parser("explain", help="EXPLAIN every app query and fail on large full table scans")
+    explain_parser.add_argument("--user", default="library_user")
+    explain_parser.add_argument("--password", help="Prompted for when omitted")
+    explain_parser.add_argument("--threshold", type=int, default=EXPLAIN_ROW_THRESHOLD)
+    reconcile_parser = subparsers.add_parser("reconcile-strikes", help="Rebuild members' strike counts from the Strike table")
+    reconcile_parser.add_argument("--user", default="library_admin")
+    reconcile_parser.add_argument("--password", help="Prompted for when omitted")
+    reconcile_loans_parser = subparsers.add_parser("reconcile-loans", help="Recount members' open loans from the Transaction table")
+    reconcile_loans_parser.add_argument("--user", default="library_admin")
+    reconcile_loans_parser.add_argument("--password", help="Prompted for when omitted")
+    args = parser.parse_args()
+    configure_slow_query_log(args.slow_query_seconds, args.slow_query_log)
+    
+    if args.command == "reconcile-strikes":
+        password = args.password or getpass.getpass(f"Password for {args.user}: ")
+        success, session = authenticate_user(args.user, password)
+        if not success:
+            raise SystemExit("Login failed. Invalid credentials.")
+        
+        corrected = reconcile_strike_counts(session)
+        if corrected is None:
+            raise SystemExit("Reconciliation failed, no changes were made")
+        print(f"Corrected strike counts for {corrected} members")
+        raise SystemExit(0)
+    
+    if args.command == "reconcile-loans":
+        password = args.password or getpass.getpass(f"Password for {args.user}: ")
+        success, session = authenticate_user(args.user, password)
+        if not success:
+            raise SystemExit("Login failed. Invalid credentials.")
+        
+        corrected = reconcile_active_loan_counts(session)
+        if corrected is None:
+            raise SystemExit("Reconciliation failed, no changes were made")
+        print(f"Corrected loan counts for {corrected} members")
+        raise SystemExit(0)
+    
+    if args.command == "explain":
+        password = args.password or getpass.getpass(f"Password for {args.user}: ")
+        success, session = authenticate_user(args.user, password)
+        if not success:
+            raise SystemExit("Login failed. Invalid credentials.")
+        
+        report = explain_queries(session, args.threshold)
+        print(pd.DataFrame(report).to_string(index=False))
+        problems = [step for step in report if step['problem']]
+        for step in problems:
+            print(f"FAIL {step['query']}: {step['problem']} ({step['table']})")
+        raise SystemExit(1 if problems else 0)
+    
+    if args.command == "import":
+        password = args.password or getpass.getpass(f"Password for {args.user}: ")
+        success, session = authenticate_user(args.user, password)
+        if not success:
+            raise SystemExit("Login failed. Invalid credentials.")
+        if not os.path.exists(args.file):
+            raise SystemExit(f"No such file: {args.file}")
+        
+        report = bulk_import(args.target, args.file, session, chunk_size=args.chunk_size)
+        for line, reason in report['rejects']:
+            print(f"line {line}: {reason}" if line else reason)
+        print(format_import_report(report))
+        raise SystemExit(1 if report['rejects'] else 0)
+    
+    uvicorn.run(create_app(), host=args.host, port=args.port)
+
 if __name__ == "__main__":
-    demo.launch()
\ No newline at end of file
+    main()
\ No newline at end of file
@@ -0,0 +1,5 @@
+-- Full-text indexes backing the Books and Members search boxes
+USE library_management_system;
+
+CREATE FULLTEXT INDEX ft_book_title_author ON Book (title, author);
+CREATE FULLTEXT INDEX ft_member_name_email ON Member (name, email);
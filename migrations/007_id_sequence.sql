@@ -0,0 +1,65 @@
+-- Request and transaction IDs drawn from IdSequence instead of COUNT(*) + 1
+USE library_management_system;
+
+-- Next numeric suffix for generated IDs (BR###, T###); rows are locked while a block is reserved
+CREATE TABLE IdSequence (
+    sequence_name VARCHAR(50) PRIMARY KEY,
+    next_value INT NOT NULL CHECK (next_value > 0)
+);
+
+-- Continue numbering after the IDs already issued
+INSERT INTO IdSequence (sequence_name, next_value)
+SELECT 'BorrowRequest', COALESCE(MAX(CAST(SUBSTRING(request_id, 3) AS UNSIGNED)), 0) + 1 FROM BorrowRequest
+UNION ALL
+SELECT 'Transaction', COALESCE(MAX(CAST(SUBSTRING(transaction_id, 2) AS UNSIGNED)), 0) + 1 FROM Transaction;
+
+DELIMITER $$
+
+DROP PROCEDURE IF EXISTS ApproveBorrowRequest$$
+
+CREATE PROCEDURE AllocateIds(
+    IN sequence_name_param VARCHAR(50),
+    IN block_size_param INT,
+    OUT first_value_param INT
+)
+BEGIN
+    -- FOR UPDATE locks the sequence row until the caller commits, so concurrent
+    -- callers always receive disjoint blocks
+    SELECT next_value INTO first_value_param
+    FROM IdSequence
+    WHERE sequence_name = sequence_name_param
+    FOR UPDATE;
+
+    UPDATE IdSequence
+    SET next_value = next_value + block_size_param
+    WHERE sequence_name = sequence_name_param;
+END$$
+
+
+CREATE PROCEDURE ApproveBorrowRequest(
+    IN request_id_param VARCHAR(20),
+    IN admin_id_param VARCHAR(20)
+)
+BEGIN
+    DECLARE new_id_num INT;
+
+    IF (SELECT status FROM BorrowRequest WHERE request_id = request_id_param) = 'Pending' THEN
+        CALL AllocateIds('Transaction', 1, new_id_num);
+
+        UPDATE BorrowRequest SET status = 'Completed' WHERE request_id = request_id_param;
+
+        INSERT INTO Transaction (transaction_id, borrow_date, due_date, request_id, admin_id, extension_count)
+        VALUES (
+            CONCAT('T', LPAD(new_id_num, GREATEST(3, CHAR_LENGTH(new_id_num)), '0')),
+            CURDATE(),
+            DATE_ADD(CURDATE(), INTERVAL 14 DAY),
+            request_id_param,
+            admin_id_param,
+            0
+        );
+    ELSE
+        SIGNAL SQLSTATE '45000' SET MESSAGE_TEXT = 'Request is not pending and cannot be approved.';
+    END IF;
+END$$
+
+DELIMITER ;
@@ -0,0 +1,168 @@
+-- Approve or deny many borrow requests in one call
+USE library_management_system;
+
+DELIMITER $$
+
+-- Batch variants: request_ids_param is a JSON array of distinct request IDs.
+-- Everything happens in the caller's transaction and one result row is
+-- returned per request (request_id, transaction_id, outcome).
+-- At most one request per book is approved, the first pending one in the
+-- list, and only if the book isn't already Lent; other pending requests for
+-- the book are left pending and reported as 'Book not available'.
+CREATE PROCEDURE ApproveBorrowRequests(
+    IN request_ids_param JSON,
+    IN admin_id_param VARCHAR(20),
+    IN due_date_param DATE
+)
+BEGIN
+    DECLARE locked_count INT;
+    DECLARE approved_count INT;
+    DECLARE first_id_num INT;
+
+    -- Lock the requests and their books up front so concurrent approvals of the
+    -- same request, or of two requests for the same book, serialise
+    SELECT COUNT(*) INTO locked_count
+    FROM BorrowRequest
+    WHERE request_id IN (
+        SELECT jt.request_id
+        FROM JSON_TABLE(request_ids_param, '$[*]' COLUMNS (request_id VARCHAR(20) PATH '$')) jt
+    )
+    FOR UPDATE;
+
+    SELECT COUNT(*) INTO locked_count
+    FROM Book
+    WHERE book_id IN (
+        SELECT br.book_id
+        FROM BorrowRequest br
+        JOIN JSON_TABLE(request_ids_param, '$[*]' COLUMNS (request_id VARCHAR(20) PATH '$')) jt
+            ON br.request_id = jt.request_id
+    )
+    FOR UPDATE;
+
+    DROP TEMPORARY TABLE IF EXISTS BatchRequest;
+    CREATE TEMPORARY TABLE BatchRequest (
+        position INT PRIMARY KEY,
+        request_id VARCHAR(20) NOT NULL,
+        was_pending BOOLEAN,
+        approve BOOLEAN NOT NULL,
+        approve_rank INT,
+        transaction_id VARCHAR(20)
+    );
+
+    INSERT INTO BatchRequest (position, request_id, was_pending, approve, approve_rank)
+    SELECT
+        position,
+        request_id,
+        was_pending,
+        approve,
+        IF(approve, ROW_NUMBER() OVER (PARTITION BY approve ORDER BY position), NULL)
+    FROM (
+        SELECT
+            jt.position,
+            jt.request_id,
+            br.status = 'Pending' AS was_pending,
+            COALESCE(
+                br.status = 'Pending'
+                AND bk.status <> 'Lent'
+                AND ROW_NUMBER() OVER (PARTITION BY br.book_id, br.status = 'Pending' ORDER BY jt.position) = 1,
+                FALSE
+            ) AS approve
+        FROM JSON_TABLE(request_ids_param, '$[*]' COLUMNS (
+            position FOR ORDINALITY,
+            request_id VARCHAR(20) PATH '$'
+        )) jt
+        LEFT JOIN BorrowRequest br ON br.request_id = jt.request_id
+        LEFT JOIN Book bk ON bk.book_id = br.book_id
+    ) batch;
+
+    SELECT COUNT(*) INTO approved_count FROM BatchRequest WHERE approve;
+
+    IF approved_count > 0 THEN
+        CALL AllocateIds('Transaction', approved_count, first_id_num);
+
+        UPDATE BatchRequest
+        SET transaction_id = CONCAT('T', LPAD(first_id_num + approve_rank - 1, GREATEST(3, CHAR_LENGTH(first_id_num + approve_rank - 1)), '0'))
+        WHERE approve;
+
+        UPDATE BorrowRequest br
+        JOIN BatchRequest b ON br.request_id = b.request_id
+        SET br.status = 'Completed'
+        WHERE b.approve;
+
+        INSERT INTO Transaction (transaction_id, borrow_date, due_date, request_id, admin_id, extension_count)
+        SELECT
+            transaction_id,
+            CURDATE(),
+            COALESCE(due_date_param, DATE_ADD(CURDATE(), INTERVAL 14 DAY)),
+            request_id,
+            admin_id_param,
+            0
+        FROM BatchRequest
+        WHERE approve;
+    END IF;
+
+    SELECT
+        request_id,
+        transaction_id,
+        CASE
+            WHEN approve THEN 'Approved'
+            WHEN was_pending THEN 'Book not available'
+            WHEN was_pending IS NULL THEN 'Not found'
+            ELSE 'Not pending'
+        END AS outcome
+    FROM BatchRequest
+    ORDER BY position;
+
+    DROP TEMPORARY TABLE BatchRequest;
+END$$
+
+
+CREATE PROCEDURE DenyBorrowRequests(
+    IN request_ids_param JSON
+)
+BEGIN
+    DECLARE locked_count INT;
+
+    SELECT COUNT(*) INTO locked_count
+    FROM BorrowRequest
+    WHERE request_id IN (
+        SELECT jt.request_id
+        FROM JSON_TABLE(request_ids_param, '$[*]' COLUMNS (request_id VARCHAR(20) PATH '$')) jt
+    )
+    FOR UPDATE;
+
+    DROP TEMPORARY TABLE IF EXISTS BatchRequest;
+    CREATE TEMPORARY TABLE BatchRequest (
+        position INT PRIMARY KEY,
+        request_id VARCHAR(20) NOT NULL,
+        was_pending BOOLEAN
+    );
+
+    INSERT INTO BatchRequest (position, request_id, was_pending)
+    SELECT jt.position, jt.request_id, br.status = 'Pending'
+    FROM JSON_TABLE(request_ids_param, '$[*]' COLUMNS (
+        position FOR ORDINALITY,
+        request_id VARCHAR(20) PATH '$'
+    )) jt
+    LEFT JOIN BorrowRequest br ON br.request_id = jt.request_id;
+
+    UPDATE BorrowRequest br
+    JOIN BatchRequest b ON br.request_id = b.request_id
+    SET br.status = 'Denied'
+    WHERE b.was_pending;
+
+    SELECT
+        request_id,
+        NULL AS transaction_id,
+        CASE
+            WHEN was_pending THEN 'Denied'
+            WHEN was_pending IS NULL THEN 'Not found'
+            ELSE 'Not pending'
+        END AS outcome
+    FROM BatchRequest
+    ORDER BY position;
+
+    DROP TEMPORARY TABLE BatchRequest;
+END$$
+
+DELIMITER ;
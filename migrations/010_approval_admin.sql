@@ -0,0 +1,62 @@
+-- Single-call approval with a due date, by the admin linked to the logged-in account
+USE library_management_system;
+
+ALTER TABLE Admin ADD COLUMN db_user VARCHAR(32) UNIQUE;  -- MySQL account this admin logs into the app with
+
+-- Link the app's admin account as the sample data does; link other accounts the same way
+UPDATE Admin SET db_user = 'library_admin' WHERE admin_id = 'A001' AND db_user IS NULL;
+
+DELIMITER $$
+
+DROP PROCEDURE IF EXISTS ApproveBorrowRequest$$
+
+-- Single-call approval: locks the request, uses the given due date (NULL for
+-- the default 14 days) and returns the new transaction_id as a result row
+CREATE PROCEDURE ApproveBorrowRequestEx(
+    IN request_id_param VARCHAR(20),
+    IN admin_id_param VARCHAR(20),
+    IN due_date_param DATE
+)
+BEGIN
+    DECLARE request_status VARCHAR(50);
+    DECLARE new_id_num INT;
+    DECLARE new_transaction_id VARCHAR(20);
+
+    SELECT status INTO request_status
+    FROM BorrowRequest
+    WHERE request_id = request_id_param
+    FOR UPDATE;
+
+    IF request_status = 'Pending' THEN
+        CALL AllocateIds('Transaction', 1, new_id_num);
+        SET new_transaction_id = CONCAT('T', LPAD(new_id_num, GREATEST(3, CHAR_LENGTH(new_id_num)), '0'));
+
+        UPDATE BorrowRequest SET status = 'Completed' WHERE request_id = request_id_param;
+
+        INSERT INTO Transaction (transaction_id, borrow_date, due_date, request_id, admin_id, extension_count)
+        VALUES (
+            new_transaction_id,
+            CURDATE(),
+            COALESCE(due_date_param, DATE_ADD(CURDATE(), INTERVAL 14 DAY)),
+            request_id_param,
+            admin_id_param,
+            0
+        );
+
+        SELECT new_transaction_id AS transaction_id;
+    ELSE
+        SIGNAL SQLSTATE '45000' SET MESSAGE_TEXT = 'Request is not pending and cannot be approved.';
+    END IF;
+END$$
+
+
+CREATE PROCEDURE ApproveBorrowRequest(
+    IN request_id_param VARCHAR(20),
+    IN admin_id_param VARCHAR(20)
+)
+BEGIN
+    -- Kept for existing callers; same checks and ID format as the Ex version
+    CALL ApproveBorrowRequestEx(request_id_param, admin_id_param, NULL);
+END$$
+
+DELIMITER ;
@@ -0,0 +1,9 @@
+-- Secondary indexes for the app's hot queries (check plans with: python Mini_project.py explain)
+USE library_management_system;
+
+CREATE INDEX idx_borrowrequest_book_status_date ON BorrowRequest (book_id, status, request_date);  -- priority queue
+CREATE INDEX idx_borrowrequest_status_book ON BorrowRequest (status, book_id);                     -- pending summary and count
+CREATE INDEX idx_borrowrequest_requester_date ON BorrowRequest (member_id_requester, request_date); -- member's requests
+CREATE INDEX idx_transaction_return_due ON Transaction (return_date, due_date);                     -- active loans by due date
+CREATE INDEX idx_strike_date ON Strike (strike_date);
+CREATE INDEX idx_book_status_title ON Book (status, title, book_id);                                -- available books page
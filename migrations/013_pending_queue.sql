@@ -0,0 +1,126 @@
+-- Per-book pending queue kept in priority order by triggers
+USE library_management_system;
+
+-- Pending requests with their priority key, kept in sync by triggers so reading a
+-- book's queue is a range scan on idx_pendingqueue_priority instead of a join + sort
+CREATE TABLE PendingQueue (
+    request_id VARCHAR(20) PRIMARY KEY,
+    book_id VARCHAR(20) NOT NULL,
+    member_id VARCHAR(20) NOT NULL,
+    strike_count INT NOT NULL,
+    join_date DATE NOT NULL,
+    request_date DATE NOT NULL,
+    INDEX idx_pendingqueue_priority (book_id, strike_count, join_date, request_date, request_id),
+    FOREIGN KEY (request_id) REFERENCES BorrowRequest(request_id) ON DELETE CASCADE ON UPDATE CASCADE,
+    FOREIGN KEY (book_id) REFERENCES Book(book_id) ON DELETE CASCADE ON UPDATE CASCADE,
+    FOREIGN KEY (member_id) REFERENCES Member(member_id) ON DELETE CASCADE ON UPDATE CASCADE
+);
+
+DELIMITER $$
+
+DROP PROCEDURE IF EXISTS GetPrioritizedRequestList$$
+
+-- PendingQueue maintenance. Rows cascaded by foreign keys don't fire triggers,
+-- which is why PendingQueue carries its own foreign keys.
+CREATE TRIGGER after_borrowrequest_insert_queue
+AFTER INSERT ON BorrowRequest
+FOR EACH ROW
+BEGIN
+    IF NEW.status = 'Pending' THEN
+        INSERT INTO PendingQueue (request_id, book_id, member_id, strike_count, join_date, request_date)
+        SELECT NEW.request_id, NEW.book_id, m.member_id, m.strike_count, m.join_date, NEW.request_date
+        FROM Member m
+        WHERE m.member_id = NEW.member_id_requester;
+    END IF;
+END$$
+
+
+CREATE TRIGGER after_borrowrequest_update_queue
+AFTER UPDATE ON BorrowRequest
+FOR EACH ROW
+BEGIN
+    IF OLD.status = 'Pending' THEN
+        DELETE FROM PendingQueue WHERE request_id = OLD.request_id;
+    END IF;
+
+    IF NEW.status = 'Pending' THEN
+        INSERT INTO PendingQueue (request_id, book_id, member_id, strike_count, join_date, request_date)
+        SELECT NEW.request_id, NEW.book_id, m.member_id, m.strike_count, m.join_date, NEW.request_date
+        FROM Member m
+        WHERE m.member_id = NEW.member_id_requester;
+    END IF;
+END$$
+
+
+CREATE TRIGGER after_member_update_queue
+AFTER UPDATE ON Member
+FOR EACH ROW
+BEGIN
+    IF NEW.strike_count <> OLD.strike_count OR NEW.join_date <> OLD.join_date THEN
+        UPDATE PendingQueue
+        SET strike_count = NEW.strike_count, join_date = NEW.join_date
+        WHERE member_id = NEW.member_id;
+    END IF;
+END$$
+
+
+CREATE PROCEDURE GetPrioritizedRequestList(
+    IN book_id_param VARCHAR(20)
+)
+BEGIN
+    SELECT
+        pq.request_id,
+        pq.request_date,
+        pq.member_id,
+        m.name AS requester_name,
+        pq.strike_count,
+        pq.join_date
+    FROM
+        PendingQueue pq
+    JOIN
+        Member m ON pq.member_id = m.member_id
+    WHERE
+        pq.book_id = book_id_param
+    ORDER BY
+        pq.strike_count ASC,
+        pq.join_date ASC,
+        pq.request_date ASC,
+        pq.request_id ASC;
+END$$
+
+
+-- First limit_param entries of a book's queue
+CREATE PROCEDURE GetPrioritizedRequestListTop(
+    IN book_id_param VARCHAR(20),
+    IN limit_param INT
+)
+BEGIN
+    SELECT
+        pq.request_id,
+        pq.request_date,
+        pq.member_id,
+        m.name AS requester_name,
+        pq.strike_count,
+        pq.join_date
+    FROM
+        PendingQueue pq
+    JOIN
+        Member m ON pq.member_id = m.member_id
+    WHERE
+        pq.book_id = book_id_param
+    ORDER BY
+        pq.strike_count ASC,
+        pq.join_date ASC,
+        pq.request_date ASC,
+        pq.request_id ASC
+    LIMIT limit_param;
+END$$
+
+DELIMITER ;
+
+-- Seed the queue with requests that were pending before the triggers existed
+INSERT INTO PendingQueue (request_id, book_id, member_id, strike_count, join_date, request_date)
+SELECT br.request_id, br.book_id, m.member_id, m.strike_count, m.join_date, br.request_date
+FROM BorrowRequest br
+JOIN Member m ON m.member_id = br.member_id_requester
+WHERE br.status = 'Pending';
@@ -0,0 +1,66 @@
+-- Open loans bucketed by due date for the Active Loans filters and dashboard
+USE library_management_system;
+
+ALTER TABLE Transaction ADD COLUMN loan_bucket VARCHAR(10) CHECK (loan_bucket IN ('Overdue', 'DueSoon', 'Active'));  -- NULL once returned
+CREATE INDEX idx_transaction_bucket_due ON Transaction (loan_bucket, due_date);                      -- overdue / due-soon lists
+
+DELIMITER $$
+
+-- Overdue engine. loan_bucket is set when a loan is written and re-derived
+-- daily by RefreshLoanBuckets, so listing overdue or due-soon loans is an
+-- index range scan instead of a DATEDIFF over every open loan.
+CREATE FUNCTION LoanBucket(
+    due_date_param DATE,
+    return_date_param DATE
+)
+RETURNS VARCHAR(10)
+NOT DETERMINISTIC
+NO SQL
+BEGIN
+    IF return_date_param IS NOT NULL THEN
+        RETURN NULL;
+    ELSEIF due_date_param < CURDATE() THEN
+        RETURN 'Overdue';
+    ELSEIF due_date_param <= CURDATE() + INTERVAL 2 DAY THEN
+        RETURN 'DueSoon';
+    ELSE
+        RETURN 'Active';
+    END IF;
+END$$
+
+
+CREATE TRIGGER before_transaction_insert_bucket
+BEFORE INSERT ON Transaction
+FOR EACH ROW
+BEGIN
+    SET NEW.loan_bucket = LoanBucket(NEW.due_date, NEW.return_date);
+END$$
+
+
+CREATE TRIGGER before_transaction_update_bucket
+BEFORE UPDATE ON Transaction
+FOR EACH ROW
+BEGIN
+    SET NEW.loan_bucket = LoanBucket(NEW.due_date, NEW.return_date);
+END$$
+
+
+CREATE PROCEDURE RefreshLoanBuckets()
+BEGIN
+    -- Only open loans whose bucket moved since the last run are rewritten
+    UPDATE Transaction
+    SET loan_bucket = LoanBucket(due_date, return_date)
+    WHERE return_date IS NULL
+      AND NOT (loan_bucket <=> LoanBucket(due_date, return_date));
+END$$
+
+
+-- Runs at midnight while event_scheduler is ON (the MySQL 8 default)
+CREATE EVENT refresh_loan_buckets
+ON SCHEDULE EVERY 1 DAY STARTS CURRENT_DATE + INTERVAL 1 DAY
+DO CALL RefreshLoanBuckets()$$
+
+DELIMITER ;
+
+-- Bucket the loans that are already open
+CALL RefreshLoanBuckets();
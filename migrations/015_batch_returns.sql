@@ -0,0 +1,129 @@
+-- Set-based batch returns
+USE library_management_system;
+
+ALTER TABLE Transaction ADD COLUMN return_batch BIGINT UNSIGNED;  -- ProcessReturns call that returned the loan, NULL for single returns
+
+DELIMITER $$
+
+DROP TRIGGER IF EXISTS after_transaction_update_handle_return$$
+
+CREATE TRIGGER after_transaction_update_handle_return
+AFTER UPDATE ON Transaction
+FOR EACH ROW
+BEGIN
+    DECLARE requester_id VARCHAR(20);
+    DECLARE book_id_to_update VARCHAR(20);
+    DECLARE days_late INT;
+
+    -- ProcessReturns stamps return_batch in the same UPDATE and does this work set-based
+    IF OLD.return_date IS NULL AND NEW.return_date IS NOT NULL AND NEW.return_batch <=> OLD.return_batch THEN
+        SELECT br.member_id_requester, br.book_id
+        INTO requester_id, book_id_to_update
+        FROM BorrowRequest br
+        WHERE br.request_id = NEW.request_id;
+
+        UPDATE Book SET status = 'Available' WHERE book_id = book_id_to_update;
+
+        SET days_late = DATEDIFF(NEW.return_date, NEW.due_date);
+
+        IF days_late > 0 THEN
+            -- Dated by the return, so a back-dated return records the day the book came back
+            INSERT INTO Strike (member_id, transaction_id, strike_date, reason)
+            VALUES (requester_id, NEW.transaction_id, NEW.return_date, CONCAT('Returned ', days_late, ' days late.'));
+
+            UPDATE Member SET strike_count = strike_count + 1 WHERE member_id = requester_id;
+        END IF;
+    END IF;
+END$$
+
+
+-- Returns a batch of loans in one transaction. The loans are stamped with a
+-- return_batch ID in the same UPDATE that returns them, which tells the return
+-- trigger to leave them alone; books, strikes and strike counts are then
+-- updated with one statement each for the whole batch.
+CREATE PROCEDURE ProcessReturns(
+    IN transaction_ids_param JSON,
+    IN return_date_param DATE
+)
+BEGIN
+    DECLARE locked_count INT;
+    DECLARE returned_on DATE DEFAULT COALESCE(return_date_param, CURDATE());
+    DECLARE batch_id BIGINT UNSIGNED DEFAULT UUID_SHORT();
+
+    SELECT COUNT(*) INTO locked_count
+    FROM Transaction
+    WHERE transaction_id IN (
+        SELECT jt.transaction_id
+        FROM JSON_TABLE(transaction_ids_param, '$[*]' COLUMNS (transaction_id VARCHAR(20) PATH '$')) jt
+    )
+    FOR UPDATE;
+
+    DROP TEMPORARY TABLE IF EXISTS BatchReturn;
+    CREATE TEMPORARY TABLE BatchReturn (
+        position INT PRIMARY KEY,
+        transaction_id VARCHAR(20) NOT NULL,
+        was_open BOOLEAN,
+        member_id VARCHAR(20),
+        book_id VARCHAR(20),
+        days_late INT
+    );
+
+    INSERT INTO BatchReturn (position, transaction_id, was_open, member_id, book_id, days_late)
+    SELECT
+        jt.position,
+        jt.transaction_id,
+        t.return_date IS NULL,
+        br.member_id_requester,
+        br.book_id,
+        DATEDIFF(returned_on, t.due_date)
+    FROM JSON_TABLE(transaction_ids_param, '$[*]' COLUMNS (
+        position FOR ORDINALITY,
+        transaction_id VARCHAR(20) PATH '$'
+    )) jt
+    LEFT JOIN Transaction t ON t.transaction_id = jt.transaction_id
+    LEFT JOIN BorrowRequest br ON br.request_id = t.request_id;
+
+    UPDATE Transaction t
+    JOIN BatchReturn b ON t.transaction_id = b.transaction_id
+    SET t.return_date = returned_on,
+        t.return_batch = batch_id
+    WHERE b.was_open;
+
+    UPDATE Book bk
+    JOIN BatchReturn b ON bk.book_id = b.book_id
+    SET bk.status = 'Available'
+    WHERE b.was_open;
+
+    -- Dated by the return, like the trigger's strikes
+    INSERT INTO Strike (member_id, transaction_id, strike_date, reason)
+    SELECT member_id, transaction_id, returned_on, CONCAT('Returned ', days_late, ' days late.')
+    FROM BatchReturn
+    WHERE was_open AND days_late > 0
+    ORDER BY position;
+
+    -- One UPDATE for every member, however many of their loans came back late
+    UPDATE Member m
+    JOIN (
+        SELECT member_id, COUNT(*) AS late_count
+        FROM BatchReturn
+        WHERE was_open AND days_late > 0
+        GROUP BY member_id
+    ) late ON m.member_id = late.member_id
+    SET m.strike_count = m.strike_count + late.late_count;
+
+    SELECT
+        transaction_id,
+        IF(was_open, GREATEST(days_late, 0), NULL) AS days_late,
+        CASE
+            WHEN was_open AND days_late > 0 THEN 'Returned late'
+            WHEN was_open THEN 'Returned'
+            WHEN was_open IS NULL THEN 'Not found'
+            ELSE 'Already returned'
+        END AS outcome
+    FROM BatchReturn
+    ORDER BY position;
+
+    DROP TEMPORARY TABLE BatchReturn;
+END$$
+
+DELIMITER ;
@@ -0,0 +1,282 @@
+-- Member.active_loan_count, kept by triggers and read by GetMemberActiveLoanCount
+USE library_management_system;
+
+ALTER TABLE Member ADD COLUMN active_loan_count INT DEFAULT 0 CHECK (active_loan_count >= 0);  -- open loans, kept by the Transaction and delete triggers
+
+DELIMITER $$
+
+DROP TRIGGER IF EXISTS after_transaction_insert_update_book_status$$
+DROP TRIGGER IF EXISTS after_transaction_update_handle_return$$
+DROP PROCEDURE IF EXISTS ProcessReturns$$
+DROP FUNCTION IF EXISTS IsBookAvailable$$
+DROP FUNCTION IF EXISTS GetMemberActiveLoanCount$$
+
+CREATE TRIGGER after_transaction_insert_update_book_status
+AFTER INSERT ON Transaction
+FOR EACH ROW
+BEGIN
+    DECLARE book_id_to_update VARCHAR(20);
+    DECLARE requester_id VARCHAR(20);
+
+    SELECT book_id, member_id_requester INTO book_id_to_update, requester_id
+    FROM BorrowRequest
+    WHERE request_id = NEW.request_id;
+
+    UPDATE Book
+    SET status = 'Lent'
+    WHERE book_id = book_id_to_update;
+
+    IF NEW.return_date IS NULL THEN
+        UPDATE Member SET active_loan_count = active_loan_count + 1 WHERE member_id = requester_id;
+    END IF;
+END$$
+
+
+CREATE TRIGGER after_transaction_update_handle_return
+AFTER UPDATE ON Transaction
+FOR EACH ROW
+BEGIN
+    DECLARE requester_id VARCHAR(20);
+    DECLARE book_id_to_update VARCHAR(20);
+    DECLARE days_late INT;
+
+    -- ProcessReturns stamps return_batch in the same UPDATE and does this work set-based
+    IF OLD.return_date IS NULL AND NEW.return_date IS NOT NULL AND NEW.return_batch <=> OLD.return_batch THEN
+        SELECT br.member_id_requester, br.book_id
+        INTO requester_id, book_id_to_update
+        FROM BorrowRequest br
+        WHERE br.request_id = NEW.request_id;
+
+        UPDATE Book SET status = 'Available' WHERE book_id = book_id_to_update;
+        UPDATE Member SET active_loan_count = active_loan_count - 1 WHERE member_id = requester_id;
+
+        SET days_late = DATEDIFF(NEW.return_date, NEW.due_date);
+
+        IF days_late > 0 THEN
+            -- Dated by the return, so a back-dated return records the day the book came back
+            INSERT INTO Strike (member_id, transaction_id, strike_date, reason)
+            VALUES (requester_id, NEW.transaction_id, NEW.return_date, CONCAT('Returned ', days_late, ' days late.'));
+
+            UPDATE Member SET strike_count = strike_count + 1 WHERE member_id = requester_id;
+        END IF;
+    END IF;
+END$$
+
+
+-- Loan counts. Deletes cascade into Transaction without firing its triggers, so
+-- the tables whose deletes reach loans take the open ones off active_loan_count
+-- first. Member can't: a trigger may not update the table its statement deletes
+-- from, so member deletes are followed by ReconcileActiveLoanCounts.
+CREATE TRIGGER before_book_delete_loan_counts
+BEFORE DELETE ON Book
+FOR EACH ROW
+BEGIN
+    UPDATE Member m
+    JOIN (
+        SELECT br.member_id_requester AS member_id, COUNT(*) AS open_loans
+        FROM Transaction t
+        JOIN BorrowRequest br ON t.request_id = br.request_id
+        WHERE br.book_id = OLD.book_id AND t.return_date IS NULL
+        GROUP BY br.member_id_requester
+    ) lost ON m.member_id = lost.member_id
+    SET m.active_loan_count = m.active_loan_count - lost.open_loans;
+END$$
+
+
+CREATE TRIGGER before_borrowrequest_delete_loan_count
+BEFORE DELETE ON BorrowRequest
+FOR EACH ROW
+BEGIN
+    UPDATE Member
+    SET active_loan_count = active_loan_count - (
+        SELECT COUNT(*) FROM Transaction WHERE request_id = OLD.request_id AND return_date IS NULL
+    )
+    WHERE member_id = OLD.member_id_requester;
+END$$
+
+
+CREATE TRIGGER before_admin_delete_loan_counts
+BEFORE DELETE ON Admin
+FOR EACH ROW
+BEGIN
+    UPDATE Member m
+    JOIN (
+        SELECT br.member_id_requester AS member_id, COUNT(*) AS open_loans
+        FROM Transaction t
+        JOIN BorrowRequest br ON t.request_id = br.request_id
+        WHERE t.admin_id = OLD.admin_id AND t.return_date IS NULL
+        GROUP BY br.member_id_requester
+    ) lost ON m.member_id = lost.member_id
+    SET m.active_loan_count = m.active_loan_count - lost.open_loans;
+END$$
+
+
+CREATE TRIGGER after_transaction_delete_loan_count
+AFTER DELETE ON Transaction
+FOR EACH ROW
+BEGIN
+    IF OLD.return_date IS NULL THEN
+        UPDATE Member m
+        JOIN BorrowRequest br ON br.member_id_requester = m.member_id
+        SET m.active_loan_count = m.active_loan_count - 1
+        WHERE br.request_id = OLD.request_id;
+    END IF;
+END$$
+
+
+CREATE PROCEDURE ReconcileActiveLoanCounts()
+BEGIN
+    UPDATE Member m
+    LEFT JOIN (
+        SELECT br.member_id_requester AS member_id, COUNT(*) AS open_loans
+        FROM Transaction t
+        JOIN BorrowRequest br ON t.request_id = br.request_id
+        WHERE t.return_date IS NULL
+        GROUP BY br.member_id_requester
+    ) loans ON m.member_id = loans.member_id
+    SET m.active_loan_count = COALESCE(loans.open_loans, 0)
+    WHERE m.active_loan_count <> COALESCE(loans.open_loans, 0);
+
+    SELECT ROW_COUNT() AS members_corrected;
+END$$
+
+
+-- Catches member deletes made outside the app
+CREATE EVENT reconcile_active_loan_counts
+ON SCHEDULE EVERY 1 DAY STARTS CURRENT_DATE + INTERVAL 1 DAY
+DO CALL ReconcileActiveLoanCounts()$$
+
+
+-- Returns a batch of loans in one transaction. The loans are stamped with a
+-- return_batch ID in the same UPDATE that returns them, which tells the return
+-- trigger to leave them alone; books, strikes and strike counts are then
+-- updated with one statement each for the whole batch.
+CREATE PROCEDURE ProcessReturns(
+    IN transaction_ids_param JSON,
+    IN return_date_param DATE
+)
+BEGIN
+    DECLARE locked_count INT;
+    DECLARE returned_on DATE DEFAULT COALESCE(return_date_param, CURDATE());
+    DECLARE batch_id BIGINT UNSIGNED DEFAULT UUID_SHORT();
+
+    SELECT COUNT(*) INTO locked_count
+    FROM Transaction
+    WHERE transaction_id IN (
+        SELECT jt.transaction_id
+        FROM JSON_TABLE(transaction_ids_param, '$[*]' COLUMNS (transaction_id VARCHAR(20) PATH '$')) jt
+    )
+    FOR UPDATE;
+
+    DROP TEMPORARY TABLE IF EXISTS BatchReturn;
+    CREATE TEMPORARY TABLE BatchReturn (
+        position INT PRIMARY KEY,
+        transaction_id VARCHAR(20) NOT NULL,
+        was_open BOOLEAN,
+        member_id VARCHAR(20),
+        book_id VARCHAR(20),
+        days_late INT
+    );
+
+    INSERT INTO BatchReturn (position, transaction_id, was_open, member_id, book_id, days_late)
+    SELECT
+        jt.position,
+        jt.transaction_id,
+        t.return_date IS NULL,
+        br.member_id_requester,
+        br.book_id,
+        DATEDIFF(returned_on, t.due_date)
+    FROM JSON_TABLE(transaction_ids_param, '$[*]' COLUMNS (
+        position FOR ORDINALITY,
+        transaction_id VARCHAR(20) PATH '$'
+    )) jt
+    LEFT JOIN Transaction t ON t.transaction_id = jt.transaction_id
+    LEFT JOIN BorrowRequest br ON br.request_id = t.request_id;
+
+    UPDATE Transaction t
+    JOIN BatchReturn b ON t.transaction_id = b.transaction_id
+    SET t.return_date = returned_on,
+        t.return_batch = batch_id
+    WHERE b.was_open;
+
+    UPDATE Book bk
+    JOIN BatchReturn b ON bk.book_id = b.book_id
+    SET bk.status = 'Available'
+    WHERE b.was_open;
+
+    -- Dated by the return, like the trigger's strikes
+    INSERT INTO Strike (member_id, transaction_id, strike_date, reason)
+    SELECT member_id, transaction_id, returned_on, CONCAT('Returned ', days_late, ' days late.')
+    FROM BatchReturn
+    WHERE was_open AND days_late > 0
+    ORDER BY position;
+
+    -- One UPDATE for every member, however many of their loans came back
+    UPDATE Member m
+    JOIN (
+        SELECT member_id, COUNT(*) AS returned_count, SUM(days_late > 0) AS late_count
+        FROM BatchReturn
+        WHERE was_open
+        GROUP BY member_id
+    ) returned ON m.member_id = returned.member_id
+    SET m.active_loan_count = m.active_loan_count - returned.returned_count,
+        m.strike_count = m.strike_count + returned.late_count;
+
+    SELECT
+        transaction_id,
+        IF(was_open, GREATEST(days_late, 0), NULL) AS days_late,
+        CASE
+            WHEN was_open AND days_late > 0 THEN 'Returned late'
+            WHEN was_open THEN 'Returned'
+            WHEN was_open IS NULL THEN 'Not found'
+            ELSE 'Already returned'
+        END AS outcome
+    FROM BatchReturn
+    ORDER BY position;
+
+    DROP TEMPORARY TABLE BatchReturn;
+END$$
+
+
+CREATE FUNCTION IsBookAvailable(
+    book_id_param VARCHAR(20)
+)
+RETURNS BOOLEAN
+NOT DETERMINISTIC
+READS SQL DATA
+BEGIN
+    DECLARE book_status VARCHAR(50);
+
+    SELECT status INTO book_status
+    FROM Book
+    WHERE book_id = book_id_param;
+
+    IF book_status = 'Available' THEN
+        RETURN TRUE;
+    ELSE
+        RETURN FALSE;
+    END IF;
+END$$
+
+
+CREATE FUNCTION GetMemberActiveLoanCount(
+    member_id_param VARCHAR(20)
+)
+RETURNS INT
+NOT DETERMINISTIC
+READS SQL DATA
+BEGIN
+    DECLARE loan_count INT;
+
+    SELECT active_loan_count
+    INTO loan_count
+    FROM Member
+    WHERE member_id = member_id_param;
+
+    RETURN COALESCE(loan_count, 0);
+END$$
+
+DELIMITER ;
+
+-- Count the loans that are already open
+CALL ReconcileActiveLoanCounts();
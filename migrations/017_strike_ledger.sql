@@ -0,0 +1,288 @@
+-- Strike ledger: strikes in the last 90 days drive queue priority, and counts can be rebuilt
+USE library_management_system;
+
+ALTER TABLE Member ADD COLUMN recent_strike_count INT DEFAULT 0 CHECK (recent_strike_count >= 0);  -- strikes in the last 90 days, used for priority
+ALTER TABLE PendingQueue RENAME COLUMN strike_count TO recent_strike_count;  -- idx_pendingqueue_priority follows the rename
+
+DELIMITER $$
+
+DROP TRIGGER IF EXISTS after_transaction_update_handle_return$$
+DROP TRIGGER IF EXISTS after_borrowrequest_insert_queue$$
+DROP TRIGGER IF EXISTS after_borrowrequest_update_queue$$
+DROP TRIGGER IF EXISTS after_member_update_queue$$
+DROP PROCEDURE IF EXISTS GetPrioritizedRequestList$$
+DROP PROCEDURE IF EXISTS GetPrioritizedRequestListTop$$
+DROP PROCEDURE IF EXISTS ProcessReturns$$
+
+-- Strike ledger. strike_count and recent_strike_count are bumped as strikes are
+-- issued; RefreshRecentStrikes ages strikes out of the 90-day window each day and
+-- ReconcileStrikeCounts rebuilds both counts from the Strike table.
+CREATE PROCEDURE RefreshRecentStrikes()
+BEGIN
+    UPDATE Member m
+    LEFT JOIN (
+        SELECT member_id, COUNT(*) AS recent_count
+        FROM Strike
+        WHERE strike_date > CURDATE() - INTERVAL 90 DAY
+        GROUP BY member_id
+    ) recent ON m.member_id = recent.member_id
+    SET m.recent_strike_count = COALESCE(recent.recent_count, 0)
+    WHERE m.recent_strike_count <> COALESCE(recent.recent_count, 0);
+END$$
+
+
+CREATE PROCEDURE ReconcileStrikeCounts()
+BEGIN
+    UPDATE Member m
+    LEFT JOIN (
+        SELECT
+            member_id,
+            COUNT(*) AS strike_total,
+            SUM(strike_date > CURDATE() - INTERVAL 90 DAY) AS recent_count
+        FROM Strike
+        GROUP BY member_id
+    ) ledger ON m.member_id = ledger.member_id
+    SET m.strike_count = COALESCE(ledger.strike_total, 0),
+        m.recent_strike_count = COALESCE(ledger.recent_count, 0)
+    WHERE m.strike_count <> COALESCE(ledger.strike_total, 0)
+       OR m.recent_strike_count <> COALESCE(ledger.recent_count, 0);
+
+    SELECT ROW_COUNT() AS members_corrected;
+END$$
+
+
+CREATE EVENT refresh_recent_strikes
+ON SCHEDULE EVERY 1 DAY STARTS CURRENT_DATE + INTERVAL 1 DAY
+DO CALL RefreshRecentStrikes()$$
+
+
+CREATE TRIGGER after_transaction_update_handle_return
+AFTER UPDATE ON Transaction
+FOR EACH ROW
+BEGIN
+    DECLARE requester_id VARCHAR(20);
+    DECLARE book_id_to_update VARCHAR(20);
+    DECLARE days_late INT;
+
+    -- ProcessReturns stamps return_batch in the same UPDATE and does this work set-based
+    IF OLD.return_date IS NULL AND NEW.return_date IS NOT NULL AND NEW.return_batch <=> OLD.return_batch THEN
+        SELECT br.member_id_requester, br.book_id
+        INTO requester_id, book_id_to_update
+        FROM BorrowRequest br
+        WHERE br.request_id = NEW.request_id;
+
+        UPDATE Book SET status = 'Available' WHERE book_id = book_id_to_update;
+        UPDATE Member SET active_loan_count = active_loan_count - 1 WHERE member_id = requester_id;
+
+        SET days_late = DATEDIFF(NEW.return_date, NEW.due_date);
+
+        IF days_late > 0 THEN
+            -- Dated by the return: a back-dated return outside the window isn't a recent strike
+            INSERT INTO Strike (member_id, transaction_id, strike_date, reason)
+            VALUES (requester_id, NEW.transaction_id, NEW.return_date, CONCAT('Returned ', days_late, ' days late.'));
+
+            UPDATE Member
+            SET strike_count = strike_count + 1,
+                recent_strike_count = recent_strike_count + (NEW.return_date > CURDATE() - INTERVAL 90 DAY)
+            WHERE member_id = requester_id;
+        END IF;
+    END IF;
+END$$
+
+
+-- PendingQueue maintenance. Rows cascaded by foreign keys don't fire triggers,
+-- which is why PendingQueue carries its own foreign keys.
+CREATE TRIGGER after_borrowrequest_insert_queue
+AFTER INSERT ON BorrowRequest
+FOR EACH ROW
+BEGIN
+    IF NEW.status = 'Pending' THEN
+        INSERT INTO PendingQueue (request_id, book_id, member_id, recent_strike_count, join_date, request_date)
+        SELECT NEW.request_id, NEW.book_id, m.member_id, m.recent_strike_count, m.join_date, NEW.request_date
+        FROM Member m
+        WHERE m.member_id = NEW.member_id_requester;
+    END IF;
+END$$
+
+
+CREATE TRIGGER after_borrowrequest_update_queue
+AFTER UPDATE ON BorrowRequest
+FOR EACH ROW
+BEGIN
+    IF OLD.status = 'Pending' THEN
+        DELETE FROM PendingQueue WHERE request_id = OLD.request_id;
+    END IF;
+
+    IF NEW.status = 'Pending' THEN
+        INSERT INTO PendingQueue (request_id, book_id, member_id, recent_strike_count, join_date, request_date)
+        SELECT NEW.request_id, NEW.book_id, m.member_id, m.recent_strike_count, m.join_date, NEW.request_date
+        FROM Member m
+        WHERE m.member_id = NEW.member_id_requester;
+    END IF;
+END$$
+
+
+CREATE TRIGGER after_member_update_queue
+AFTER UPDATE ON Member
+FOR EACH ROW
+BEGIN
+    IF NEW.recent_strike_count <> OLD.recent_strike_count OR NEW.join_date <> OLD.join_date THEN
+        UPDATE PendingQueue
+        SET recent_strike_count = NEW.recent_strike_count, join_date = NEW.join_date
+        WHERE member_id = NEW.member_id;
+    END IF;
+END$$
+
+
+CREATE PROCEDURE GetPrioritizedRequestList(
+    IN book_id_param VARCHAR(20)
+)
+BEGIN
+    SELECT
+        pq.request_id,
+        pq.request_date,
+        pq.member_id,
+        m.name AS requester_name,
+        pq.recent_strike_count,
+        pq.join_date
+    FROM
+        PendingQueue pq
+    JOIN
+        Member m ON pq.member_id = m.member_id
+    WHERE
+        pq.book_id = book_id_param
+    ORDER BY
+        pq.recent_strike_count ASC,
+        pq.join_date ASC,
+        pq.request_date ASC,
+        pq.request_id ASC;
+END$$
+
+
+-- First limit_param entries of a book's queue
+CREATE PROCEDURE GetPrioritizedRequestListTop(
+    IN book_id_param VARCHAR(20),
+    IN limit_param INT
+)
+BEGIN
+    SELECT
+        pq.request_id,
+        pq.request_date,
+        pq.member_id,
+        m.name AS requester_name,
+        pq.recent_strike_count,
+        pq.join_date
+    FROM
+        PendingQueue pq
+    JOIN
+        Member m ON pq.member_id = m.member_id
+    WHERE
+        pq.book_id = book_id_param
+    ORDER BY
+        pq.recent_strike_count ASC,
+        pq.join_date ASC,
+        pq.request_date ASC,
+        pq.request_id ASC
+    LIMIT limit_param;
+END$$
+
+
+-- Returns a batch of loans in one transaction. The loans are stamped with a
+-- return_batch ID in the same UPDATE that returns them, which tells the return
+-- trigger to leave them alone; books, strikes and strike counts are then
+-- updated with one statement each for the whole batch.
+CREATE PROCEDURE ProcessReturns(
+    IN transaction_ids_param JSON,
+    IN return_date_param DATE
+)
+BEGIN
+    DECLARE locked_count INT;
+    DECLARE returned_on DATE DEFAULT COALESCE(return_date_param, CURDATE());
+    DECLARE batch_id BIGINT UNSIGNED DEFAULT UUID_SHORT();
+
+    SELECT COUNT(*) INTO locked_count
+    FROM Transaction
+    WHERE transaction_id IN (
+        SELECT jt.transaction_id
+        FROM JSON_TABLE(transaction_ids_param, '$[*]' COLUMNS (transaction_id VARCHAR(20) PATH '$')) jt
+    )
+    FOR UPDATE;
+
+    DROP TEMPORARY TABLE IF EXISTS BatchReturn;
+    CREATE TEMPORARY TABLE BatchReturn (
+        position INT PRIMARY KEY,
+        transaction_id VARCHAR(20) NOT NULL,
+        was_open BOOLEAN,
+        member_id VARCHAR(20),
+        book_id VARCHAR(20),
+        days_late INT
+    );
+
+    INSERT INTO BatchReturn (position, transaction_id, was_open, member_id, book_id, days_late)
+    SELECT
+        jt.position,
+        jt.transaction_id,
+        t.return_date IS NULL,
+        br.member_id_requester,
+        br.book_id,
+        DATEDIFF(returned_on, t.due_date)
+    FROM JSON_TABLE(transaction_ids_param, '$[*]' COLUMNS (
+        position FOR ORDINALITY,
+        transaction_id VARCHAR(20) PATH '$'
+    )) jt
+    LEFT JOIN Transaction t ON t.transaction_id = jt.transaction_id
+    LEFT JOIN BorrowRequest br ON br.request_id = t.request_id;
+
+    UPDATE Transaction t
+    JOIN BatchReturn b ON t.transaction_id = b.transaction_id
+    SET t.return_date = returned_on,
+        t.return_batch = batch_id
+    WHERE b.was_open;
+
+    UPDATE Book bk
+    JOIN BatchReturn b ON bk.book_id = b.book_id
+    SET bk.status = 'Available'
+    WHERE b.was_open;
+
+    -- Dated by the return, like the trigger's strikes
+    INSERT INTO Strike (member_id, transaction_id, strike_date, reason)
+    SELECT member_id, transaction_id, returned_on, CONCAT('Returned ', days_late, ' days late.')
+    FROM BatchReturn
+    WHERE was_open AND days_late > 0
+    ORDER BY position;
+
+    -- One UPDATE for every member, however many of their loans came back
+    UPDATE Member m
+    JOIN (
+        SELECT member_id, COUNT(*) AS returned_count, SUM(days_late > 0) AS late_count
+        FROM BatchReturn
+        WHERE was_open
+        GROUP BY member_id
+    ) returned ON m.member_id = returned.member_id
+    SET m.active_loan_count = m.active_loan_count - returned.returned_count,
+        m.strike_count = m.strike_count + returned.late_count,
+        m.recent_strike_count = m.recent_strike_count + returned.late_count * (returned_on > CURDATE() - INTERVAL 90 DAY);
+
+    SELECT
+        transaction_id,
+        IF(was_open, GREATEST(days_late, 0), NULL) AS days_late,
+        CASE
+            WHEN was_open AND days_late > 0 THEN 'Returned late'
+            WHEN was_open THEN 'Returned'
+            WHEN was_open IS NULL THEN 'Not found'
+            ELSE 'Already returned'
+        END AS outcome
+    FROM BatchReturn
+    ORDER BY position;
+
+    DROP TEMPORARY TABLE BatchReturn;
+END$$
+
+DELIMITER ;
+
+CALL RefreshRecentStrikes();
+
+-- Queued requests still carry the lifetime strike count
+UPDATE PendingQueue pq
+JOIN Member m ON m.member_id = pq.member_id
+SET pq.recent_strike_count = m.recent_strike_count;
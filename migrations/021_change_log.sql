@@ -0,0 +1,96 @@
+-- Change log feeding the live tables
+USE library_management_system;
+
+-- Change feed: one row per insert/update/delete on the tables the app shows live.
+-- Readers poll for version > last seen, a range scan on the primary key.
+CREATE TABLE ChangeLog (
+    version BIGINT AUTO_INCREMENT PRIMARY KEY,
+    table_name VARCHAR(32) NOT NULL,
+    row_key VARCHAR(20) NOT NULL,
+    op CHAR(1) NOT NULL CHECK (op IN ('I', 'U', 'D')),
+    changed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_changelog_changed_at (changed_at)
+);
+
+DELIMITER $$
+
+-- Change feed triggers. Rows removed by a foreign key cascade don't fire these
+-- (e.g. loans deleted along with their member); screens catch up on Refresh.
+CREATE TRIGGER changelog_member_insert
+AFTER INSERT ON Member
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (table_name, row_key, op) VALUES ('Member', NEW.member_id, 'I');
+END$$
+
+
+CREATE TRIGGER changelog_member_update
+AFTER UPDATE ON Member
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (table_name, row_key, op) VALUES ('Member', NEW.member_id, 'U');
+END$$
+
+
+CREATE TRIGGER changelog_member_delete
+AFTER DELETE ON Member
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (table_name, row_key, op) VALUES ('Member', OLD.member_id, 'D');
+END$$
+
+
+CREATE TRIGGER changelog_book_insert
+AFTER INSERT ON Book
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (table_name, row_key, op) VALUES ('Book', NEW.book_id, 'I');
+END$$
+
+
+CREATE TRIGGER changelog_book_update
+AFTER UPDATE ON Book
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (table_name, row_key, op) VALUES ('Book', NEW.book_id, 'U');
+END$$
+
+
+CREATE TRIGGER changelog_book_delete
+AFTER DELETE ON Book
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (table_name, row_key, op) VALUES ('Book', OLD.book_id, 'D');
+END$$
+
+
+CREATE TRIGGER changelog_transaction_insert
+AFTER INSERT ON Transaction
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (table_name, row_key, op) VALUES ('Transaction', NEW.transaction_id, 'I');
+END$$
+
+
+CREATE TRIGGER changelog_transaction_update
+AFTER UPDATE ON Transaction
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (table_name, row_key, op) VALUES ('Transaction', NEW.transaction_id, 'U');
+END$$
+
+
+CREATE TRIGGER changelog_transaction_delete
+AFTER DELETE ON Transaction
+FOR EACH ROW
+BEGIN
+    INSERT INTO ChangeLog (table_name, row_key, op) VALUES ('Transaction', OLD.transaction_id, 'D');
+END$$
+
+
+-- ChangeLog only has to cover readers that fell behind, a day is plenty
+CREATE EVENT purge_change_log
+ON SCHEDULE EVERY 1 HOUR
+DO DELETE FROM ChangeLog WHERE changed_at < NOW() - INTERVAL 1 DAY$$
+
+DELIMITER ;
@@ -0,0 +1,99 @@
+import os
+import sys
+
+import pytest
+
+# Mini_project.py is a plain script at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Mini_project as app  # noqa: E402
+
+# Tests against MySQL run only when a password is given, and they write to the
+# database: point them at a scratch copy loaded from DBMS_MiniProject.sql
+MYSQL_USER = os.environ.get("LIBRARY_TEST_USER", "library_admin")
+MYSQL_PASSWORD = os.environ.get("LIBRARY_TEST_PASSWORD")
+
+
+@pytest.fixture(scope="session")
+def mysql_session():
+    """Logged-in admin session on the test database; skips when there is none"""
+    if not MYSQL_PASSWORD:
+        pytest.skip("set LIBRARY_TEST_PASSWORD to run tests against MySQL")
+    success, session = app.authenticate_user(MYSQL_USER, MYSQL_PASSWORD)
+    if not success:
+        pytest.skip(f"could not log in to MySQL as {MYSQL_USER}")
+    if not session['admin_id']:
+        pytest.skip(f"no Admin row is linked to {MYSQL_USER}")
+    return session
+
+
+class ScratchRows:
+    """Members and books added for one test, removed with everything cascaded from them
+
+    Scratch IDs start with X (XM..., XB..., XR..., XT...) so they can't clash
+    with the sample data.
+    """
+
+    def __init__(self, session):
+        self.session = session
+
+    def executemany(self, query, rows):
+        connection = app.get_session_connection(self.session)
+        cursor = connection.cursor()
+        try:
+            cursor.executemany(query, rows)
+            connection.commit()
+        finally:
+            cursor.close()
+            connection.close()
+        app.result_cache.invalidate(app.written_tables(query))
+
+    def members(self, count):
+        ids = [f"XM{n:06d}" for n in range(1, count + 1)]
+        self.executemany(
+            "INSERT INTO Member (member_id, name, phone, email, join_date) VALUES (%s, %s, '0000000000', %s, CURDATE())",
+            [(member_id, f"Scratch {member_id}", f"{member_id.lower()}@example.com") for member_id in ids]
+        )
+        return ids
+
+    def books(self, count, titles=None):
+        ids = [f"XB{n:06d}" for n in range(1, count + 1)]
+        titles = titles or [f"Scratch Book {book_id}" for book_id in ids]
+        self.executemany(
+            """INSERT INTO Book (book_id, author, title, edition, condition_val, status, purchase_date)
+               VALUES (%s, 'Scratch Author', %s, 'First', 'Good', 'Available', CURDATE())""",
+            list(zip(ids, titles))
+        )
+        return ids
+
+    def loans(self, members, books, due_date):
+        """One open loan per book, borrowed by the members in turn; returns the transaction IDs"""
+        requests = [(f"XR{n:07d}", members[n % len(members)], members[(n + 1) % len(members)], book_id)
+                    for n, book_id in enumerate(books, 1)]
+        self.executemany(
+            """INSERT INTO BorrowRequest (request_id, request_date, status, member_id_requester, member_id_owner, book_id)
+               VALUES (%s, CURDATE(), 'Completed', %s, %s, %s)""",
+            requests
+        )
+        transaction_ids = [f"XT{n:07d}" for n in range(1, len(books) + 1)]
+        self.executemany(
+            """INSERT INTO Transaction (transaction_id, borrow_date, due_date, request_id, admin_id)
+               VALUES (%s, %s - INTERVAL 14 DAY, %s, %s, %s)""",
+            [(transaction_id, due_date, due_date, request[0], self.session['admin_id'])
+             for transaction_id, request in zip(transaction_ids, requests)]
+        )
+        return transaction_ids
+
+    def cleanup(self):
+        for query in ("DELETE FROM Book WHERE book_id LIKE 'XB%'", "DELETE FROM Member WHERE member_id LIKE 'XM%'"):
+            app.execute_query(self.session, query, fetch=False)
+        app.invalidate_dashboard_cache()
+        app.clear_availability_cache()
+
+
+@pytest.fixture
+def scratch(mysql_session):
+    rows = ScratchRows(mysql_session)
+    rows.cleanup()  # left over from an interrupted run
+    yield rows
+    rows.cleanup()
@@ -0,0 +1,53 @@
+import Mini_project as app
+
+# Against MySQL (skipped unless LIBRARY_TEST_PASSWORD is set)
+LOAN_COUNT_QUERY = "SELECT GetMemberActiveLoanCount(%s) AS loans"
+
+INSERT_REQUEST = """
+    INSERT INTO BorrowRequest (request_id, request_date, status, member_id_requester, member_id_owner, book_id)
+    VALUES (%s, CURDATE(), 'Pending', %s, %s, %s)
+"""
+
+
+def loan_count(session, member_id):
+    return app.execute_query(session, LOAN_COUNT_QUERY, (member_id,))[0]['loans']
+
+
+def test_loan_count_follows_cascading_deletes(mysql_session, scratch):
+    members = scratch.members(2)
+    books = scratch.books(2)
+    scratch.loans(members, books, due_date="2026-01-10")
+    # The second member borrows the first member's copy of the first book, and the other way round
+    assert [loan_count(mysql_session, member) for member in members] == [1, 1]
+
+    # Book and member deletes cascade into Transaction without firing its triggers
+    message, *_ = app.delete_book(books[0], None, 1, app.SEARCH_PAGE_SIZE, "", mysql_session)
+    assert message == f"Deleted book: {books[0]}"
+    assert loan_count(mysql_session, members[1]) == 0
+
+    message, *_ = app.delete_member(members[1], None, 1, app.SEARCH_PAGE_SIZE, "", mysql_session)
+    assert message == f"Deleted member: {members[1]}"
+    assert loan_count(mysql_session, members[0]) == 0
+    assert app.reconcile_active_loan_counts(mysql_session) == 0
+
+
+def test_cached_loan_count_follows_approvals_and_returns(mysql_session, scratch):
+    borrower, owner = scratch.members(2)
+    book, = scratch.books(1)
+    scratch.executemany(INSERT_REQUEST, [("XR000001", borrower, owner, book)])
+    assert app.get_member_active_loans(borrower, mysql_session) == 0
+
+    app.approve_requests_batch(["XR000001"], "", mysql_session)
+    assert app.get_member_active_loans(borrower, mysql_session) == 1
+
+    transaction_id = app.execute_query(mysql_session, "SELECT transaction_id FROM Transaction WHERE request_id = 'XR000001'")
+    app.process_returns_batch(transaction_id[0]['transaction_id'], None, 'All', None, mysql_session)
+    assert app.get_member_active_loans(borrower, mysql_session) == 0
+
+
+def test_request_creation_rejects_unknown_ids(mysql_session, scratch):
+    member, owner = scratch.members(2)
+    book, = scratch.books(1)
+
+    assert app.create_borrow_request(member, owner, "XB999999", mysql_session)[0] == "Book XB999999 does not exist"
+    assert app.create_borrow_request("XM999999", owner, book, mysql_session)[0] == "Member XM999999 does not exist"
@@ -0,0 +1,297 @@
+import asyncio
+import copy
+import os
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+import pandas as pd
+import pytest
+
+import Mini_project as app
+
+# Benchmarks. Like every test using mysql_session, they are skipped unless
+# LIBRARY_TEST_PASSWORD is set, the ones that don't need MySQL included, so a
+# plain test run never fails on a busy machine; run with -s to see the timings:
+#   LIBRARY_TEST_PASSWORD=library123 python -m pytest -s tests/test_benchmarks.py
+benchmark = pytest.mark.skipif(not os.environ.get("LIBRARY_TEST_PASSWORD"),
+                               reason="set LIBRARY_TEST_PASSWORD to run the benchmarks")
+
+
+def best_of(runs, fn, *args):
+    """Fastest of `runs` timed calls, in seconds"""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def peak_allocation(fn, *args):
+    """Peak bytes allocated by one call"""
+    tracemalloc.start()
+    try:
+        fn(*args)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+# Building frames (no MySQL needed)
+FRAME_BENCH_ROWS = 100_000
+FRAME_COLUMNS = ['Member ID', 'Name', 'Email', 'Phone', 'Join Date', 'Strikes']
+
+
+def frame_rows():
+    """Rows shaped like the Members table, as the cursor returns them"""
+    joined = date(2020, 1, 1)
+    return [(f"M{n:06d}", f"Member {n}", f"member{n}@example.com", f"{n:010d}", joined + timedelta(days=n % 1000), n % 4)
+            for n in range(FRAME_BENCH_ROWS)]
+
+
+def frame_from_dicts(columns, rows):
+    """How tables were built before fetch_frame: one dict per row"""
+    return pd.DataFrame([dict(zip(columns, row)) for row in rows])
+
+
+def test_build_frame_matches_a_list_of_dicts():
+    rows = frame_rows()[:100]
+
+    pd.testing.assert_frame_equal(app.build_frame(FRAME_COLUMNS, rows), frame_from_dicts(FRAME_COLUMNS, rows))
+
+
+@benchmark
+def test_build_frame_beats_a_list_of_dicts():
+    rows = frame_rows()
+
+    records = best_of(5, app.build_frame, FRAME_COLUMNS, rows)
+    dicts = best_of(5, frame_from_dicts, FRAME_COLUMNS, rows)
+    records_peak = peak_allocation(app.build_frame, FRAME_COLUMNS, rows)
+    dicts_peak = peak_allocation(frame_from_dicts, FRAME_COLUMNS, rows)
+    print(f"{FRAME_BENCH_ROWS} rows: from_records {records * 1000:.0f} ms / {records_peak / 2**20:.1f} MiB, "
+          f"list of dicts {dicts * 1000:.0f} ms / {dicts_peak / 2**20:.1f} MiB")
+
+    assert records < dicts
+    assert records_peak < dicts_peak
+
+
+# Concurrent desks
+DESK_CALLS = 50
+
+
+def desks_throughput(session, desks):
+    """Calls per second with `desks` sessions each loading the Active Loans tab DESK_CALLS times"""
+    sessions = [copy.deepcopy(session) for _ in range(desks)]
+
+    def desk(desk_session):
+        for _ in range(DESK_CALLS):
+            assert app.get_active_loans('All', desk_session) is not None
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(desks) as pool:
+        list(pool.map(desk, sessions))
+    return desks * DESK_CALLS / (time.perf_counter() - start)
+
+
+def test_throughput_scales_with_concurrent_sessions(mysql_session):
+    throughput = {desks: desks_throughput(mysql_session, desks) for desks in (1, 5, 20)}
+    for desks, calls_per_second in throughput.items():
+        print(f"{desks:>3} desks: {calls_per_second:8.0f} calls/s")
+
+    assert throughput[20] > 1.5 * throughput[1]
+
+
+# Book search
+SEARCH_BENCH_BOOKS = 50_000
+SEARCH_WORDS = ["river", "shadow", "garden", "winter", "empire", "silver", "harbor", "forest", "letters", "stone"]
+
+# Book search before the FULLTEXT indexes: three leading-wildcard LIKEs
+LIKE_BOOK_SEARCH_QUERY = """
+    SELECT book_id as 'Book ID', title as 'Title', author as 'Author', 
+           edition as 'Edition', condition_val as 'Condition', status as 'Status'
+    FROM Book
+    WHERE book_id LIKE %s OR title LIKE %s OR author LIKE %s
+    ORDER BY book_id
+"""
+
+
+def test_fulltext_search_beats_like_scan(mysql_session, scratch):
+    # Every 100th title mentions the lighthouse, the rest are two common words
+    titles = [
+        f"The {SEARCH_WORDS[n % 10]} of the lighthouse" if n % 100 == 0 else f"{SEARCH_WORDS[n % 10]} {SEARCH_WORDS[n // 10 % 10]} {n}"
+        for n in range(1, SEARCH_BENCH_BOOKS + 1)
+    ]
+    scratch.books(SEARCH_BENCH_BOOKS, titles)
+    pattern = "%lighthouse%"
+
+    like = best_of(5, app.execute_query, mysql_session, LIKE_BOOK_SEARCH_QUERY, (pattern, pattern, pattern))
+    fulltext = best_of(5, app.ranked_search, mysql_session, "books", "lighthouse", 1, app.SEARCH_PAGE_SIZE)
+    print(f"LIKE scan {like * 1000:.1f} ms, FULLTEXT {fulltext * 1000:.1f} ms over {SEARCH_BENCH_BOOKS} books")
+
+    assert len(app.ranked_search(mysql_session, "books", "lighthouse", 1, app.SEARCH_PAGE_SIZE)) == app.SEARCH_PAGE_SIZE
+    assert fulltext < like
+
+
+# Pending request summary
+PENDING_BENCH_REQUESTS = 1_000_000
+
+# get_all_pending_requests before the grouped rewrite: a COUNT per pending row
+CORRELATED_PENDING_QUERY = """
+    SELECT DISTINCT br.book_id, b.title, b.author,
+           (SELECT COUNT(*) FROM BorrowRequest WHERE book_id = br.book_id AND status = 'Pending') as pending_count
+    FROM BorrowRequest br
+    JOIN Book b ON br.book_id = b.book_id
+    WHERE br.status = 'Pending'
+    ORDER BY br.book_id
+"""
+
+# One million requests over 1,000 scratch books and 100 members, 1% pending
+INSERT_BENCH_REQUESTS = """
+    INSERT INTO BorrowRequest (request_id, request_date, status, member_id_requester, member_id_owner, book_id)
+    WITH digits AS (
+        SELECT 0 AS d UNION ALL SELECT 1 UNION ALL SELECT 2 UNION ALL SELECT 3 UNION ALL SELECT 4
+        UNION ALL SELECT 5 UNION ALL SELECT 6 UNION ALL SELECT 7 UNION ALL SELECT 8 UNION ALL SELECT 9
+    ),
+    numbers AS (
+        SELECT a.d + 10 * b.d + 100 * c.d + 1000 * e.d + 10000 * f.d + 100000 * g.d AS n
+        FROM digits a, digits b, digits c, digits e, digits f, digits g
+    )
+    SELECT
+        CONCAT('XR', LPAD(n, 7, '0')),
+        CURDATE() - INTERVAL MOD(n, 365) DAY,
+        IF(MOD(n, 100) = 0, 'Pending', 'Completed'),
+        CONCAT('XM', LPAD(MOD(n, 100) + 1, 6, '0')),
+        CONCAT('XM', LPAD(MOD(n + 1, 100) + 1, 6, '0')),
+        CONCAT('XB', LPAD(MOD(n, 1000) + 1, 6, '0'))
+    FROM numbers
+    WHERE n < %s
+"""
+
+
+def pending_counts(rows):
+    return sorted((row['book_id'], row['pending_count']) for row in rows)
+
+
+def test_grouped_pending_summary_beats_correlated_count(mysql_session, scratch):
+    scratch.members(100)
+    scratch.books(1000)
+    assert app.execute_query(mysql_session, INSERT_BENCH_REQUESTS, (PENDING_BENCH_REQUESTS,), fetch=False)
+
+    correlated = best_of(3, app.execute_query, mysql_session, CORRELATED_PENDING_QUERY)
+    grouped = best_of(3, app.get_all_pending_requests, mysql_session)
+    print(f"correlated COUNT {correlated * 1000:.1f} ms, GROUP BY {grouped * 1000:.1f} ms "
+          f"over {PENDING_BENCH_REQUESTS} requests")
+
+    assert pending_counts(app.get_all_pending_requests(mysql_session)) == \
+        pending_counts(app.execute_query(mysql_session, CORRELATED_PENDING_QUERY))
+    assert grouped < correlated
+
+
+# Batch returns
+RETURN_BENCH_LOANS = 200
+
+
+def test_batch_return_beats_single_returns(mysql_session, scratch):
+    # Two sets of loans, half of each overdue, one returned singly and one as a batch
+    members = scratch.members(20)
+    books = scratch.books(2 * RETURN_BENCH_LOANS)
+    loans = scratch.loans(members, books, due_date=str(date.today()))
+    scratch.executemany("UPDATE Transaction SET due_date = due_date - INTERVAL 7 DAY WHERE transaction_id = %s",
+                        [(transaction_id,) for transaction_id in loans[::2]])
+    singles, batch = loans[:RETURN_BENCH_LOANS], loans[RETURN_BENCH_LOANS:]
+
+    start = time.perf_counter()
+    for transaction_id in singles:
+        app.process_return(transaction_id, 'All', None, mysql_session)
+    single = time.perf_counter() - start
+
+    start = time.perf_counter()
+    status, summary, _ = app.process_returns_batch(" ".join(batch), None, 'All', None, mysql_session)
+    batched = time.perf_counter() - start
+    print(f"{RETURN_BENCH_LOANS} single returns {single * 1000:.1f} ms, one batch {batched * 1000:.1f} ms")
+
+    assert status == f"Returned {RETURN_BENCH_LOANS} of {RETURN_BENCH_LOANS} loans, {RETURN_BENCH_LOANS // 2} late (strikes issued)"
+    assert batched < single
+
+
+# Sync vs async handlers
+SIMULATED_USERS = 100
+GRADIO_WORKER_THREADS = 40  # anyio's default thread limit, which Gradio runs sync handlers under
+SLOW_QUERY = "SELECT SLEEP(0.1) AS slept"
+
+
+async def simulated_users(slow_handler, quick_handler):
+    """Seconds for SIMULATED_USERS slow handlers, and how long one quick handler waited behind them"""
+    start = time.perf_counter()
+    users = [asyncio.ensure_future(slow_handler()) for _ in range(SIMULATED_USERS)]
+    await asyncio.sleep(0.01)  # let every user get its request in first
+    quick_start = time.perf_counter()
+    await quick_handler()
+    quick = time.perf_counter() - quick_start
+    assert all(result is not None for result in await asyncio.gather(*users))
+    return time.perf_counter() - start, quick
+
+
+async def sync_vs_async(session):
+    loop = asyncio.get_running_loop()
+    with ThreadPoolExecutor(GRADIO_WORKER_THREADS) as workers:
+        sync = await simulated_users(
+            lambda: loop.run_in_executor(workers, app.execute_query, session, SLOW_QUERY),
+            lambda: loop.run_in_executor(workers, app.parse_id_list, "T001 T002")
+        )
+
+    async def quick_async():
+        return app.parse_id_list("T001 T002")
+
+    try:
+        return sync, await simulated_users(lambda: app.execute_query_async(session, SLOW_QUERY), quick_async)
+    finally:
+        # The pool belongs to this event loop
+        pool = app._async_pools.pop((session['username'], session['password']), None)
+        if pool is not None:
+            pool.close()
+            await pool.wait_closed()
+
+
+def test_async_handlers_keep_workers_free(mysql_session):
+    if app.aiomysql is None:
+        pytest.skip("aiomysql is not installed")
+    (sync_total, sync_quick), (async_total, async_quick) = asyncio.run(sync_vs_async(mysql_session))
+    print(f"{SIMULATED_USERS} users: sync {sync_total * 1000:.0f} ms (quick handler waited {sync_quick * 1000:.1f} ms), "
+          f"async {async_total * 1000:.0f} ms (quick handler waited {async_quick * 1000:.1f} ms)")
+
+    # Both paths share POOL_SIZE connections, but only the sync one ties up a worker thread per query
+    assert async_total < 1.5 * sync_total
+    assert async_quick < sync_quick
+
+
+# Prepared statements
+PREPARED_BENCH_CALLS = 500
+PREPARE_COUNT_QUERY = "SHOW GLOBAL STATUS LIKE 'Com_stmt_prepare'"
+
+
+def statements_prepared(session):
+    return int(app.execute_query(session, PREPARE_COUNT_QUERY)[0]['Value'])
+
+
+def run_join_queries(session, prepared):
+    """The member requests and active loans joins, PREPARED_BENCH_CALLS times each"""
+    for n in range(PREPARED_BENCH_CALLS):
+        app.fetch_frame(session, app.MEMBER_REQUESTS_QUERY, (f"M{n % 12 + 1:03d}",), prepared=prepared)
+        app.fetch_frame(session, *app.build_active_loans_query('All'), prepared=prepared)
+
+
+def test_prepared_join_queries_skip_the_parse(mysql_session):
+    run_join_queries(mysql_session, True)  # every pooled connection has both statements now
+    before = statements_prepared(mysql_session)
+    prepared = best_of(3, run_join_queries, mysql_session, True)
+    prepares = statements_prepared(mysql_session) - before
+    text = best_of(3, run_join_queries, mysql_session, False)
+    print(f"{2 * PREPARED_BENCH_CALLS} join queries: prepared {prepared * 1000:.0f} ms ({prepares} prepares), "
+          f"text {text * 1000:.0f} ms")
+
+    # Reused handles: at most a late-opened pool connection prepares its own two
+    assert prepares <= 2 * app.POOL_SIZE
+    assert prepared < text
@@ -0,0 +1,162 @@
+import time
+
+import pytest
+
+import Mini_project as app
+
+SESSION = {'username': 'library_admin', 'password': 'pw'}
+
+
+class FakeChangeLog:
+    """ChangeLog entries the feed can see; every other query returns no rows"""
+
+    def __init__(self):
+        self.entries = {}  # {version: (table_name, row_key)}
+
+    def add(self, version, table_name="Member", row_key=None):
+        self.entries[version] = (table_name, row_key or f"M{version:03d}")
+
+    def execute_query(self, session, query, params=None, fetch=True, cache=False):
+        versions = sorted(self.entries)
+        if 'MIN(version)' in query:
+            return [{'oldest': versions[0] if versions else None, 'latest': versions[-1] if versions else None}]
+        if 'MAX(version)' in query:
+            return [{'version': versions[-1] if versions else 0}]
+        if 'FROM ChangeLog' in query:
+            after, *holes, limit = params
+            return [
+                {'version': version, 'table_name': self.entries[version][0], 'row_key': self.entries[version][1], 'op': 'U'}
+                for version in versions if version > after or version in holes
+            ][:limit]
+        return []
+
+
+@pytest.fixture
+def change_log(monkeypatch):
+    log = FakeChangeLog()
+    monkeypatch.setattr(app, "execute_query", log.execute_query)
+    return log
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def stop(feed):
+    feed.release(SESSION)
+    assert wait_for(lambda: feed._thread is None)
+
+
+def paused_feed(version, seconds):
+    """A feed that last polled at `version`, `seconds` ago"""
+    feed = app.ChangeFeed(poll_interval=0.01)
+    feed.version = version
+    feed._last_poll = time.monotonic() - seconds
+    return feed
+
+
+def test_resuming_after_purged_changes_sends_sessions_back_to_a_reload(change_log):
+    feed = paused_feed(10, app.CHANGE_LOG_RETENTION_SECONDS)
+    before = feed.position()
+    change_log.add(50)
+    change_log.add(80)
+
+    feed.ensure_running(SESSION)
+
+    assert wait_for(lambda: feed.position() == (1, 0))
+    stop(feed)
+    assert feed.version == 80
+    assert feed.changes_since(before) == ((1, 0), None)
+    assert feed.changes_since(feed.position()) == ((1, 0), {})
+
+
+def test_resuming_without_a_gap_keeps_the_position(change_log):
+    feed = paused_feed(10, app.CHANGE_LOG_RETENTION_SECONDS)
+    change_log.add(5)
+    change_log.add(10)
+
+    feed.ensure_running(SESSION)
+    time.sleep(0.05)
+    stop(feed)
+
+    assert feed.position() == (0, 0)
+    assert feed.changes_since((0, 0)) == ((0, 0), {})
+
+
+def test_missing_versions_after_a_short_pause_are_not_a_purge(change_log):
+    # Versions 11 and 12 were rolled back, nothing has been purged
+    feed = paused_feed(10, 60)
+    change_log.add(13)
+
+    feed.ensure_running(SESSION)
+
+    assert wait_for(lambda: feed.version == 13)
+    stop(feed)
+    assert feed.position() == (0, 1)
+    assert feed.changes_since((0, 0)) == ((0, 1), {'members': {'M013': None}})
+
+
+def test_version_committed_after_a_later_one_is_still_delivered(change_log):
+    feed = paused_feed(10, 0)
+    change_log.add(12)
+    feed.poll(SESSION)
+    assert (feed.version, sorted(feed._holes)) == (12, [11])
+
+    # The transaction holding version 11 commits after the poll read 12
+    change_log.add(11)
+    feed.poll(SESSION)
+
+    assert (feed.version, feed._holes) == (12, {})
+    assert feed.changes_since((0, 1)) == ((0, 2), {'members': {'M011': None}})
+
+
+def test_holes_are_given_up_after_a_while(monkeypatch, change_log):
+    feed = paused_feed(10, 0)
+    change_log.add(12)
+    feed.poll(SESSION)
+
+    monkeypatch.setattr(app, "CHANGE_HOLE_SECONDS", 0)
+    feed._holes = {version: time.monotonic() for version in feed._holes}
+    feed.poll(SESSION)
+
+    assert feed._holes == {}
+
+
+def test_holes_are_capped(monkeypatch, change_log):
+    monkeypatch.setattr(app, "CHANGE_HOLE_LIMIT", 3)
+    feed = paused_feed(10, 0)
+    change_log.add(20)
+
+    feed.poll(SESSION)
+
+    assert sorted(feed._holes) == [17, 18, 19]
+
+
+def test_poller_stops_on_logout_and_when_idle(change_log):
+    feed = app.ChangeFeed(poll_interval=0.01)
+
+    feed.ensure_running(SESSION)
+    feed.release(SESSION)
+    assert wait_for(lambda: feed._thread is None)
+
+    feed.ensure_running(SESSION)
+    assert feed._thread is not None
+    with feed._lock:
+        feed._last_demand = 0.0
+    assert wait_for(lambda: feed._thread is None)
+
+
+def test_poller_uses_the_latest_session_asking(change_log):
+    feed = app.ChangeFeed(poll_interval=0.01)
+    feed.ensure_running(SESSION)
+    other = {'username': 'library_user', 'password': 'pw'}
+
+    feed.ensure_running(other)
+    feed.release(SESSION)
+
+    assert feed._session == other
+    feed.release(other)
+    assert wait_for(lambda: feed._thread is None)
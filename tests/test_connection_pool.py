@@ -0,0 +1,164 @@
+import threading
+
+import pytest
+from mysql.connector import Error
+from mysql.connector.errors import PoolError
+
+import Mini_project as app
+
+
+class FakeConnection:
+    def __init__(self):
+        self.in_transaction = False
+        self.closed = False
+        self.fail_rollback = False
+        self.fail_ping = False
+
+    def rollback(self):
+        if self.fail_rollback:
+            raise Error("connection lost")
+        self.in_transaction = False
+
+    def ping(self, reconnect=False):
+        if self.fail_ping:
+            raise Error("gone away")
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def connections(monkeypatch):
+    made = []
+
+    def connect(**kwargs):
+        made.append(FakeConnection())
+        return made[-1]
+
+    monkeypatch.setattr(app.mysql.connector, "connect", connect)
+    return made
+
+
+def test_released_connection_is_reused(connections):
+    pool = app.ConnectionPool("user", "pw", size=2)
+
+    first = pool.get_connection()
+    raw = first._connection
+    first.close()
+    second = pool.get_connection()
+
+    assert second._connection is raw
+    assert len(connections) == 1
+    assert pool.stats()['checkouts'] == 2
+
+
+def test_open_transaction_is_rolled_back_on_release(connections):
+    pool = app.ConnectionPool("user", "pw")
+    connection = pool.get_connection()
+    connections[0].in_transaction = True
+
+    connection.close()
+
+    assert connections[0].in_transaction is False
+
+
+def test_unusable_connection_is_discarded(connections):
+    pool = app.ConnectionPool("user", "pw")
+    connection = pool.get_connection()
+    connections[0].in_transaction = True
+    connections[0].fail_rollback = True
+
+    connection.close()
+
+    assert connections[0].closed
+    assert pool.stats()['open'] == 0
+    pool.get_connection()
+    assert len(connections) == 2
+
+
+def test_checkout_times_out_when_the_pool_is_exhausted(connections):
+    pool = app.ConnectionPool("user", "pw", size=1, acquire_timeout=0.05)
+    pool.get_connection()
+
+    with pytest.raises(PoolError):
+        pool.get_connection()
+    assert pool.stats()['timeouts'] == 1
+
+
+def test_waiting_checkout_gets_the_released_connection(connections):
+    pool = app.ConnectionPool("user", "pw", size=1, acquire_timeout=5)
+    held = pool.get_connection()
+    got = []
+
+    waiter = threading.Thread(target=lambda: got.append(pool.get_connection()))
+    waiter.start()
+    held.close()
+    waiter.join(5)
+
+    assert got and got[0]._connection is connections[0]
+    assert len(connections) == 1
+
+
+def test_dead_idle_connection_is_replaced(connections):
+    pool = app.ConnectionPool("user", "pw", health_check_interval=0)
+    pool.get_connection().close()
+    connections[0].fail_ping = True
+
+    connection = pool.get_connection()
+
+    assert connection._connection is connections[1]
+    assert connections[0].closed
+    assert pool.stats()['reconnects'] == 1
+    assert pool.stats()['created'] == 2
+
+
+class FakeCursor:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def test_prepared_statements_survive_checkouts_until_discarded(connections, monkeypatch):
+    monkeypatch.setattr(FakeConnection, "cursor", lambda self, prepared=False: FakeCursor(), raising=False)
+    pool = app.ConnectionPool("user", "pw")
+
+    first = pool.get_connection()
+    cursor = first.prepared_cursor("SELECT 1")
+    first.close()
+    second = pool.get_connection()
+    assert second.prepared_cursor("SELECT 1") is cursor
+
+    second.discard_statement("SELECT 1")
+    assert cursor.closed
+    assert second.prepared_cursor("SELECT 1") is not cursor
+    assert pool.stats()['statements_prepared'] == 2
+    assert pool.stats()['statements_reused'] == 1
+
+
+def test_least_recently_used_statement_is_closed(connections, monkeypatch):
+    monkeypatch.setattr(FakeConnection, "cursor", lambda self, prepared=False: FakeCursor(), raising=False)
+    pool = app.ConnectionPool("user", "pw", max_statements=2)
+    connection = pool.get_connection()
+
+    oldest = connection.prepared_cursor("SELECT 1")
+    connection.prepared_cursor("SELECT 2")
+    connection.prepared_cursor("SELECT 3")
+
+    assert oldest.closed
+
+
+def test_failed_prepared_query_is_not_reused(connections, monkeypatch):
+    class FailingCursor(FakeCursor):
+        def execute(self, query, params=()):
+            raise Error("Unknown column")
+
+    monkeypatch.setattr(FakeConnection, "cursor", lambda self, prepared=False: FailingCursor(), raising=False)
+    pool = app.ConnectionPool("user", "pw")
+    monkeypatch.setattr(app, "get_session_connection", lambda session: pool.get_connection())
+
+    assert app.fetch_frame({}, "SELECT bad FROM Book", prepared=True) is None
+
+    connection = pool.get_connection()
+    assert pool._statements[connection._connection] == {}
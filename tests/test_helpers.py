@@ -0,0 +1,185 @@
+import pandas as pd
+import pytest
+
+import Mini_project as app
+
+
+# Batch ID lists
+def test_parse_id_list_splits_on_any_separator_and_drops_duplicates():
+    assert app.parse_id_list("BR001, BR002\nBR003;BR001  BR004") == ["BR001", "BR002", "BR003", "BR004"]
+    assert app.parse_id_list("") == []
+    assert app.parse_id_list(None) == []
+
+
+# Search
+def test_fulltext_query_requires_every_word_as_a_prefix():
+    assert app.build_fulltext_query("great gatsby") == "+great* +gatsby*"
+
+
+def test_fulltext_query_skips_short_words_and_punctuation():
+    assert app.build_fulltext_query("to kill a mockingbird!") == "+kill* +mockingbird*"
+    assert app.build_fulltext_query("a b") == ""
+
+
+def test_fulltext_query_leaves_out_stopwords():
+    assert app.build_fulltext_query("The Hobbit") == "+Hobbit*"
+    assert app.build_fulltext_query("lord of the rings") == "+lord* +rings*"
+
+
+def test_search_of_only_stopwords_scans_for_the_text():
+    query, params = app.build_ranked_search_query('books', "The It")
+
+    assert "MATCH" not in query
+    assert "title LIKE %s OR author LIKE %s" in query
+    assert params[:3] == ("The It%", "%The It%", "%The It%")
+
+
+def test_id_prefix_escapes_like_wildcards():
+    _, params = app.build_ranked_search_query('books', "B_0%")
+
+    assert params[0] == "B\\_0\\%%"
+
+
+# Keyset paging
+def test_composite_keyset_is_spelled_out_so_mysql_can_range_scan():
+    query, params = app.build_table_query('available_books', after=('Dune', 'B007'))
+
+    assert "WHERE status = 'Available' AND (title > %s OR (title = %s AND book_id > %s))" in query
+    assert params == ('Dune', 'Dune', 'B007')
+
+
+def test_single_key_keyset_follows_the_sort_direction():
+    assert app.build_keyset_condition(['member_id'], ('M010',)) == ("member_id > %s", ('M010',))
+    assert app.build_keyset_condition(['s.strike_id'], (42,), descending=True) == ("s.strike_id < %s", (42,))
+
+
+@pytest.fixture
+def fake_pages(monkeypatch):
+    """Serve numbered one-row pages and a fixed total instead of querying"""
+    monkeypatch.setattr(app, "fetch_table_page", lambda table_key, after, page_size, session: (
+        pd.DataFrame({"Key": [(after or 0) + 1]}), (after or 0) + 1
+    ))
+    monkeypatch.setattr(app, "execute_query", lambda session, query, *args, **kwargs: [{'count': 10}])
+
+
+def test_page_state_is_kept_per_table_and_replaced_when_stale(fake_pages):
+    session = app.new_session()
+    app.load_table_page('members', 3, 1, session)
+    app.load_table_page('books', 1, 1, session)
+    members = session['pages']['members']
+
+    assert members['keys'] == {1: {1: 1, 2: 2, 3: 3}} and members['total'] == 10
+    assert session['pages']['books']['keys'] == {1: {1: 1}}
+
+    app.result_cache.invalidate(['Member'])
+    app.load_table_page('members', 1, 1, session)
+
+    # A load still holding the old entry writes there, not into the fresh one
+    assert session['pages']['members'] is not members
+    assert session['pages']['members']['keys'] == {1: {1: 1}}
+    assert members['keys'] == {1: {1: 1, 2: 2, 3: 3}}
+
+
+# Live table patches
+def loans():
+    return pd.DataFrame({
+        "Transaction ID": ["T001", "T002", "T003"],
+        "Due Date": ["2026-01-03", "2026-01-01", "2026-01-05"],
+    })
+
+
+def test_row_diffs_update_remove_and_skip_unseen_rows():
+    patched = app.apply_row_diffs(loans(), {
+        "T001": {"Transaction ID": "T001", "Due Date": "2026-02-01"},
+        "T002": None,
+        "T009": {"Transaction ID": "T009", "Due Date": "2026-01-02"},
+    }, "Transaction ID")
+
+    assert patched["Transaction ID"].tolist() == ["T001", "T003"]
+    assert patched["Due Date"].tolist() == ["2026-02-01", "2026-01-05"]
+
+
+def test_row_diffs_insert_and_sort_when_asked():
+    patched = app.apply_row_diffs(loans(), {
+        "T009": {"Transaction ID": "T009", "Due Date": "2026-01-02"},
+    }, "Transaction ID", inserts=True, sort_by="Due Date")
+
+    assert patched["Transaction ID"].tolist() == ["T002", "T009", "T001", "T003"]
+
+
+def test_row_diffs_report_no_change():
+    assert app.apply_row_diffs(loans(), {"T009": None}, "Transaction ID") is None
+    assert app.apply_row_diffs(loans(), {}, "Transaction ID") is None
+    assert app.apply_row_diffs(pd.DataFrame(), {"T001": None}, "Transaction ID") is None
+
+
+def test_live_rows_of_a_filtered_view_keep_its_filter():
+    query = app.build_live_rows_query('available_books', 2)
+
+    assert "status = 'Available' AND book_id IN (%s, %s)" in query
+
+
+def test_live_dashboard_only_sends_new_numbers(monkeypatch):
+    stats = (5, 10, 2, 1, 0, 1)
+    monkeypatch.setattr(app, "get_dashboard_stats", lambda session: stats)
+    session = app.new_session()
+
+    assert app.live_dashboard(session) == stats
+    assert app.live_dashboard(session) == (app.gr.update(),) * len(stats)
+
+
+# Bulk import validation
+DEFAULTS = {'edition': 'First', 'condition_val': 'Good', 'status': 'Available', 'purchase_date': '2026-01-01'}
+
+
+def validate_book(**row):
+    return app.validate_import_row(app.IMPORT_SPECS['books'], row, DEFAULTS)
+
+
+def test_import_row_fills_defaults_in_insert_order():
+    values, reason = validate_book(book_id="B100", title="Dune", author="Frank Herbert")
+
+    assert reason is None
+    assert values == ("B100", "Dune", "Frank Herbert", "First", "Good", "Available", "2026-01-01")
+
+
+def test_import_row_rejections():
+    assert validate_book(book_id="B100", author="X")[1] == "missing title"
+    assert validate_book(book_id="B100", title="T", author="A", status="Lost")[1].startswith("status must be one of")
+    assert validate_book(book_id="B" * 21, title="T", author="A")[1] == "book_id longer than 20 characters"
+    assert validate_book(book_id="B100", title="T", author="A", purchase_date="01/02/2026")[1] == \
+        "purchase_date must be a YYYY-MM-DD date"
+
+
+def test_parquet_import_keeps_dates_and_literal_text(tmp_path):
+    import datetime
+
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    path = tmp_path / "books.parquet"
+    pq.write_table(pa.table({
+        "book_id": ["B100", "B101"],
+        "title": ["None", None],
+        "edition": [2, None],
+        "purchase_date": [datetime.date(2026, 1, 2), None],
+        "added_at": [datetime.datetime(2026, 1, 3, 14, 30), None],
+    }), path)
+
+    chunk = next(app.read_import_chunks(str(path)))
+
+    assert chunk.to_dict("records") == [
+        {"book_id": "B100", "title": "None", "edition": "2", "purchase_date": "2026-01-02", "added_at": "2026-01-03"},
+        {"book_id": "B101", "title": "", "edition": "", "purchase_date": "", "added_at": ""},
+    ]
+
+
+# Query plan checks
+def test_explain_covers_the_feed_and_cache_lookups_with_matching_params():
+    queries = {name: (query, params) for name, query, params in app.collect_explain_queries()}
+
+    for name in ("change log", "change log with holes", "book_status lookup", "member_loans lookup",
+                 "loan parties by Transaction", "available_books live rows", "loans live rows"):
+        assert name in queries
+    for name, (query, params) in queries.items():
+        assert query.count("%s") == len(params), name
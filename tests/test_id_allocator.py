@@ -0,0 +1,123 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import Mini_project as app
+
+
+# Unit tests: BlockSource stands in for AllocateIds, so these only cover
+# IdAllocator's locking and block arithmetic
+class BlockSource:
+    """Stands in for the AllocateIds procedure: hands out consecutive blocks under a lock"""
+
+    def __init__(self, block_size, first=1):
+        self.block_size = block_size
+        self.next_value = first
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, session):
+        with self._lock:
+            first = self.next_value
+            self.next_value += self.block_size
+            self.calls += 1
+        time.sleep(0.001)  # widen the window for racing allocators
+        return first
+
+
+def make_allocator(block_size=5, first=1):
+    allocator = app.IdAllocator('BorrowRequest', 'BR', block_size=block_size)
+    source = BlockSource(block_size, first)
+    allocator._reserve_block = source
+    return allocator, source
+
+
+def test_concurrent_allocations_never_share_an_id():
+    allocator, source = make_allocator(block_size=5)
+    ids = []
+    ids_lock = threading.Lock()
+    start = threading.Barrier(16)
+
+    def allocate():
+        start.wait()
+        for _ in range(50):
+            new_id = allocator.next_id(session=None)
+            with ids_lock:
+                ids.append(new_id)
+
+    threads = [threading.Thread(target=allocate) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert None not in ids
+    assert len(ids) == 16 * 50
+    assert len(set(ids)) == len(ids)
+    assert source.calls == len(ids) // 5
+
+
+def test_two_processes_sharing_the_sequence_get_disjoint_ids():
+    # Two allocators over one sequence, like two app processes
+    source = BlockSource(block_size=3)
+    first, second = (app.IdAllocator('Transaction', 'T', block_size=3) for _ in range(2))
+    first._reserve_block = second._reserve_block = source
+
+    ids = [allocator.next_id(None) for _ in range(7) for allocator in (first, second)]
+
+    assert len(set(ids)) == len(ids)
+
+
+def test_ids_widen_past_the_padding_instead_of_truncating():
+    allocator, _ = make_allocator(block_size=2, first=999)
+
+    assert [allocator.next_id(None) for _ in range(3)] == ['BR999', 'BR1000', 'BR1001']
+
+
+def test_failed_reservation_returns_none_and_retries():
+    allocator = app.IdAllocator('BorrowRequest', 'BR', block_size=2)
+    results = iter([None, 7])
+    allocator._reserve_block = lambda session: next(results)
+
+    assert allocator.next_id(None) is None
+    assert allocator.next_id(None) == 'BR007'
+
+
+# Against MySQL (skipped unless LIBRARY_TEST_PASSWORD is set): the Python
+# allocator and ApproveBorrowRequestEx draw from the same IdSequence rows at once
+def approve(session, request_id):
+    results = app.call_procedure(session, 'ApproveBorrowRequestEx', (request_id, session['admin_id'], None))
+    return results[0]['transaction_id'] if results else None
+
+
+def test_python_and_procedure_allocations_never_collide(mysql_session, scratch):
+    members = scratch.members(4)
+    books = scratch.books(40)
+    request_ids = app.IdAllocator('BorrowRequest', 'BR', block_size=3)
+
+    def create_request(index):
+        request_id = request_ids.next_id(mysql_session)
+        created = app.execute_query(mysql_session, """
+            INSERT INTO BorrowRequest (request_id, request_date, status, member_id_requester, member_id_owner, book_id)
+            VALUES (%s, CURDATE(), 'Pending', %s, %s, %s)
+        """, (request_id, members[index % 4], members[(index + 1) % 4], books[index]), fetch=False)
+        return request_id if created else None
+
+    with ThreadPoolExecutor(8) as pool:
+        requests = list(pool.map(create_request, range(len(books))))
+    assert None not in requests
+    assert len(set(requests)) == len(requests)
+
+    # Every request is approved twice at once while a second allocator, like
+    # another app process, takes Transaction IDs from the same sequence
+    transaction_ids = app.IdAllocator('Transaction', 'T', block_size=2)
+    with ThreadPoolExecutor(16) as pool:
+        approvals = [(request_id, pool.submit(approve, mysql_session, request_id)) for request_id in requests * 2]
+        draws = [pool.submit(transaction_ids.next_id, mysql_session) for _ in range(60)]
+        approved = [(request_id, future.result()) for request_id, future in approvals]
+        drawn = [future.result() for future in draws]
+
+    approved_ids = [transaction_id for _, transaction_id in approved if transaction_id]
+    assert sorted(request_id for request_id, transaction_id in approved if transaction_id) == sorted(requests)
+    assert None not in drawn
+    assert len(set(approved_ids) | set(drawn)) == len(approved_ids) + len(drawn)
@@ -0,0 +1,83 @@
+import pandas as pd
+import pytest
+
+import Mini_project as app
+
+
+def members(*ids):
+    return pd.DataFrame({"Member ID": list(ids), "Name": [f"name {member_id}" for member_id in ids]})
+
+
+@pytest.fixture
+def live_rows(monkeypatch):
+    """Rows fetch_live_rows returns, keyed by member ID; missing keys were deleted"""
+    rows = {}
+    monkeypatch.setattr(app, "fetch_live_rows", lambda view, keys, session: {
+        key: rows[key] for key in keys if key in rows
+    })
+    return rows
+
+
+@pytest.fixture
+def session():
+    session = app.new_session()
+    session['change_version'] = app.change_feed.position()
+    return session
+
+
+def add(live_rows, member_id):
+    live_rows[member_id] = {"Member ID": member_id, "Name": f"name {member_id}"}
+
+
+def test_new_row_inside_the_page_range_is_inserted_and_the_page_trimmed(live_rows, session):
+    add(live_rows, "M003")
+
+    table, page, info = app.patch_page('members', members("M002", "M004", "M006"), ["M003"], 2, 3, session)
+
+    assert table["Member ID"].tolist() == ["M002", "M003", "M004"]
+    assert (page, info) == (app.gr.update(), app.gr.update())
+
+
+def test_new_row_belonging_to_another_page_is_left_out(live_rows, session):
+    add(live_rows, "M009")
+    add(live_rows, "M001")
+
+    assert app.patch_page('members', members("M002", "M004", "M006"), ["M009"], 2, 3, session)[0] == app.gr.update()
+    assert app.patch_page('members', members("M002", "M004", "M006"), ["M001"], 2, 3, session)[0] == app.gr.update()
+
+
+def test_new_row_is_appended_to_a_last_page_with_room(live_rows, session):
+    add(live_rows, "M013")
+
+    table = app.patch_page('members', members("M011", "M012"), ["M013"], 3, 5, session)[0]
+
+    assert table["Member ID"].tolist() == ["M011", "M012", "M013"]
+
+
+def test_deleted_row_is_removed(live_rows, session):
+    table = app.patch_page('members', members("M002", "M004"), ["M004"], 1, 5, session)[0]
+
+    assert table["Member ID"].tolist() == ["M002"]
+
+
+def test_session_behind_the_feed_reloads_page_one(monkeypatch, live_rows, session):
+    session['change_version'] = (99, 99)
+    monkeypatch.setattr(app, "load_table_page",
+                        lambda table_key, page, page_size, session: ("first page", page, "Page 1 of 4"))
+
+    assert app.patch_page('members', members("M050"), ["M001"], 3, 25, session) == ("first page", 1, "Page 1 of 4")
+
+
+def test_search_results_are_searched_again_rather_than_patched(monkeypatch, live_rows, session):
+    add(live_rows, "M003")
+    searches = []
+    monkeypatch.setattr(app, "ranked_search", lambda session, view, term, page, page_size: (
+        searches.append((view, term, page, page_size)) or members("M007", "M003")
+    ))
+
+    table, page, info = app.patch_page('members', members("M007"), ["M003"], 2, 25, session, search_term="smith")
+
+    # Relevance order is kept and the pager stays on the search's page
+    assert table["Member ID"].tolist() == ["M007", "M003"]
+    assert searches == [('members', "smith", 2, 25)]
+    assert (page, info) == (app.gr.update(), app.gr.update())
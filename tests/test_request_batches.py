@@ -0,0 +1,76 @@
+import json
+from datetime import date, timedelta
+
+import Mini_project as app
+
+# Against MySQL (skipped unless LIBRARY_TEST_PASSWORD is set)
+INSERT_REQUEST = """
+    INSERT INTO BorrowRequest (request_id, request_date, status, member_id_requester, member_id_owner, book_id)
+    VALUES (%s, CURDATE(), 'Pending', %s, %s, %s)
+"""
+
+OPEN_LOANS_QUERY = """
+    SELECT br.book_id, COUNT(*) AS loans
+    FROM Transaction t
+    JOIN BorrowRequest br ON t.request_id = br.request_id
+    WHERE br.book_id IN (%s, %s) AND t.return_date IS NULL
+    GROUP BY br.book_id
+"""
+
+
+def test_batch_approval_lends_each_book_once(mysql_session, scratch):
+    members = scratch.members(4)
+    first_book, second_book = scratch.books(2)
+    requests = [
+        ("XR000001", members[0], members[3], first_book),
+        ("XR000002", members[1], members[3], first_book),
+        ("XR000003", members[2], members[3], first_book),
+        ("XR000004", members[0], members[3], second_book),
+    ]
+    scratch.executemany(INSERT_REQUEST, requests)
+
+    message, summary = app.approve_requests_batch([request[0] for request in requests], "", mysql_session)
+
+    assert summary["Outcome"].tolist() == ["Approved", "Book not available", "Book not available", "Approved"]
+    assert message == "Approved 2 of 4 requests"
+    loans = app.execute_query(mysql_session, OPEN_LOANS_QUERY, (first_book, second_book))
+    assert {row['book_id']: row['loans'] for row in loans} == {first_book: 1, second_book: 1}
+
+    # The book is lent now, so the requests left pending still can't be approved
+    _, summary = app.approve_requests_batch(["XR000002"], "", mysql_session)
+    assert summary["Outcome"].tolist() == ["Book not available"]
+
+
+def test_batch_return_frees_books_and_dates_strikes_by_the_return(mysql_session, scratch):
+    members = scratch.members(2)
+    books = scratch.books(3)
+    loans = scratch.loans(members, books, due_date="2026-01-10")
+
+    results = app.call_procedure(mysql_session, 'ProcessReturns', (json.dumps(loans), "2026-01-12"))
+
+    assert [row['outcome'] for row in results] == ["Returned late"] * 3
+    statuses = app.execute_query(mysql_session, "SELECT DISTINCT status FROM Book WHERE book_id LIKE 'XB%'")
+    assert [row['status'] for row in statuses] == ["Available"]
+    strikes = app.execute_query(mysql_session, "SELECT strike_date FROM Strike WHERE transaction_id LIKE 'XT%'")
+    assert [str(row['strike_date']) for row in strikes] == ["2026-01-12"] * 3
+
+
+def test_batch_return_issues_strikes_and_counts_once_per_late_loan(mysql_session, scratch):
+    members = scratch.members(2)
+    loans = scratch.loans(members, scratch.books(3), due_date=str(date.today() - timedelta(days=5)))
+
+    results = app.call_procedure(mysql_session, 'ProcessReturns', (json.dumps(loans), None))
+
+    assert [row['days_late'] for row in results] == [5, 5, 5]
+    strikes = app.execute_query(
+        mysql_session, "SELECT member_id, transaction_id FROM Strike WHERE member_id LIKE 'XM%' ORDER BY transaction_id"
+    )
+    # The loans go to the members in turn, starting with the second
+    assert [(row['member_id'], row['transaction_id']) for row in strikes] == [
+        (members[1], loans[0]), (members[0], loans[1]), (members[1], loans[2])
+    ]
+    counts = app.execute_query(
+        mysql_session,
+        "SELECT member_id, strike_count, recent_strike_count FROM Member WHERE member_id LIKE 'XM%' ORDER BY member_id"
+    )
+    assert [(row['strike_count'], row['recent_strike_count']) for row in counts] == [(1, 1), (2, 2)]
@@ -0,0 +1,105 @@
+import Mini_project as app
+
+
+def read_into(cache, key, tables, result, during_read=None):
+    versions = cache.versions(tables)
+    if during_read:
+        during_read()
+    cache.put(key, result, versions)
+
+
+def test_cached_result_is_served_until_a_table_it_read_is_written():
+    cache = app.ResultCache()
+    read_into(cache, "strikes", {"Strike", "Member"}, [1, 2])
+
+    assert cache.get("strikes") == [1, 2]
+    cache.invalidate(["Book"])
+    assert cache.get("strikes") == [1, 2]
+    cache.invalidate(["Strike"])
+    assert cache.get("strikes") is None
+
+
+def test_writes_invalidate_tables_changed_by_triggers():
+    cache = app.ResultCache()
+    read_into(cache, "queue", {"PendingQueue"}, [1])
+
+    cache.invalidate(["Transaction"])
+
+    assert cache.get("queue") is None
+
+
+def test_result_read_while_a_write_lands_is_not_cached():
+    cache = app.ResultCache()
+    read_into(cache, "books", {"Book"}, [1], during_read=lambda: cache.invalidate(["Book"]))
+
+    assert cache.get("books") is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = app.ResultCache(max_entries=2)
+    read_into(cache, "a", {"Book"}, [1])
+    read_into(cache, "b", {"Book"}, [2])
+    cache.get("a")
+    read_into(cache, "c", {"Book"}, [3])
+
+    assert cache.get("b") is None
+    assert cache.get("a") == [1]
+    assert cache.evictions == 1
+
+
+def test_large_results_are_not_cached():
+    cache = app.ResultCache(max_rows=2)
+    read_into(cache, "big", {"Book"}, [1, 2, 3])
+
+    assert cache.get("big") is None
+
+
+def test_unknown_write_drops_everything():
+    cache = app.ResultCache()
+    read_into(cache, "a", {"Book"}, [1])
+    before = cache.versions({"Book"})
+
+    cache.invalidate(None)
+
+    assert cache.get("a") is None
+    assert cache.versions({"Book"}) != before
+
+
+def test_hit_and_miss_counters_are_rendered():
+    cache = app.ResultCache()
+    cache.get("missing")
+    read_into(cache, "a", {"Book"}, [1])
+    cache.get("a")
+
+    lines = cache.render()
+
+    assert 'library_result_cache_requests_total{result="hit"} 1' in lines
+    assert 'library_result_cache_requests_total{result="miss"} 1' in lines
+
+
+def test_read_and_written_tables_are_parsed_from_sql():
+    assert app.read_tables("SELECT * FROM Strike s JOIN Member m ON s.member_id = m.member_id") == {"Strike", "Member"}
+    assert app.written_tables("UPDATE Book SET status = %s") == ("Book",)
+    assert app.written_tables("INSERT IGNORE INTO Member VALUES (%s)") == ("Member",)
+    assert app.written_tables("SET @position = 0") is None
+
+
+def test_deletes_invalidate_every_table_the_foreign_keys_cascade_into():
+    assert set(app.written_tables("DELETE FROM Book WHERE book_id = %s")) >= {
+        "Book", "BorrowRequest", "Transaction", "Strike", "PendingQueue"
+    }
+    assert set(app.written_tables("DELETE FROM Member WHERE member_id = %s")) >= {
+        "Member", "BorrowRequest", "Transaction", "Strike", "PendingQueue"
+    }
+
+    cache = app.ResultCache()
+    read_into(cache, "strikes", {"Strike", "Member"}, [1])
+    read_into(cache, "loans", {"Transaction", "BorrowRequest", "Member", "Book"}, [2])
+    cache.invalidate(app.written_tables("DELETE FROM Book WHERE book_id = %s"))
+
+    assert cache.get("strikes") is None
+    assert cache.get("loans") is None
+
+
+def test_quoted_column_labels_are_not_read_as_tables():
+    assert app.read_tables("SELECT join_date as 'Join Date' FROM Member") == {"Member"}
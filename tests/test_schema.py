@@ -0,0 +1,55 @@
+import os
+import re
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MIGRATIONS = sorted(os.listdir(os.path.join(ROOT, "migrations")))
+
+# Defined by the original script and never changed since
+ORIGINAL = {"Member", "Book", "Category", "Wishlist", "CategorisedAs", "BorrowRequest", "Admin", "Transaction",
+            "Feedback", "Reviews", "Strike", "DenyBorrowRequest"}
+
+DEFINITION = re.compile(
+    r"^CREATE (TRIGGER|PROCEDURE|FUNCTION|EVENT) (\w+).*?\$\$$|^CREATE (?:FULLTEXT )?(INDEX) (\w+) .*?;|^CREATE (TABLE) (\w+) .*?\n\);",
+    re.MULTILINE | re.DOTALL
+)
+ADD_COLUMN = re.compile(r"^ALTER TABLE (\w+) ADD COLUMN (.*?);", re.MULTILINE)
+
+
+def read(*path):
+    with open(os.path.join(ROOT, *path), encoding="utf-8") as f:
+        return f.read()
+
+
+def definitions(script):
+    """{name: (kind, statement)} for the tables, indexes and stored objects a script creates"""
+    found = {}
+    for match in DEFINITION.finditer(script):
+        kind, name = next((match.group(i), match.group(i + 1)) for i in (1, 3, 5) if match.group(i))
+        found[name] = (kind, match.group(0))
+    return found
+
+
+def test_migrations_create_everything_added_since_the_original_script():
+    schema = definitions(read("DBMS_MiniProject.sql"))
+    created = set().union(*(definitions(read("migrations", name)) for name in MIGRATIONS))
+
+    assert set(schema) - created == ORIGINAL
+
+
+def test_last_migration_to_define_an_object_matches_the_schema():
+    schema = definitions(read("DBMS_MiniProject.sql"))
+    latest = {}
+    for name in MIGRATIONS:
+        latest.update(definitions(read("migrations", name)))
+
+    for name, (kind, statement) in latest.items():
+        if kind != "TABLE":  # tables changed later are altered, not created again
+            assert statement == schema[name][1], name
+
+
+def test_added_columns_match_the_schema():
+    schema = read("DBMS_MiniProject.sql")
+    for name in MIGRATIONS:
+        for table, column in ADD_COLUMN.findall(read("migrations", name)):
+            create_table = re.search(rf"^CREATE TABLE {table} \(.*?\n\);", schema, re.MULTILINE | re.DOTALL).group(0)
+            assert f"\n    {column}" in create_table, (name, column)
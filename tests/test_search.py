@@ -0,0 +1,18 @@
+import Mini_project as app
+
+# Against MySQL (skipped unless LIBRARY_TEST_PASSWORD is set)
+
+
+def found_scratch_titles(session, term):
+    """Titles of the scratch books a book search finds, leaving out the sample data"""
+    results = app.ranked_search(session, 'books', term, 1, 100)
+    return sorted(results[results['Book ID'].str.startswith("XB")]['Title'])
+
+
+def test_titles_starting_with_a_stopword_are_found(mysql_session, scratch):
+    scratch.books(3, ["The Hobbit", "The Hobbit Companion", "Of Mice and Men"])
+
+    assert found_scratch_titles(mysql_session, "The Hobbit") == ["The Hobbit", "The Hobbit Companion"]
+    assert found_scratch_titles(mysql_session, "the hob") == ["The Hobbit", "The Hobbit Companion"]
+    # Nothing but stopwords: found by scanning for the text
+    assert found_scratch_titles(mysql_session, "Of") == ["Of Mice and Men"]